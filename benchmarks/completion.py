@@ -0,0 +1,64 @@
+"""Benchmark completing cluster names from the name index.
+
+Each completion loads the index from disk and searches it, as the shell does for every
+tab press, so this measures the latency of completion without discovery.
+
+    python benchmarks/completion.py --names 1000 --names 10000 --names 100000
+
+"""
+import random
+import tempfile
+import time
+
+import click
+import dask.config
+
+from dask_ctl.names import load_name_index, update_name_index
+
+TEAMS = ["ml", "data", "etl", "research", "platform", "analytics"]
+
+
+def make_names(n):
+    random.seed(0)
+    return {
+        f"{random.choice(TEAMS)}-{random.choice(TEAMS)}-{random.randint(0, 10 * n):06d}"
+        for _ in range(n)
+    }
+
+
+def measure(incomplete, repeat=5):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = load_name_index().search(incomplete)
+        durations.append(time.perf_counter() - start)
+    return min(durations), len(matches)
+
+
+@click.command()
+@click.option(
+    "--names", multiple=True, type=int, default=[1000, 10000], show_default=True
+)
+@click.option(
+    "--incomplete",
+    multiple=True,
+    default=["ml-etl", "mdt9", "zzz"],
+    show_default=True,
+)
+def main(names, incomplete):
+    click.echo(f"{'names':>7}  {'incomplete':>10}  {'matches':>7}  {'time':>8}")
+    for n in names:
+        with tempfile.TemporaryDirectory() as directory:
+            with dask.config.set({"ctl.completion.path": f"{directory}/names.json"}):
+                update_name_index(
+                    [("kube", name) for name in make_names(n)], complete=["kube"]
+                )
+                for text in incomplete:
+                    duration, matches = measure(text)
+                    click.echo(
+                        f"{n:>7}  {text:>10}  {matches:>7}  {duration * 1000:>6.1f}ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark starting local clusters from a spec with and without fast start.
+
+Each mode runs in a fresh interpreter, as the forkserver lives for the whole process.
+The first cluster includes starting the forkserver, later ones reuse it, which is what
+a test suite starting a cluster per module sees.
+
+    python benchmarks/local_startup.py --workers 4 --clusters 5 --preload numpy
+
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+SPEC = """
+version: 1
+module: dask.distributed
+class: LocalCluster
+kwargs:
+  n_workers: {workers}
+  threads_per_worker: 1
+  dashboard_address: null
+"""
+
+RUN = """
+import json, sys, time
+import dask.config
+from dask_ctl.lifecycle import create_cluster
+
+spec_path, workers, clusters, fast_start, preload = json.loads(sys.argv[1])
+durations = []
+with dask.config.set({"ctl.fast-start.enabled": fast_start, "ctl.fast-start.preload": preload}):
+    for _ in range(clusters):
+        start = time.perf_counter()
+        cluster = create_cluster(spec_path, wait_for_workers=workers, timeout=300)
+        durations.append(time.perf_counter() - start)
+        cluster.close()
+print(json.dumps(durations))
+"""
+
+
+def run(spec_path, workers, clusters, fast_start, preload):
+    start = time.perf_counter()
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            RUN,
+            json.dumps([spec_path, workers, clusters, fast_start, preload]),
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    total = time.perf_counter() - start
+    return json.loads(output.decode().splitlines()[-1]), total
+
+
+@click.command()
+@click.option("--workers", default=4, help="Workers per cluster.")
+@click.option("--clusters", default=5, help="Clusters to start one after another.")
+@click.option("--preload", multiple=True, help="Extra modules to preload.")
+def main(workers, clusters, preload):
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml") as spec:
+        spec.write(SPEC.format(workers=workers))
+        spec.flush()
+        click.echo(f"{clusters} clusters of {workers} workers")
+        for fast_start in (False, True):
+            durations, total = run(
+                spec.name, workers, clusters, fast_start, list(preload)
+            )
+            later = durations[1:] or durations
+            click.echo(
+                f"{'fast start' if fast_start else 'spawn':>10}: "
+                f"first {durations[0]:.2f}s, "
+                f"later {sum(later) / len(later):.2f}s on average, "
+                f"process total {total:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark rendering cluster tables with rich against the plain text renderer.
+
+Rows are formatted the same way as ``dask cluster list`` and written to an in memory
+file, so only the cost of laying out and writing the table is measured.
+
+    python benchmarks/table_render.py --rows 100 --rows 1000 --rows 10000
+
+"""
+import datetime
+import io
+import time
+import tracemalloc
+
+import click
+from rich.console import Console
+
+from dask_ctl.renderables import ClusterTable
+
+
+def make_table(rows):
+    created = datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+    cluster_table = ClusterTable(show_status=False)
+    for i in range(rows):
+        cluster_table.add_record(
+            {
+                "name": f"cluster-{i:05d}",
+                "address": f"tcp://10.0.{i // 256 % 256}.{i % 256}:8786",
+                "type": "dask_kubernetes.operator.KubeCluster",
+                "discovery": "kubecluster",
+                "workers": i % 64,
+                "threads": i % 64 * 4,
+                "memory": i % 64 * 16 * 2**30,
+                "created": created,
+                "status": "running",
+            }
+        )
+    return cluster_table
+
+
+def render_rich(cluster_table):
+    Console(file=io.StringIO(), width=200).print(cluster_table.table())
+
+
+def render_plain(cluster_table):
+    cluster_table.write_plain(io.StringIO())
+
+
+def measure(render, cluster_table):
+    start = time.perf_counter()
+    render(cluster_table)
+    duration = time.perf_counter() - start
+    # Tracing allocations slows rendering down a lot, so measure memory separately
+    tracemalloc.start()
+    render(cluster_table)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+@click.command()
+@click.option(
+    "--rows", multiple=True, type=int, default=[100, 1000, 10000], show_default=True
+)
+def main(rows):
+    click.echo(f"{'rows':>6}  {'rich':>18}  {'plain':>18}  speedup")
+    for n in rows:
+        cluster_table = make_table(n)
+        rich_time, rich_peak = measure(render_rich, cluster_table)
+        plain_time, plain_peak = measure(render_plain, cluster_table)
+        click.echo(
+            f"{n:>6}  "
+            f"{rich_time:>7.3f}s {rich_peak / 2**20:>7.1f}MiB  "
+            f"{plain_time:>7.3f}s {plain_peak / 2**20:>7.1f}MiB  "
+            f"{rich_time / plain_time:>6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
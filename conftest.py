@@ -0,0 +1,6 @@
+import importlib.util
+
+# Modules for optional extras can't be imported to collect their doctests without them
+collect_ignore = []
+if importlib.util.find_spec("textual") is None:
+    collect_ignore.append("dask_ctl/tui.py")
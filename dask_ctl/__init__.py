@@ -1,5 +1,10 @@
 from ._version import get_versions
-from .exceptions import DaskClusterConfigNotFound  # noqa
+from .exceptions import (  # noqa
+    DaskClusterConfigNotFound,
+    DaskClusterCreateError,
+    DaskClusterCreateTimeout,
+    DaskClusterSpecInvalid,
+)
 import os.path
 
 from dask.widgets import TEMPLATE_PATHS
@@ -10,3 +15,12 @@ del get_versions
 TEMPLATE_PATHS.append(
     os.path.join(os.path.dirname(os.path.abspath(__file__)), "widgets", "templates")
 )
+
+
+def __getattr__(name):
+    # Imported on first use, as importing the lifecycle module pulls in distributed
+    if name == "temporary_cluster":
+        from .lifecycle import temporary_cluster
+
+        return temporary_cluster
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
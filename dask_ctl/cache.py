@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from contextlib import suppress
+import threading
+import time
+from typing import Optional
+
+import dask.config
+from dask.utils import parse_timedelta
+from distributed.core import Status
+from distributed.deploy.cluster import Cluster
+
+from . import config  # noqa
+
+
+def _release(cluster: Cluster) -> None:
+    """Disconnect a cluster manager without shutting down the cluster it represents.
+
+    We deliberately call the base ``Cluster._close`` which only closes comms and
+    background tasks, rather than any subclass implementation which may tear the
+    cluster itself down.
+
+    """
+    with suppress(Exception):
+        cluster.sync(Cluster._close, cluster)
+    with suppress(Exception):
+        cluster._loop_runner.stop()
+
+
+class ClusterManagerCache:
+    """LRU cache of constructed cluster managers keyed by cluster name.
+
+    Entries expire after ``ttl`` seconds and the cache holds at most ``maxsize``
+    entries. Before a cached manager is returned the scheduler is pinged, any manager
+    which is closed or unreachable is evicted and released.
+
+    Parameters
+    ----------
+    maxsize (optional)
+        Maximum number of managers to hold. Defaults to ``ctl.cache.size``.
+    ttl (optional)
+        Time to live for each entry. Defaults to ``ctl.cache.ttl``.
+    liveness_timeout (optional)
+        Time to wait for the scheduler to respond to a ping.
+        Defaults to ``ctl.cache.liveness-timeout``.
+
+    Examples
+    --------
+    >>> cache = ClusterManagerCache(maxsize=4, ttl="5 minutes")  # doctest: +SKIP
+    >>> cache.put("proxycluster-8786", cluster)  # doctest: +SKIP
+    >>> cache.get("proxycluster-8786")  # doctest: +SKIP
+    ProxyCluster(proxycluster-8786, 'tcp://localhost:8786', workers=4, threads=12, memory=17.18 GB)
+
+    """
+
+    def __init__(self, maxsize: int = None, ttl=None, liveness_timeout=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.liveness_timeout = liveness_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _maxsize(self):
+        return dask.config.get("ctl.cache.size", override_with=self.maxsize)
+
+    @property
+    def _ttl(self):
+        return parse_timedelta(dask.config.get("ctl.cache.ttl", override_with=self.ttl))
+
+    @property
+    def _liveness_timeout(self):
+        return parse_timedelta(
+            dask.config.get(
+                "ctl.cache.liveness-timeout", override_with=self.liveness_timeout
+            )
+        )
+
+    def _is_alive(self, cluster: Cluster) -> bool:
+        if cluster.status != Status.running:
+            return False
+        try:
+            # The scheduler identity includes every worker, so we use a cheap echo instead
+            cluster.sync(
+                cluster.scheduler_comm.echo,
+                data=b"ping",
+                callback_timeout=self._liveness_timeout,
+            )
+        except Exception:
+            return False
+        return True
+
+    def get(self, name: str) -> Optional[Cluster]:
+        """Return the cached manager for ``name`` if it is still fresh and alive."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            cluster, created = entry
+            if self._ttl is not None and time.monotonic() - created > self._ttl:
+                del self._entries[name]
+                cluster = None
+            else:
+                self._entries.move_to_end(name)
+        if cluster is None:
+            _release(entry[0])
+            return None
+        if not self._is_alive(cluster):
+            self.evict(name)
+            return None
+        return cluster
+
+    def put(self, name: str, cluster: Cluster) -> None:
+        """Add a manager to the cache, evicting the least recently used if full."""
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None and previous[0] is not cluster:
+                evicted.append(previous[0])
+            self._entries[name] = (cluster, time.monotonic())
+            while len(self._entries) > max(self._maxsize, 0):
+                _, (old, _) = self._entries.popitem(last=False)
+                evicted.append(old)
+        for old in evicted:
+            _release(old)
+
+    def evict(self, name: str) -> None:
+        """Remove and release the manager for ``name`` if it is cached."""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+        if entry is not None:
+            _release(entry[0])
+
+    def clear(self) -> None:
+        """Remove and release all cached managers."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for cluster, _ in entries:
+            _release(cluster)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+cluster_cache = ClusterManagerCache()
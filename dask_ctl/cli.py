@@ -1,42 +1,176 @@
-from time import sleep
+import functools
+import json
 import sys
+import time
 import warnings
 
 import click
-from rich import box
-from rich.console import Console
-from rich.table import Table
-from rich.syntax import Syntax
-from rich.progress import Progress, BarColumn
+import dask.config
 
 from . import __version__
-from .utils import loop
+from .cache import _release
+from .utils import interruptible, loop
 from .discovery import (
-    discover_cluster_names,
+    discover_cluster_names_concurrently,
     list_discovery_methods,
 )
-from .lifecycle import create_cluster, get_cluster, delete_cluster, get_snippet
-from .renderables import generate_table
+from .lifecycle import (
+    create_clusters,
+    get_cluster,
+    delete_cluster,
+    delete_clusters,
+    get_snippet,
+    scale_cluster,
+    scale_clusters,
+)
+from .exceptions import DaskClusterSpecInvalid
+from .formats import FIELDS, OUTPUT_FORMATS, parse_fields, write_clusters
+from .names import (
+    NameRecorder,
+    forget_names,
+    load_name_index,
+    save_name_index,
+    use_name,
+)
+from .plain import PlainTable, use_plain, write_plain
+from .spec import load_specs, warm_module
+from .top import (
+    USAGE_COLUMNS,
+    USAGE_FIELDS,
+    UsageWatcher,
+    format_usage_plain,
+    sort_records,
+)
+from .watch import ClusterWatcher
+from .workers import (
+    WORKER_COLUMN_WIDTHS,
+    WORKER_FIELDS,
+    format_worker,
+    iter_workers,
+    parse_filter,
+)
 
 from . import config  # noqa
 
-console = Console()
+
+# Rich is imported when it is first needed, so that machine readable output stays fast
+@functools.lru_cache(maxsize=None)
+def get_console():
+    from rich.console import Console
+
+    return Console()
+
 
 # Only show warnings from dask_ctl
 warnings.filterwarnings("ignore", module="^((?!dask_ctl).)*$")
-# Customize warning output on the CLI
-warnings.showwarning = lambda msg, *_: console.print(f":warning: {msg}", style="yellow")
+# Customize warning output on the CLI, on stderr so it never mixes with data on stdout
+warnings.showwarning = lambda msg, *_: click.secho(f"⚠ {msg}", fg="yellow", err=True)
 
 
 def autocomplete_cluster_names(ctx, args, incomplete):
-    async def _autocomplete_cluster_names():
-        return [
-            cluster
-            async for cluster, _ in discover_cluster_names()
-            if incomplete in cluster
-        ]
+    # Answer from the name index, and only discover clusters here when it is older
+    # than ctl.completion.ttl so that new clusters still show up
+    index = load_name_index()
+    if index.is_stale(dask.config.get("ctl.completion.ttl")):
+        names = NameRecorder()
+
+        async def _discover_cluster_names():
+            async for _ in discover_cluster_names_concurrently(on_complete=names):
+                pass
+
+        loop.run_sync(_discover_cluster_names)
+        index.update(names.discovered, names.complete)
+        index.refreshed = time.time()
+        save_name_index(index)
+    return index.search(incomplete)
+
+
+def record_cluster_name(ctx, param, value):
+    # Names used on the command line rank higher when completing, but not while
+    # the command line is only being parsed to complete it
+    if value and not ctx.resilient_parsing:
+        use_name(value)
+    return value
+
+
+def parse_selectors(ctx, param, value):
+    labels = {}
+    for selector in value:
+        key, sep, val = selector.partition("=")
+        if not sep or not key:
+            raise click.BadParameter(f"Expected KEY=VALUE, got {selector!r}")
+        labels[key] = val
+    return labels
+
+
+def parse_columns(ctx, param, value):
+    try:
+        return parse_fields(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def parse_usage_columns(ctx, param, value):
+    if not value:
+        return USAGE_COLUMNS
+    columns = tuple(dict.fromkeys(c.strip() for c in value.split(",") if c.strip()))
+    unknown = [c for c in columns if c not in USAGE_FIELDS]
+    if unknown:
+        raise click.BadParameter(
+            f"Unknown columns {', '.join(unknown)}, "
+            f"expected some of {', '.join(USAGE_FIELDS)}"
+        )
+    return columns
+
+
+def parse_filters(ctx, param, value):
+    try:
+        return [parse_filter(expression) for expression in value]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+plain_option = click.option(
+    "--plain",
+    is_flag=True,
+    help="Write plain text rather than a formatted table. This is the default when "
+    "not writing to a terminal.",
+)
+
+
+def is_bulk(name, discovery, labels):
+    return discovery is not None or bool(labels) or any(c in name for c in "*?[")
+
 
-    return loop.run_sync(_autocomplete_cluster_names)
+def run_bulk(operation, verb, *args, on_success=None, **kwargs):
+    from rich.progress import BarColumn, Progress
+
+    with Progress(
+        "[progress.description]{task.description}",
+        BarColumn(),
+        "{task.completed}/{task.total}",
+        console=get_console(),
+        transient=True,
+    ) as progress:
+        task = progress.add_task(f"[blue]{verb.title()} clusters...", total=None)
+
+        def _update(name, error, completed, total):
+            progress.update(task, completed=completed, total=total)
+            if error is None:
+                progress.console.print(f":heavy_check_mark: [blue]{name}[/blue] {verb}")
+            else:
+                progress.console.print(f":cross_mark: [blue]{name}[/blue] {error}")
+
+        results = operation(*args, progress=_update, **kwargs)
+
+    failed = [name for name, error in results.items() if error is not None]
+    if on_success:
+        on_success([name for name, error in results.items() if error is None])
+    get_console().print(
+        f"{verb.title()} {len(results) - len(failed)} of {len(results)} matching clusters."
+    )
+    if failed:
+        raise click.Abort()
 
 
 @click.command(
@@ -67,51 +201,429 @@ def cluster():
 
 @cluster.command()
 @click.option("-f", "--spec-file-path")
-def create(spec_file_path):
-    """Create a Dask cluster from a spec file."""
+@click.option("-c", "--concurrency", type=int, help="Clusters to create at once.")
+@click.option(
+    "--reuse",
+    is_flag=True,
+    help="Reuse running clusters that were created from an identical spec.",
+)
+@click.option("-e", "--environment", help="Environment overlay to apply to the spec.")
+@click.option(
+    "-w",
+    "--wait-for-workers",
+    type=int,
+    help="Wait until each cluster has at least this many workers.",
+)
+@click.option(
+    "-t",
+    "--timeout",
+    help="Give up on any cluster which has not started after this long, e.g '5m'.",
+)
+def create(spec_file_path, concurrency, reuse, environment, wait_for_workers, timeout):
+    """Create Dask clusters from a spec file.
+
+    If the spec file contains multiple clusters they are created concurrently.
+    """
+
+    start = time.perf_counter()
+    timings = {}
+
+    def _progress(name, error, completed, total):
+        elapsed = time.perf_counter() - start
+        if error is None:
+            click.echo(
+                f"[{completed}/{total}] Started {name} in {elapsed:.1f}s. "
+                + ", ".join(
+                    f"{phase}: {seconds:.2f}s"
+                    for phase, seconds in timings.get(name, {}).items()
+                )
+            )
+        else:
+            click.echo(
+                f"[{completed}/{total}] Failed to create cluster {name}: {error}"
+            )
 
     try:
-        cluster = create_cluster(spec_file_path)
+        with dask.config.set({"ctl.environment": environment} if environment else {}):
+            clusters = create_clusters(
+                spec_file_path,
+                concurrency=concurrency,
+                progress=_progress,
+                reuse=reuse,
+                wait_for_workers=wait_for_workers,
+                timeout=timeout,
+                timings=timings,
+            )
+    except DaskClusterSpecInvalid as e:
+        click.echo(f"Failed to create cluster. {e}")
+        raise click.Abort()
+    except KeyboardInterrupt:
+        click.echo("Cancelled, any clusters that were still starting have been closed.")
+        raise click.Abort()
     except Exception:
         click.echo("Failed to create cluster.")
         raise click.Abort()
-    else:
-        click.echo(f"Created cluster {cluster.name}.")
+
+    failed = [name for name, c in clusters.items() if isinstance(c, Exception)]
+    for name, c in clusters.items():
+        if name not in failed:
+            click.echo(f"Created cluster {c.name}.")
+    click.echo(
+        f"Created {len(clusters) - len(failed)} of {len(clusters)} clusters "
+        f"in {time.perf_counter() - start:.1f}s."
+    )
+    if failed:
+        raise click.Abort()
+
+
+@cluster.command()
+@click.option(
+    "-f",
+    "--spec-file-path",
+    "spec_file_paths",
+    multiple=True,
+    help="Spec file to warm. Can be repeated. Defaults to the configured spec.",
+)
+def warm(spec_file_paths):
+    """Prime import and bytecode caches for cluster managers.
+
+    Imports the cluster manager module used by each spec and compiles bytecode for its
+    package so that later `dask cluster create` calls start faster.
+    """
+    spec_file_paths = spec_file_paths or [
+        dask.config.get("ctl.cluster-spec", None) or "dask-cluster.yaml"
+    ]
+
+    modules = set()
+    for spec_file_path in spec_file_paths:
+        try:
+            specs = load_specs(spec_file_path)
+        except Exception as e:
+            click.echo(f"Unable to load {spec_file_path}: {e}")
+            raise click.Abort()
+        modules.update(
+            (cm_module, cm_class) for cm_module, cm_class, *_ in specs.values()
+        )
+
+    failed = False
+    for module, cm_class in sorted(modules):
+        start = time.perf_counter()
+        try:
+            warm_module(module, cm_class)
+        except Exception as e:
+            failed = True
+            click.echo(f"Failed to warm {module}: {e}")
+        else:
+            click.echo(f"Warmed {module} in {time.perf_counter() - start:.2f}s.")
+    if failed:
+        raise click.Abort()
 
 
 @cluster.command()
 @click.argument("discovery", type=str, required=False)
-def list(discovery=None):
+@click.option(
+    "-o",
+    "--output",
+    type=click.Choice(["table", *OUTPUT_FORMATS]),
+    default="table",
+    help="Output format. ndjson, csv and names are written as clusters are found.",
+)
+@click.option(
+    "-w",
+    "--watch",
+    is_flag=True,
+    help="Keep updating clusters in place. Only supports table and ndjson output.",
+)
+@click.option("-n", "--interval", help="Time between updates when watching, e.g '5s'.")
+@click.option(
+    "-c",
+    "--columns",
+    callback=parse_columns,
+    help=f"Comma separated columns to show, from {','.join(FIELDS)}, "
+    "or worker statistics such as memory_p95 or stragglers.",
+)
+@plain_option
+def list(
+    discovery=None,
+    output="table",
+    watch=False,
+    interval=None,
+    columns=FIELDS,
+    plain=False,
+):
     """List Dask clusters.
 
     DISCOVERY can be optionally set to restrict which discovery method to use.
     Run `dask cluster discovery list` for all available options.
+
+    In a terminal clusters are shown as soon as they are discovered along with the
+    progress of each discovery method. The machine readable output formats write
+    warnings and errors to stderr, and the names format does not connect to any
+    schedulers.
+
+    With --watch connections to each scheduler are kept open and only clusters which
+    have changed are updated, in the table or as new ndjson records. New clusters are
+    picked up every ctl.watch.rediscover-interval.
+
+    Only the data needed for the chosen --columns is fetched. Listing just the name,
+    discovery and type columns, or the names format, does not connect to any
+    schedulers. Worker statistics such as memory_p95 or stragglers are computed on
+    each scheduler, see `dask cluster top --help`.
+
+    Tables are written as plain text when not in a terminal, with --plain, or once
+    there are more than ctl.table.plain-threshold clusters.
     """
+    if watch:
+        if output not in ("table", "ndjson"):
+            raise click.BadParameter(
+                "Watching only supports table and ndjson output", param_hint="output"
+            )
+        return watch_clusters(discovery, output, interval, columns, plain)
+
+    # The names found are added to the index used to complete cluster names
+    names = NameRecorder()
+
+    if output != "table":
+
+        def _on_status(discovery_method, status):
+            if discovery is None and status in ("failed", "timed out"):
+                click.echo(f"Discovery {discovery_method} {status}.", err=True)
+
+        try:
+            loop.run_sync(
+                lambda: write_clusters(
+                    output,
+                    discovery=discovery,
+                    on_status=_on_status,
+                    fields=columns,
+                    on_complete=names,
+                )
+            )
+        except Exception as e:
+            click.echo(f"Discovery {discovery} failed: {e}", err=True)
+            raise click.Abort()
+        finally:
+            names.save(refreshed=discovery is None)
+        return
+
+    from rich.live import Live
+
+    from .renderables import ClusterTable, populate_table
+
+    console = get_console()
 
     async def _list():
-        with console.status("[bold green]Discovering clusters...") as status:
-            table = await generate_table(
-                discovery=discovery, status=status, console=console
+        # Only animate when attached to a terminal so that piped output is deterministic
+        if use_plain(plain=plain):
+            cluster_table = ClusterTable(show_status=False, fields=columns)
+            await populate_table(
+                cluster_table, discovery=discovery, console=console, on_complete=names
             )
+            cluster_table.write_plain()
+            return
+        cluster_table = ClusterTable(
+            fields=columns, max_rows=dask.config.get("ctl.table.plain-threshold")
+        )
+        with Live(cluster_table, console=console, refresh_per_second=20):
+            await populate_table(
+                cluster_table, discovery=discovery, console=console, on_complete=names
+            )
+        if use_plain(rows=len(cluster_table)):
+            cluster_table.write_plain()
+
+    try:
+        loop.run_sync(_list)
+    finally:
+        names.save(refreshed=discovery is None)
+
+
+def watch_clusters(discovery, output, interval, columns=FIELDS, plain=False):
+    watcher = ClusterWatcher(discovery=discovery, interval=interval, fields=columns)
+    live = None
+
+    if output == "ndjson":
+
+        def _update(changed, removed):
+            for record in changed:
+                click.echo(json.dumps(record))
+            for record in removed:
+                click.echo(json.dumps({**record, "status": "removed"}))
+
+    else:
+        from rich.live import Live
+
+        from .renderables import ClusterTable
+
+        console = get_console()
+        cluster_table = ClusterTable(show_status=False, fields=columns)
+        if not use_plain(plain=plain):
+            # Only refresh when a row has changed rather than on a timer
+            live = Live(cluster_table, console=console, auto_refresh=False)
+            live.start()
+
+        def _update(changed, removed):
+            for record in removed:
+                cluster_table.remove_record(record)
+            for record in changed:
+                cluster_table.add_record(record)
+            if live is not None:
+                live.refresh()
+            else:
+                cluster_table.write_plain()
+                click.echo()
 
-        console.print(table)
+    async def _watch():
+        async for changed, removed in watcher.watch():
+            _update(changed, removed)
 
-    loop.run_sync(_list)
+    try:
+        with interruptible():
+            loop.run_sync(_watch)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if live is not None:
+            live.stop()
+        watcher.close()
 
 
 @cluster.command()
-@click.argument("name", shell_complete=autocomplete_cluster_names)
+@click.argument("discovery", type=str, required=False)
+@click.option(
+    "-s",
+    "--sort",
+    type=click.Choice(USAGE_FIELDS),
+    default="cpu",
+    help="Column to sort clusters by.",
+)
+@click.option("-a", "--ascending", is_flag=True, help="Sort smallest first.")
+@click.option("-n", "--interval", help="Time between updates, e.g '5s'.")
+@click.option("--once", is_flag=True, help="Print the usage of each cluster and exit.")
+@click.option(
+    "-c",
+    "--columns",
+    callback=parse_usage_columns,
+    help="Comma separated columns to show, including worker statistics such as "
+    "memory_p95 or stragglers.",
+)
+@plain_option
+def top(
+    discovery=None,
+    sort="cpu",
+    ascending=False,
+    interval=None,
+    once=False,
+    columns=USAGE_COLUMNS,
+    plain=False,
+):
+    """Show resource usage across Dask clusters.
+
+    DISCOVERY can be optionally set to restrict which discovery method to use.
+
+    Shows the CPU, memory used against the memory limit, tasks processing and queued
+    on workers, network traffic and bytes spilled to disk for each cluster. Each update
+    makes a single request to each scheduler. When not attached to a terminal, or with
+    --once or --plain, a plain text table is printed on each update instead.
+
+    The min, median, p95 and max of memory, cpu and processing across workers, and the
+    number of stragglers with a backlog of queued tasks, can be shown with --columns.
+
+    With the tui extra installed the live view is an interactive app which can be
+    sorted with the keys shown in its footer.
+    """
+    if not use_plain(plain=plain) and not once:
+        try:
+            from .tui import DaskCtlTUI
+        except ImportError:
+            pass
+        else:
+            return DaskCtlTUI(discovery, interval, sort, ascending, columns).run()
+
+    watcher = UsageWatcher(discovery=discovery, interval=interval)
+    console = get_console()
+    live = None
+    if not use_plain(plain=plain) and not once:
+        from rich.live import Live
+
+        from .renderables import usage_table
+
+        live = Live(console=console, auto_refresh=False)
+        live.start()
+
+    def _update():
+        records = sort_records([*watcher.records.values()], sort, not ascending)
+        if live is not None:
+            live.update(usage_table(records, columns), refresh=True)
+        else:
+            click.echo(format_usage_plain(records, columns))
+
+    async def _top():
+        if once:
+            await watcher.discover()
+            await watcher.refresh()
+            return _update()
+        async for _ in watcher.watch():
+            _update()
+
+    try:
+        with interruptible():
+            loop.run_sync(_top)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if live is not None:
+            live.stop()
+        watcher.close()
+
+
+@cluster.command()
+@click.argument(
+    "name", shell_complete=autocomplete_cluster_names, callback=record_cluster_name
+)
 @click.argument("n-workers", type=int)
-def scale(name, n_workers):
+@click.option(
+    "-d", "--discovery", help="Only match clusters from this discovery method."
+)
+@click.option(
+    "-l",
+    "--selector",
+    "labels",
+    multiple=True,
+    callback=parse_selectors,
+    help="Only match clusters with this KEY=VALUE label. Can be repeated.",
+)
+@click.option("-c", "--concurrency", type=int, help="Clusters to scale at once.")
+@click.option(
+    "-t", "--timeout", help="Give up waiting for workers after this long, e.g '5m'."
+)
+@click.option("-s", "--step", type=int, help="Add at most this many workers at a time.")
+@click.option("-i", "--interval", help="Pause between steps, e.g '30s'.")
+def scale(name, n_workers, discovery, labels, concurrency, timeout, step, interval):
     """Scale a Dask cluster.
 
-    NAME is the name of the cluster to scale.
+    NAME is the name of the cluster to scale, or a glob pattern matching many clusters.
     Run `dask cluster list` for all available options.
 
     N_WORKERS is the number of workers to scale to.
 
     """
 
+    if is_bulk(name, discovery, labels):
+        return run_bulk(
+            scale_clusters,
+            "scaled",
+            name,
+            n_workers,
+            discovery=discovery,
+            labels=labels,
+            concurrency=concurrency,
+            step=step,
+            interval=interval,
+            timeout=timeout,
+        )
+
+    from rich.progress import BarColumn, Progress
+
     try:
         with Progress(
             "[progress.description]{task.description}",
@@ -123,7 +635,7 @@ def scale(name, n_workers):
                 "[blue]Preparing to scale...", start=False, workers="..", n_workers=".."
             )
             cluster = get_cluster(name)
-            start_workers = len(cluster.scheduler_info["workers"])
+            start_workers = len(cluster.sync(cluster.scheduler_comm.ncores))
             diff_workers = n_workers - start_workers
 
             if diff_workers != 0:
@@ -139,17 +651,19 @@ def scale(name, n_workers):
                     progress.update(scale_task, description="[red]Removing workers...")
                 progress.start_task(scale_task)
 
-                cluster.scale(n_workers)
-
-                while len(cluster.scheduler_info["workers"]) != n_workers:
-                    sleep(0.1)
-                    progress.update(
+                scale_cluster(
+                    cluster,
+                    n_workers,
+                    step=step,
+                    interval=interval,
+                    wait=True,
+                    timeout=timeout,
+                    callback=lambda workers: progress.update(
                         scale_task,
-                        completed=abs(
-                            len(cluster.scheduler_info["workers"]) - start_workers
-                        ),
-                        workers=len(cluster.scheduler_info["workers"]),
-                    )
+                        completed=abs(workers - start_workers),
+                        workers=workers,
+                    ),
+                )
 
                 progress.update(scale_task, completed=diff_workers)
                 progress.console.print(
@@ -161,32 +675,182 @@ def scale(name, n_workers):
                 )
 
     except Exception as e:
-        console.print(e)
+        get_console().print(e)
         raise click.Abort()
 
 
 @cluster.command()
 @click.argument("name", shell_complete=autocomplete_cluster_names)
-def delete(
-    name,
-):
+@click.option(
+    "-d", "--discovery", help="Only match clusters from this discovery method."
+)
+@click.option(
+    "-l",
+    "--selector",
+    "labels",
+    multiple=True,
+    callback=parse_selectors,
+    help="Only match clusters with this KEY=VALUE label. Can be repeated.",
+)
+@click.option("-c", "--concurrency", type=int, help="Clusters to delete at once.")
+@click.option(
+    "--drain",
+    is_flag=True,
+    help="Stop workers taking new tasks and wait for their tasks before closing.",
+)
+@click.option(
+    "-t",
+    "--timeout",
+    help="Stop waiting for processing tasks after this long, e.g '5m'.",
+)
+@click.option("-b", "--batch-size", type=int, help="Workers to retire at a time.")
+def delete(name, discovery, labels, concurrency, drain, timeout, batch_size):
     """Delete a Dask cluster.
 
-    NAME is the name of the cluster to delete.
+    NAME is the name of the cluster to delete, or a glob pattern matching many clusters.
     Run `dask cluster list` for all available options.
 
     """
+    if is_bulk(name, discovery, labels):
+        return run_bulk(
+            delete_clusters,
+            "deleted",
+            name,
+            discovery=discovery,
+            labels=labels,
+            concurrency=concurrency,
+            drain=drain,
+            timeout=timeout,
+            batch_size=batch_size,
+            on_success=forget_names,
+        )
+
     try:
-        delete_cluster(name)
+        delete_cluster(name, drain=drain, timeout=timeout, batch_size=batch_size)
     except Exception as e:
         click.echo(e)
         raise click.Abort()
     else:
+        # Deleted clusters are no longer offered when completing names
+        forget_names([name])
         click.echo(f"Deleted cluster {name}.")
 
 
 @cluster.command()
-@click.argument("name", shell_complete=autocomplete_cluster_names)
+@click.argument(
+    "name", shell_complete=autocomplete_cluster_names, callback=record_cluster_name
+)
+@click.option(
+    "-s", "--sort", type=click.Choice(WORKER_FIELDS), help="Field to sort workers by."
+)
+@click.option("-a", "--ascending", is_flag=True, help="Sort smallest first.")
+@click.option("-t", "--top", type=int, help="Only show this many workers.")
+@click.option(
+    "-f",
+    "--filter",
+    "filters",
+    multiple=True,
+    callback=parse_filters,
+    help="Only show workers matching a condition, e.g 'memory>80%' or 'cpu>=50'. "
+    "Can be given more than once.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Choice(["table", "ndjson"]),
+    default="table",
+    help="Output format.",
+)
+@click.option("-p", "--page-size", type=int, help="Workers to fetch at a time.")
+@plain_option
+def workers(name, sort, ascending, top, filters, output, page_size, plain):
+    """List the workers of a cluster.
+
+    NAME is the name of the cluster to list the workers of.
+    Run `dask cluster list` for all available options.
+
+    Workers are sorted and filtered on the scheduler and fetched a page at a time, each
+    page is shown as soon as it arrives. Sorting is largest first unless --ascending is
+    given. Memory filters can use a size, e.g 'memory>2GiB', or a percentage of the
+    memory limit. More than ctl.table.plain-threshold workers are written as plain
+    text, as when not in a terminal or with --plain.
+    """
+    try:
+        cluster = get_cluster(name, cache=False)
+    except Exception as e:
+        click.echo(e, err=True)
+        raise click.Abort()
+
+    try:
+        _list_workers(cluster, sort, ascending, top, filters, output, page_size, plain)
+    finally:
+        _release(cluster)
+
+
+def _list_workers(cluster, sort, ascending, top, filters, output, page_size, plain):
+    pages = iter_workers(
+        cluster,
+        sort=sort,
+        ascending=ascending,
+        filters=filters,
+        top=top,
+        page_size=page_size,
+    )
+    if output == "ndjson":
+        for page, _ in pages:
+            for row in page:
+                click.echo(json.dumps(row))
+        return
+
+    titles = {c: c.replace("_", " ").title() for c in WORKER_COLUMN_WIDTHS}
+    plain_table = None
+    shown = total = 0
+    for page, total in pages:
+        if not shown and use_plain(total if top is None else min(top, total), plain):
+            # Addresses are copied from the output, so size their column to fit them
+            widths = dict(
+                WORKER_COLUMN_WIDTHS,
+                address=max(
+                    WORKER_COLUMN_WIDTHS["address"],
+                    *(len(row["address"]) for row in page),
+                ),
+            )
+            plain_table = PlainTable(
+                titles.values(), {titles[c]: width for c, width in widths.items()}
+            )
+        if plain_table is not None:
+            for row in page:
+                plain_table.write(format_worker(row).values())
+            plain_table.flush()
+        else:
+            _print_worker_page(page, titles, header=not shown)
+        shown += len(page)
+    if plain_table is None:
+        get_console().print(f"Showing {shown} of {total} workers.", style="dim")
+
+
+def _print_worker_page(page, titles, header):
+    from rich import box
+    from rich.table import Table
+
+    # Only the first page has a header, later pages carry on the same table
+    table = Table(box=box.SIMPLE_HEAD, show_header=header, show_edge=False)
+    for column, title in titles.items():
+        table.add_column(
+            title,
+            style="cyan" if column == "address" else None,
+            # Fixed widths keep the columns of each page lined up
+            width=WORKER_COLUMN_WIDTHS[column],
+        )
+    for row in page:
+        table.add_row(*format_worker(row).values())
+    get_console().print(table)
+
+
+@cluster.command()
+@click.argument(
+    "name", shell_complete=autocomplete_cluster_names, callback=record_cluster_name
+)
 def snippet(
     name,
 ):
@@ -196,6 +860,8 @@ def snippet(
     Run `dask cluster list` for all available options.
 
     """
+    from rich.syntax import Syntax
+
     try:
         snip = get_snippet(name)
         snip = Syntax(
@@ -207,7 +873,7 @@ def snippet(
     except Exception as e:
         click.echo(e)
     else:
-        console.print(snip)
+        get_console().print(snip)
 
 
 @cluster.group()
@@ -217,7 +883,8 @@ def discovery():
 
 
 @discovery.command(name="list")
-def list_discovery():
+@plain_option
+def list_discovery(plain=False):
     """List installed discovery methods.
 
     Dask clusters can be created by many different packages. Each package has the option
@@ -225,6 +892,24 @@ def list_discovery():
     methods registered on your system.
 
     """
+    if use_plain(plain=plain):
+        write_plain(
+            ["Name", "Package", "Version", "Path", "Enabled"],
+            [
+                [
+                    method_name,
+                    method["package"],
+                    method["version"],
+                    method["path"],
+                    "yes" if method["enabled"] else "no",
+                ]
+                for method_name, method in list_discovery_methods().items()
+            ],
+        )
+        return
+
+    from rich import box
+    from rich.table import Table
 
     async def _list_discovery():
         table = Table(box=box.SIMPLE)
@@ -242,7 +927,7 @@ def list_discovery():
                 method["path"],
                 ":heavy_check_mark:" if method["enabled"] else ":cross_mark:",
             )
-        console.print(table)
+        get_console().print(table)
 
     loop.run_sync(_list_discovery)
 
@@ -251,7 +936,7 @@ def list_discovery():
 @click.argument("name")
 def enable_discovery(name):
     """Enable a discovery method."""
-    console.print(
+    get_console().print(
         "To enable discovery methods please update your configuration.\n"
         "See <TODO add docs link>"
     )
@@ -261,7 +946,7 @@ def enable_discovery(name):
 @click.argument("name")
 def disable_discovery(name):
     """Disable a discovery method."""
-    console.print(
+    get_console().print(
         "To disable discovery methods please update your configuration.\n"
         "See <TODO add docs link>"
     )
@@ -5,6 +5,7 @@ import pkg_resources
 import warnings
 
 import dask.config
+from distributed.deploy.cluster import Cluster
 from distributed.deploy.spec import SpecCluster
 
 from .utils import AsyncTimedIterable
@@ -140,3 +141,188 @@ async def discover_clusters(discovery=None) -> AsyncIterator[SpecCluster]:
     async for cluster_name, cluster_class in discover_cluster_names(discovery):
         with suppress(Exception):
             yield cluster_class.from_name(cluster_name)
+
+
+async def discover_cluster_names_concurrently(
+    discovery: str = None,
+    on_status: Callable = None,
+    timeout: float = 5,
+    on_complete: Callable = None,
+) -> AsyncIterator[Tuple[str, str, Callable]]:
+    """Generator to discover cluster names from all discovery methods at once.
+
+    Unlike :func:`discover_cluster_names`, which works through discovery methods one
+    at a time, every method runs concurrently and each name is yielded as soon as it
+    is discovered, so a slow discovery method does not hold back the others.
+
+    Parameters
+    ----------
+    discovery
+        Discovery method to use, as listed in :func:`list_discovery_methods`.
+        Default is ``None`` which uses all discovery methods.
+    on_status (optional)
+        Callable which is called as ``on_status(discovery_method, status)`` when each
+        method starts and finishes. The status is one of ``"discovering"``, ``"done"``,
+        ``"timed out"`` or ``"failed"``.
+    timeout (optional)
+        Maximum time to wait for a discovery method to yield its next cluster.
+    on_complete (optional)
+        Callable which is called as ``on_complete(discovered, complete)`` once every
+        method has finished, with the ``(discovery_method, name)`` pairs which were
+        discovered and the methods which finished without an error or timeout.
+
+    Yields
+    -------
+    tuple
+        Each tuple contains the discovery method, the name of the cluster and a class
+        which can be used to represent it.
+
+    Raises
+    ------
+    Exception
+        If ``discovery`` is given, any error raised by that discovery method once the
+        names it did find have been yielded.
+
+    Examples
+    --------
+    >>> from dask.distributed import LocalCluster  # doctest: +SKIP
+    >>> cluster = LocalCluster(scheduler_port=8786)  # doctest: +SKIP
+    >>> [c async for c in discover_cluster_names_concurrently()]  # doctest: +SKIP
+    [('proxycluster', 'proxycluster-8786', dask_ctl.proxy.ProxyCluster)]
+
+    """
+    discovery_methods = {
+        name: method
+        for name, method in list_discovery_methods().items()
+        if method["enabled"] and (discovery is None or discovery == name)
+    }
+    queue = asyncio.Queue()
+    done = object()
+    errors = []
+    discovered = []
+    complete = []
+
+    def _status(discovery_method, status):
+        if status == "done":
+            complete.append(discovery_method)
+        if on_status:
+            on_status(discovery_method, status)
+
+    async def _discover(discovery_method, discover):
+        _status(discovery_method, "discovering")
+        try:
+            async for cluster_name, cluster_class in AsyncTimedIterable(
+                discover(), timeout
+            ):
+                await queue.put((discovery_method, cluster_name, cluster_class))
+            status = "done"
+        except asyncio.TimeoutError:
+            status = "timed out"
+        except Exception as e:  # We are calling code that is out of our control here
+            status = "failed"
+            errors.append(e)
+        _status(discovery_method, status)
+
+    async def _discover_all():
+        try:
+            await asyncio.gather(
+                *[
+                    _discover(name, method["discover"])
+                    for name, method in discovery_methods.items()
+                ]
+            )
+        finally:
+            await queue.put(done)
+
+    runner = asyncio.ensure_future(_discover_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            discovered.append(item[:2])
+            yield item
+    finally:
+        runner.cancel()
+    if on_complete:
+        on_complete(discovered, complete)
+    if discovery is not None and errors:
+        raise errors[0]
+
+
+async def discover_clusters_concurrently(
+    discovery: str = None,
+    on_status: Callable = None,
+    timeout: float = 5,
+    on_complete: Callable = None,
+) -> AsyncIterator[Tuple[str, Cluster]]:
+    """Generator to discover clusters from all discovery methods at once.
+
+    Takes the names from :func:`discover_cluster_names_concurrently` and constructs
+    the cluster managers in a thread pool. Each cluster is yielded as soon as it is
+    ready, so a slow discovery method or scheduler does not hold back the others.
+
+    Parameters
+    ----------
+    discovery, on_status, timeout, on_complete
+        See :func:`discover_cluster_names_concurrently`.
+
+    Yields
+    -------
+    tuple
+        Each tuple contains the discovery method and the cluster manager.
+
+    Examples
+    --------
+    >>> from dask.distributed import LocalCluster  # doctest: +SKIP
+    >>> cluster = LocalCluster(scheduler_port=8786)  # doctest: +SKIP
+    >>> [c async for c in discover_clusters_concurrently()]  # doctest: +SKIP
+    [('proxycluster', ProxyCluster(proxycluster-8786, 'tcp://localhost:8786', workers=4, threads=12, memory=17.18 GB))]
+
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    async def _construct(discovery_method, cluster_name, cluster_class):
+        with suppress(Exception):
+            cluster = await loop.run_in_executor(
+                None, cluster_class.from_name, cluster_name
+            )
+            queue.put_nowait((discovery_method, cluster))
+
+    async def _discover_all():
+        constructing = []
+        try:
+            async for (
+                discovery_method,
+                cluster_name,
+                cluster_class,
+            ) in discover_cluster_names_concurrently(
+                discovery=discovery,
+                on_status=on_status,
+                timeout=timeout,
+                on_complete=on_complete,
+            ):
+                constructing.append(
+                    asyncio.ensure_future(
+                        _construct(discovery_method, cluster_name, cluster_class)
+                    )
+                )
+        finally:
+            try:
+                await asyncio.gather(*constructing)
+            finally:
+                queue.put_nowait(done)
+
+    runner = asyncio.ensure_future(_discover_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        runner.cancel()
+    # Re-raise errors from a specific discovery method
+    await runner
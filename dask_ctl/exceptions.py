@@ -1,2 +1,22 @@
 class DaskClusterConfigNotFound(FileNotFoundError):
     """Unable to find the Dask cluster config."""
+
+
+class DaskClusterSpecInvalid(ValueError):
+    """The Dask cluster spec is not valid."""
+
+
+class DaskClusterCreateError(RuntimeError):
+    """Creating a Dask cluster failed.
+
+    The ``phase`` attribute holds the startup phase which failed, one of ``import``,
+    ``scheduler`` or ``workers``.
+    """
+
+    def __init__(self, phase: str, message: str):
+        super().__init__(f"{message} (phase: {phase})")
+        self.phase = phase
+
+
+class DaskClusterCreateTimeout(DaskClusterCreateError, TimeoutError):
+    """Creating a Dask cluster did not complete within the timeout."""
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+import importlib.util
+import multiprocessing
+from multiprocessing import forkserver
+import threading
+import warnings
+
+import dask.config
+from distributed.deploy import LocalCluster
+from distributed.utils import get_mp_context
+
+from . import config  # noqa
+
+_lock = threading.Lock()
+
+# Modules we have asked the forkserver to preload, the preload list can only be
+# changed until the forkserver has started
+_preloaded = []
+
+# Clusters may be created concurrently, so the config is set while any block is
+# active rather than restored by each block in turn
+_active = 0
+_config = None
+
+
+def is_local_cluster_manager(cluster_manager) -> bool:
+    """Whether a cluster manager class starts its workers as local processes."""
+    return isinstance(cluster_manager, type) and issubclass(
+        cluster_manager, LocalCluster
+    )
+
+
+def _default_preload() -> list:
+    # The same modules distributed preloads in a forkserver, which our list replaces
+    from distributed.versions import optional_packages, required_packages
+
+    return [
+        "distributed",
+        *(
+            package
+            for package, _ in required_packages + optional_packages
+            if importlib.util.find_spec(package) is not None
+        ),
+    ]
+
+
+@contextmanager
+def fast_start(preload: list = None):
+    """Start local worker processes from a forkserver with modules preloaded.
+
+    Worker processes are normally spawned and have to import ``distributed`` and
+    everything else they need from scratch. Workers started inside this block are
+    instead forked from a server process which has already imported ``distributed``,
+    its dependencies and the ``preload`` modules.
+
+    ``distributed.worker.multiprocessing-method`` is only set to ``forkserver`` inside
+    the block, so construct the cluster within it. Workers added later when scaling, or
+    started by awaiting an asynchronous cluster after the block, are spawned as usual.
+    The forkserver itself lives for the rest of the process so later clusters start
+    quickly too. Modules can only be added to the preload list until it has started.
+
+    Parameters
+    ----------
+    preload (optional)
+        Modules to import in the forkserver. Defaults to ``ctl.fast-start.preload``.
+
+    Yields
+    ------
+    bool
+        Whether fast start is active, it is not available on platforms without
+        the ``forkserver`` start method.
+
+    Examples
+    --------
+    >>> with fast_start(["numpy", "pandas"]):  # doctest: +SKIP
+    ...     cluster = LocalCluster(n_workers=4)
+
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        warnings.warn("Fast start is not available on this platform")
+        yield False
+        return
+    preload = dask.config.get("ctl.fast-start.preload", override_with=preload) or []
+
+    global _active, _config
+    with _lock:
+        if not _active:
+            _config = dask.config.set(
+                {"distributed.worker.multiprocessing-method": "forkserver"}
+            )
+        _active += 1
+        try:
+            # distributed sets its own preload list the first time it creates a
+            # forkserver context, which ours then replaces
+            ctx = get_mp_context()
+            modules = list(
+                dict.fromkeys([*(_preloaded or _default_preload()), *preload])
+            )
+            if modules != _preloaded:
+                ctx.set_forkserver_preload(modules)
+                _preloaded[:] = modules
+            forkserver.ensure_running()
+        except BaseException:
+            _release_config()
+            raise
+    try:
+        yield True
+    finally:
+        with _lock:
+            _release_config()
+
+
+def _release_config():
+    global _active, _config
+    _active -= 1
+    if not _active:
+        _config.__exit__(None, None, None)
+        _config = None
@@ -0,0 +1,307 @@
+"""Machine readable output for cluster listings.
+
+Nothing in here imports ``rich``, so that scripts calling ``dask cluster list -o ...``
+in a loop do not pay for setting up a terminal renderer.
+
+"""
+import asyncio
+from contextlib import suppress
+import csv
+import datetime
+import json
+import sys
+from typing import AsyncIterator, Optional, Tuple
+
+import yaml
+
+from dask.utils import typename
+
+from .discovery import (
+    discover_cluster_names_concurrently,
+    discover_clusters_concurrently,
+)
+from .summary import STAT_FIELDS, get_cluster_summary, summarize_workers
+
+#: Output formats supported by :func:`write_clusters`
+OUTPUT_FORMATS = ("json", "ndjson", "yaml", "csv", "names")
+
+#: Fields of each cluster record, in output order
+FIELDS = (
+    "name",
+    "address",
+    "type",
+    "discovery",
+    "workers",
+    "threads",
+    "memory",
+    "created",
+    "status",
+)
+
+#: Fields which are known from discovery alone, without contacting the scheduler
+DISCOVERY_FIELDS = ("name", "discovery", "type")
+
+
+def parse_fields(fields=None) -> tuple:
+    """Validate a sequence or comma separated string of fields, in the order given.
+
+    Fields can be any of :data:`FIELDS` or the worker statistics in
+    :data:`dask_ctl.summary.STAT_FIELDS`. Returns all :data:`FIELDS` when ``fields`` is
+    empty.
+
+    """
+    if not fields:
+        return FIELDS
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS + STAT_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields {', '.join(unknown)}, "
+            f"expected some of {', '.join(FIELDS + STAT_FIELDS)}"
+        )
+    return tuple(dict.fromkeys(fields))
+
+
+def needs_cluster(fields=FIELDS) -> bool:
+    """Whether any of ``fields`` need a cluster manager connected to the scheduler."""
+    return not set(fields) <= set(DISCOVERY_FIELDS)
+
+
+def needs_summary(fields=FIELDS) -> bool:
+    """Whether any of ``fields`` need worker statistics from the scheduler."""
+    return bool(set(fields) & set(STAT_FIELDS))
+
+
+def get_created(cluster):
+    """Time the scheduler started as an ISO 8601 string, or ``None`` if unknown."""
+    try:
+        started = float(cluster.scheduler_info["started"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (
+        datetime.datetime.fromtimestamp(started)
+        .astimezone()
+        .isoformat(timespec="seconds")
+    )
+
+
+def name_record(
+    name: str, discovery_method: str, cluster_class, fields=DISCOVERY_FIELDS
+) -> dict:
+    """Record of a discovered cluster name, limited to :data:`DISCOVERY_FIELDS`."""
+    record = {
+        "name": name,
+        "type": typename(cluster_class),
+        "discovery": discovery_method,
+    }
+    return {field: record[field] for field in fields if field in record}
+
+
+def cluster_record(
+    cluster, discovery_method: str, fields=FIELDS, summary: dict = None
+) -> dict:
+    """Summarise a cluster manager as a dictionary of plain values.
+
+    Only the given ``fields`` are computed, in the order given. Worker totals and
+    statistics are taken from ``summary``, see :func:`dask_ctl.summary.get_summary`.
+    Without one they are computed from the scheduler info held by the manager, which
+    keeps up with workers being added and removed but not with their metrics.
+
+    """
+    if summary is None and set(fields) & {"workers", "threads", "memory", *STAT_FIELDS}:
+        summary = summarize_workers(cluster.scheduler_info.get("workers", {}).values())
+
+    getters = {
+        "name": lambda: cluster.name,
+        "address": lambda: cluster.scheduler_address,
+        "type": lambda: typename(type(cluster)),
+        "discovery": lambda: discovery_method,
+        "workers": lambda: summary["workers"],
+        "threads": lambda: summary["threads"],
+        "memory": lambda: summary["memory_limit"],
+        "created": lambda: get_created(cluster),
+        "status": lambda: cluster.status.name,
+        **{field: (lambda field=field: summary[field]) for field in STAT_FIELDS},
+    }
+    return {field: getters[field]() for field in fields}
+
+
+class RecordWriter:
+    """Write cluster records to a file in one of the :data:`OUTPUT_FORMATS`.
+
+    The ``ndjson``, ``csv`` and ``names`` formats are written and flushed one record at
+    a time, so that consumers see each cluster as soon as it is discovered. The ``json``
+    and ``yaml`` formats are written as a single document once :meth:`close` is called,
+    with records ordered by discovery method and name.
+
+    """
+
+    def __init__(self, output: str, file=None, fields=FIELDS):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output format {output}, expected one of {OUTPUT_FORMATS}"
+            )
+        self.output = output
+        self.file = file or sys.stdout
+        self.fields = fields
+        self._records = []
+        self._csv = None
+
+    def write(self, record: dict):
+        if self.output == "names":
+            self.file.write(record["name"] + "\n")
+        elif self.output == "ndjson":
+            self.file.write(json.dumps(record) + "\n")
+        elif self.output == "csv":
+            if self._csv is None:
+                self._csv = csv.DictWriter(
+                    self.file, fieldnames=list(record), lineterminator="\n"
+                )
+                self._csv.writeheader()
+            self._csv.writerow(record)
+        else:
+            self._records.append(record)
+            return
+        self.file.flush()
+
+    def close(self):
+        records = sorted(
+            self._records, key=lambda r: (r.get("discovery", ""), r.get("name", ""))
+        )
+        if self.output == "json":
+            self.file.write(json.dumps(records, indent=2) + "\n")
+        elif self.output == "yaml":
+            yaml.safe_dump(records, self.file, sort_keys=False)
+        elif self.output == "csv" and self._csv is None:
+            csv.writer(self.file, lineterminator="\n").writerow(self.fields)
+        self.file.flush()
+
+
+async def discover_cluster_summaries(
+    discovery: str = None, on_status=None, summarize: bool = True, on_complete=None
+) -> AsyncIterator[Tuple[str, object, Optional[dict]]]:
+    """Discover clusters and get the summary of each one, all concurrently.
+
+    Summaries are requested as soon as each cluster is discovered and every cluster is
+    yielded as soon as its summary arrives, so one slow scheduler does not hold back
+    the others. The summary is ``None`` if the scheduler could not be reached.
+
+    Parameters
+    ----------
+    discovery, on_status, on_complete
+        See :func:`dask_ctl.discovery.discover_cluster_names_concurrently`.
+    summarize (optional)
+        Get the summaries. If ``False`` each summary is ``None`` and the schedulers
+        are not contacted. Default ``True``.
+
+    Yields
+    -------
+    tuple
+        The discovery method, cluster manager and summary of each cluster, see
+        :func:`dask_ctl.summary.get_summary`.
+
+    """
+    queue = asyncio.Queue()
+    done = object()
+
+    async def _summarize(discovery_method, cluster):
+        summary = None
+        if summarize:
+            with suppress(Exception):
+                summary = await get_cluster_summary(cluster)
+        queue.put_nowait((discovery_method, cluster, summary))
+
+    async def _discover_all():
+        summarizing = []
+        try:
+            async for discovery_method, cluster in discover_clusters_concurrently(
+                discovery=discovery, on_status=on_status, on_complete=on_complete
+            ):
+                summarizing.append(
+                    asyncio.ensure_future(_summarize(discovery_method, cluster))
+                )
+        finally:
+            try:
+                await asyncio.gather(*summarizing)
+            finally:
+                queue.put_nowait(done)
+
+    runner = asyncio.ensure_future(_discover_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        runner.cancel()
+    await runner
+
+
+async def write_clusters(
+    output: str,
+    discovery: str = None,
+    file=None,
+    on_status=None,
+    fields=None,
+    on_complete=None,
+) -> int:
+    """Discover clusters and write a record for each one as it is found.
+
+    When the ``names`` format is used, or all of the ``fields`` are
+    :data:`DISCOVERY_FIELDS`, no cluster managers are constructed and schedulers are
+    not contacted.
+
+    Parameters
+    ----------
+    output
+        One of :data:`OUTPUT_FORMATS`.
+    discovery (optional)
+        Discovery method to use. Default is ``None`` which uses all discovery methods.
+    file (optional)
+        File to write to. Defaults to ``sys.stdout``.
+    on_status (optional)
+        Called as ``on_status(discovery_method, status)``,
+        see :func:`dask_ctl.discovery.discover_cluster_names_concurrently`.
+    fields (optional)
+        Fields to include in each record, see :func:`parse_fields`.
+        Defaults to all :data:`FIELDS`.
+    on_complete (optional)
+        Called as ``on_complete(discovered, complete)`` once discovery has finished,
+        see :func:`dask_ctl.discovery.discover_cluster_names_concurrently`.
+
+    Returns
+    -------
+    int
+        Number of clusters written.
+
+    Examples
+    --------
+    >>> await write_clusters("ndjson")  # doctest: +SKIP
+    {"name": "proxycluster-8786", "address": "tcp://localhost:8786", ...}
+    >>> await write_clusters("csv", fields="name,workers")  # doctest: +SKIP
+    name,workers
+    proxycluster-8786,4
+
+    """
+    fields = ("name",) if output == "names" else parse_fields(fields)
+    writer = RecordWriter(output, file, fields)
+    count = 0
+    if not needs_cluster(fields):
+        async for discovery_method, name, cls in discover_cluster_names_concurrently(
+            discovery=discovery, on_status=on_status, on_complete=on_complete
+        ):
+            writer.write(name_record(name, discovery_method, cls, fields))
+            count += 1
+    else:
+        async for discovery_method, cluster, summary in discover_cluster_summaries(
+            discovery=discovery,
+            on_status=on_status,
+            summarize=needs_summary(fields),
+            on_complete=on_complete,
+        ):
+            writer.write(cluster_record(cluster, discovery_method, fields, summary))
+            count += 1
+    writer.close()
+    return count
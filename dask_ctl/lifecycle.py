@@ -1,24 +1,58 @@
-import importlib
-from typing import List
+import asyncio
+from contextlib import suppress
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import wait as wait_futures
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, Optional, Union
 
 import dask.config
 from dask.widgets import get_template
-from dask.utils import typename
-from distributed.deploy import LocalCluster
+from dask.utils import parse_timedelta, typename
 from distributed.deploy.cluster import Cluster
-from .discovery import discover_cluster_names, discover_clusters
-from .spec import load_spec
-from .utils import loop
-from .exceptions import DaskClusterConfigNotFound
+from .cache import _release, cluster_cache
+from .discovery import (
+    discover_cluster_names,
+    discover_clusters,
+    discover_clusters_concurrently,
+)
+from .pool import get_pool
+from .workers import close_workers_gracefully
+from .spec import (
+    LABELS_KEY,
+    SPEC_HASH_KEY,
+    ClusterSpec,
+    build_cluster,
+    load_spec,
+    load_specs,
+    resolve_cluster_manager,
+    spec_hash,
+)
+from .utils import interruptible, loop
+from .exceptions import (
+    DaskClusterConfigNotFound,
+    DaskClusterCreateError,
+    DaskClusterCreateTimeout,
+)
+
+from . import config  # noqa
 
 
 def create_cluster(
     spec_path: str = None,
     local_fallback: bool = False,
     asynchronous: bool = False,
+    reuse: bool = False,
+    wait_for_workers: int = None,
+    timeout=None,
+    timings: dict = None,
 ) -> Cluster:
     """Create a cluster from a spec file.
 
+    If a :class:`dask_ctl.pool.ClusterPool` is running for an identical spec a
+    pre-started cluster is taken from the pool instead of starting a new one.
+
     Parameters
     ----------
     spec_path
@@ -27,12 +61,32 @@ def create_cluster(
         Create a LocalCluster if spec file not found.
     asynchronous
         Start the cluster in asynchronous mode
+    reuse
+        Return an existing running cluster that was created from an identical spec
+        instead of starting a new one.
+    wait_for_workers (optional)
+        Wait until the cluster has at least this many workers before returning.
+    timeout (optional)
+        Maximum time to spend creating the cluster, including waiting for workers,
+        e.g ``"5 minutes"``. If it is exceeded, or the call is interrupted, anything
+        that was started is closed again.
+    timings (optional)
+        Dictionary which is populated with the number of seconds after the call at
+        which each startup phase completed, ``parse``, ``import``, ``scheduler``,
+        ``first-worker`` and ``all-workers``.
 
     Returns
     -------
     Cluster
         Cluster manager representing the spec.
 
+    Raises
+    ------
+    DaskClusterCreateError
+        If the cluster fails to start, the ``phase`` attribute holds the phase which
+        failed. :class:`dask_ctl.DaskClusterCreateTimeout` is raised if the timeout
+        is exceeded.
+
     Examples
     --------
     With the spec:
@@ -48,29 +102,378 @@ def create_cluster(
     LocalCluster(b3973c71, 'tcp://127.0.0.1:8786', workers=4, threads=12, memory=17.18 GB)
 
     """
+    if asynchronous and (wait_for_workers or timeout):
+        raise ValueError(
+            "Waiting for workers and timeouts are not supported in asynchronous mode"
+        )
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    spec = _load_spec(spec_path, local_fallback)
+    timings["parse"] = time.perf_counter() - start
+    existing = (
+        loop.run_sync(
+            lambda: _find_clusters_by_spec_hash({spec_hash(*spec, spec.labels)})
+        )
+        if reuse
+        else {}
+    )
+    with interruptible():
+        return _start_cluster(
+            spec,
+            start,
+            timings,
+            existing=existing,
+            asynchronous=asynchronous,
+            n_workers=wait_for_workers,
+            timeout=timeout,
+        )
+
+
+# Started by create_cluster when the spec file is not found and local_fallback is set
+_LOCAL_FALLBACK_SPEC = ClusterSpec("distributed", "LocalCluster", [], {})
+
+
+def _load_spec(spec_path: str = None, local_fallback: bool = False) -> ClusterSpec:
     spec_path = (
         dask.config.get("ctl.cluster-spec", None, override_with=spec_path)
         or "dask-cluster.yaml"
     )
+    try:
+        return load_spec(spec_path)
+    except FileNotFoundError as e:
+        if not local_fallback:
+            raise DaskClusterConfigNotFound(f"Unable to find {spec_path}") from e
+        return _LOCAL_FALLBACK_SPEC
+
 
-    async def _create_cluster():
+# How long to wait for a partially started cluster to close after a failed create
+_CLEANUP_TIMEOUT = 10
+# How often threads check whether a concurrent create has been cancelled
+_CANCEL_INTERVAL = 0.1
+# How often to check the number of workers while waiting for them
+_WORKER_POLL_INTERVAL = 0.2
+
+
+def _run_until(
+    func: Callable, deadline: float = None, cancelled=None, futures: list = None
+):
+    """Call ``func`` in a daemon thread and wait for it until ``deadline``.
+
+    Raises ``TimeoutError`` once the deadline passes and ``asyncio.CancelledError`` if
+    the ``cancelled`` event is set. The thread is abandoned in either case, so whatever
+    it was starting must be cleaned up by the caller. The future of the call is
+    appended to ``futures`` so that the caller can wait for it to return.
+
+    """
+    future = Future()
+    if futures is not None:
+        futures.append(future)
+
+    def _run():
         try:
-            cm_module, cm_class, args, kwargs = load_spec(spec_path)
-        except FileNotFoundError as e:
-            if local_fallback:
-                return LocalCluster(asynchronous=asynchronous)
-            else:
-                raise DaskClusterConfigNotFound(f"Unable to find {spec_path}") from e
-        module = importlib.import_module(cm_module)
-        cluster_manager = getattr(module, cm_class)
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, name="dask-ctl-create", daemon=True).start()
+    while not future.done():
+        timeout = None if deadline is None else deadline - time.perf_counter()
+        if timeout is not None and timeout <= 0:
+            raise TimeoutError()
+        if cancelled is not None:
+            if cancelled.is_set():
+                raise asyncio.CancelledError()
+            timeout = min(timeout or _CANCEL_INTERVAL, _CANCEL_INTERVAL)
+        wait_futures([future], timeout=timeout)
+    return future.result()
+
+
+def _close_partial(cluster: Cluster) -> None:
+    """Close a cluster which may not have finished starting, ignoring any errors."""
+    with suppress(Exception):
+        _run_until(cluster.close, time.perf_counter() + _CLEANUP_TIMEOUT)
+
+
+def _close_started(created: List[Cluster], building: List[Future]) -> None:
+    """Close the clusters started by a failed create.
+
+    Clusters which were still being constructed when their phase was abandoned are
+    given ``_CLEANUP_TIMEOUT`` to finish first, so that they are not left running
+    once construction returns. If they still have not finished they are closed now
+    and again when they do.
+
+    """
 
-        kwargs = {key.replace("-", "_"): entry for key, entry in kwargs.items()}
+    def _close_created(_=None):
+        for cluster in created:
+            _close_partial(cluster)
 
-        cluster = cluster_manager(*args, **kwargs, asynchronous=asynchronous)
-        cluster.shutdown_on_close = False
-        return cluster
+    pending = [future for future in building if not future.done()]
+    if pending:
+        _, pending = wait_futures(pending, timeout=_CLEANUP_TIMEOUT)
+    _close_created()
+    for future in pending:
+        future.add_done_callback(_close_created)
 
-    return loop.run_sync(_create_cluster)
+
+def _start_cluster(
+    spec: tuple,
+    start: float,
+    timings: dict,
+    existing: Dict[str, Cluster] = None,
+    asynchronous: bool = False,
+    n_workers: int = None,
+    timeout=None,
+    cancelled: threading.Event = None,
+) -> Cluster:
+    """Get a cluster for a spec from existing clusters, a pool or by starting one.
+
+    Records the time since ``start`` at which each phase completes in ``timings``. If
+    a phase fails, the ``timeout`` passes or the create is interrupted any cluster
+    which was started here is closed before the error is raised.
+
+    """
+    timeout = parse_timedelta(timeout)
+    deadline = None if timeout is None else start + timeout
+    if asynchronous:
+        run = lambda func, futures=None: func()  # noqa: E731
+    else:
+        run = lambda func, futures=None: _run_until(  # noqa: E731
+            func, deadline, cancelled, futures
+        )
+
+    key = spec_hash(*spec, spec.labels)
+    cluster = (existing or {}).get(key)
+    created = []
+    building = []
+    phase = "import"
+    try:
+        if cluster is None and not asynchronous:
+            pool = get_pool(key)
+            cluster = pool.acquire() if pool else None
+            if cluster is not None:
+                created.append(cluster)
+        if cluster is None:
+            run(lambda: resolve_cluster_manager(*spec[:2]))
+            timings["import"] = time.perf_counter() - start
+            phase = "scheduler"
+            cluster = run(
+                lambda: build_cluster(
+                    *spec,
+                    asynchronous=asynchronous,
+                    track=created.append,
+                    labels=spec.labels,
+                ),
+                building,
+            )
+        timings["scheduler"] = time.perf_counter() - start
+
+        if n_workers:
+            phase = "workers"
+
+            def _record(count):
+                if count and "first-worker" not in timings:
+                    timings["first-worker"] = time.perf_counter() - start
+
+            # Runs on the cluster's own loop so this is safe to call from any thread,
+            # the callback timeout stops the watch on clusters we do not close
+            run(
+                lambda: cluster.sync(
+                    _watch_workers,
+                    cluster,
+                    n_workers,
+                    _record,
+                    minimum=True,
+                    callback_timeout=(
+                        None if deadline is None else deadline - time.perf_counter()
+                    ),
+                )
+            )
+            timings["all-workers"] = time.perf_counter() - start
+    except BaseException as e:
+        _close_started(created, building)
+        if not isinstance(e, Exception):
+            raise
+        if isinstance(e, TimeoutError):
+            waiting_for = {
+                "import": f"{spec[1]} to import",
+                "scheduler": "the scheduler to start",
+                "workers": f"{n_workers} workers",
+            }[phase]
+            raise DaskClusterCreateTimeout(
+                phase, f"Timed out after {timeout}s waiting for {waiting_for}"
+            ) from e
+        raise DaskClusterCreateError(phase, str(e) or typename(type(e))) from e
+    return cluster
+
+
+async def _find_clusters_by_spec_hash(keys: set) -> Dict[str, Cluster]:
+    # Discovery only yields names, so a manager has to be constructed to read the spec
+    # hash from its cluster info. Managers which are not reused are released again.
+    loop = asyncio.get_running_loop()
+    found = {}
+    async for _, cluster in discover_clusters_concurrently():
+        key = cluster._cluster_info.get(SPEC_HASH_KEY)
+        if key in keys and key not in found:
+            found[key] = cluster
+        else:
+            await loop.run_in_executor(None, _release, cluster)
+    return found
+
+
+_SKIPPED = object()
+
+
+def _run_concurrently(
+    func: Callable,
+    items: list,
+    concurrency: int = None,
+    progress: Callable = None,
+    cancelled: threading.Event = None,
+) -> dict:
+    """Call ``func(*args)`` for each ``(name, args)`` item in a bounded thread pool.
+
+    Returns a mapping of name to result, or to the exception raised. Items whose
+    result is ``_SKIPPED`` are left out and not counted in the progress reported to
+    ``progress``. If waiting is interrupted, items which have not started are dropped
+    and ``cancelled`` is set before waiting for the rest.
+
+    """
+    concurrency = dask.config.get("ctl.concurrency", override_with=concurrency)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(func, *args): name for name, args in items}
+        skipped = 0
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                if result is _SKIPPED:
+                    skipped += 1
+                    continue
+                results[name] = result
+                if progress:
+                    error = result if isinstance(result, Exception) else None
+                    progress(name, error, len(results), len(futures) - skipped)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            if cancelled is not None:
+                cancelled.set()
+            raise
+    return results
+
+
+def create_clusters(
+    spec_path: str = None,
+    concurrency: int = None,
+    progress: Callable = None,
+    reuse: bool = False,
+    wait_for_workers: int = None,
+    timeout=None,
+    timings: dict = None,
+) -> Dict[str, Union[Cluster, Exception]]:
+    """Create every cluster in a spec file.
+
+    Spec files may hold several named clusters, either as multiple YAML documents or
+    as a ``clusters`` list. The clusters are started concurrently. The names only label
+    the specs and are not passed on to the cluster managers.
+
+    Parameters
+    ----------
+    spec_path
+        Path to a cluster spec file. Defaults to ``dask-cluster.yaml``.
+    concurrency (optional)
+        Maximum number of clusters to start at once. Defaults to ``ctl.concurrency``.
+    progress (optional)
+        Callable which is called as ``progress(name, error, completed, total)`` each
+        time a cluster has started or failed.
+    reuse
+        Reuse existing running clusters that were created from identical specs.
+    wait_for_workers, timeout (optional)
+        Wait for each cluster to have workers and bound the time spent creating each
+        one, see :func:`create_cluster`. If the call is interrupted, clusters that
+        are still starting are closed.
+    timings (optional)
+        Dictionary which is populated with a mapping of spec name to the startup
+        timings of that cluster, see :func:`create_cluster`.
+
+    Returns
+    -------
+    dict
+        Mapping of spec name to the cluster manager, or to the exception raised while
+        creating it.
+
+    Examples
+    --------
+    With the spec:
+
+    .. code-block:: yaml
+
+        # /path/to/spec.yaml
+        version: 1
+        clusters:
+          - name: small
+            module: "dask.distributed"
+            class: "LocalCluster"
+            kwargs:
+              n_workers: 1
+          - name: large
+            module: "dask.distributed"
+            class: "LocalCluster"
+            kwargs:
+              n_workers: 4
+
+    >>> create_clusters("/path/to/spec.yaml")  # doctest: +SKIP
+    {'small': LocalCluster(...), 'large': LocalCluster(...)}
+
+    """
+    spec_path = (
+        dask.config.get("ctl.cluster-spec", None, override_with=spec_path)
+        or "dask-cluster.yaml"
+    )
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    try:
+        specs = load_specs(spec_path)
+    except FileNotFoundError as e:
+        raise DaskClusterConfigNotFound(f"Unable to find {spec_path}") from e
+    parsed = time.perf_counter() - start
+
+    existing = {}
+    if reuse:
+        existing = loop.run_sync(
+            lambda: _find_clusters_by_spec_hash(
+                {spec_hash(*spec, spec.labels) for spec in specs.values()}
+            )
+        )
+
+    cancelled = threading.Event()
+
+    def _create(name, spec):
+        timings[name] = {"parse": parsed}
+        return _start_cluster(
+            spec,
+            start,
+            timings[name],
+            existing=existing,
+            n_workers=wait_for_workers,
+            timeout=timeout,
+            cancelled=cancelled,
+        )
+
+    with interruptible():
+        return _run_concurrently(
+            _create,
+            [(name, (name, spec)) for name, spec in specs.items()],
+            concurrency=concurrency,
+            progress=progress,
+            cancelled=cancelled,
+        )
 
 
 def list_clusters() -> List[Cluster]:
@@ -101,7 +504,7 @@ def list_clusters() -> List[Cluster]:
     return loop.run_sync(_list_clusters)
 
 
-def get_cluster(name: str, asynchronous=False) -> Cluster:
+def get_cluster(name: str, asynchronous=False, cache: bool = None) -> Cluster:
     """Get a cluster by name.
 
     Parameters
@@ -110,6 +513,9 @@ def get_cluster(name: str, asynchronous=False) -> Cluster:
         Name of cluster to get a cluster manager for.
     asynchronous
         Return an awaitable instead of starting a loop.
+    cache (optional)
+        Reuse a previously constructed cluster manager for this name if it is still alive.
+        Defaults to ``ctl.cache.enabled``.
 
     Returns
     -------
@@ -125,10 +531,19 @@ def get_cluster(name: str, asynchronous=False) -> Cluster:
 
     """
 
+    use_cache = dask.config.get("ctl.cache.enabled", override_with=cache)
+
     async def _get_cluster():
+        if use_cache:
+            cluster = cluster_cache.get(name)
+            if cluster is not None:
+                return cluster
         async for cluster_name, cluster_class in discover_cluster_names():
             if cluster_name == name:
-                return cluster_class.from_name(name)
+                cluster = cluster_class.from_name(name)
+                if use_cache:
+                    cluster_cache.put(name, cluster)
+                return cluster
         raise RuntimeError("No such cluster %s", name)
 
     if asynchronous:
@@ -137,6 +552,96 @@ def get_cluster(name: str, asynchronous=False) -> Cluster:
         return loop.run_sync(_get_cluster)
 
 
+async def _count_workers(cluster: Cluster) -> int:
+    return len(await cluster.scheduler_comm.ncores())
+
+
+async def _watch_workers(
+    cluster: Cluster, n_workers: int, callback: Callable = None, minimum: bool = False
+) -> int:
+    # Poll the scheduler over the manager's own connection. Subscribing to worker
+    # status events would replace the plugin the manager uses to keep its
+    # ``scheduler_info`` up to date, as the scheduler only keeps one per name.
+    previous = None
+    while True:
+        # Requests are made on the manager's loop, which may not be this one
+        count = await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(
+                _count_workers(cluster), cluster.loop.asyncio_loop
+            )
+        )
+        if callback and count != previous:
+            callback(count)
+        previous = count
+        if count >= n_workers if minimum else count == n_workers:
+            return count
+        await asyncio.sleep(_WORKER_POLL_INTERVAL)
+
+
+def wait_for_workers(
+    cluster: Union[str, Cluster],
+    n_workers: int,
+    timeout=None,
+    callback: Callable = None,
+    asynchronous: bool = False,
+) -> int:
+    """Wait for a cluster to have exactly ``n_workers`` workers.
+
+    Polls the number of workers on the scheduler and returns as soon as it matches.
+
+    Parameters
+    ----------
+    cluster
+        Name of the cluster, or a cluster manager, to wait on.
+    n_workers
+        Number of workers to wait for.
+    timeout (optional)
+        Maximum time to wait, e.g ``30`` or ``"5 minutes"``. Defaults to waiting forever.
+    callback (optional)
+        Callable which is called with the current number of workers each time it changes.
+    asynchronous
+        Return an awaitable instead of starting a loop.
+
+    Returns
+    -------
+    int
+        Number of workers in the cluster.
+
+    Raises
+    ------
+    TimeoutError
+        If the cluster did not reach ``n_workers`` within ``timeout``.
+
+    Examples
+    --------
+    >>> wait_for_workers("mycluster", 10, timeout="5 minutes")  # doctest: +SKIP
+    10
+
+    """
+    timeout = parse_timedelta(timeout)
+
+    async def _wait_for_workers():
+        manager = (
+            await get_cluster(cluster, asynchronous=True)
+            if isinstance(cluster, str)
+            else cluster
+        )
+        try:
+            return await asyncio.wait_for(
+                _watch_workers(manager, n_workers, callback=callback), timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(
+                f"Timed out after {timeout}s waiting for {n_workers} workers "
+                f"on {manager.name}"
+            ) from e
+
+    if asynchronous:
+        return _wait_for_workers()
+    else:
+        return loop.run_sync(_wait_for_workers)
+
+
 def get_snippet(name: str) -> str:
     """Get a code snippet for connecting to a cluster.
 
@@ -174,43 +679,464 @@ def get_snippet(name: str) -> str:
         )
 
 
-def scale_cluster(name: str, n_workers: int) -> None:
+def scale_cluster(
+    name: Union[str, Cluster],
+    n_workers: int,
+    step: int = None,
+    interval=None,
+    wait: bool = False,
+    timeout=None,
+    callback: Callable = None,
+) -> None:
     """Scale a cluster by name.
 
     Constructs a cluster manager for the named cluster and calls
     ``.scale(n_workers)`` on it.
 
+    When scaling up by a large amount a ``step`` can be given to ramp up gradually,
+    each step is scaled to and waited for before moving on to the next one so that
+    the scheduler and the cluster backend are not flooded with new workers at once.
+
     Parameters
     ----------
     name
-        Name of cluster to scale.
+        Name of cluster to scale, or a cluster manager.
     n_workers
         Number of workers to scale to
+    step (optional)
+        Maximum number of workers to add at a time when scaling up.
+    interval (optional)
+        Time to pause between steps, e.g ``10`` or ``"30s"``.
+    wait (optional)
+        Wait for the cluster to reach ``n_workers`` before returning.
+        Always ``True`` when ``step`` is set.
+    timeout (optional)
+        Maximum time to wait for each step to register. When ramping up with ``step``
+        defaults to ``ctl.scale.step-timeout``, otherwise to waiting forever.
+    callback (optional)
+        Callable which is called with the current number of workers each time it changes
+        while waiting.
 
     Examples
     --------
     >>> scale_cluster("mycluster", 10)  # doctest: +SKIP
 
+    Ramp up 50 workers at a time, pausing for ten seconds between each step.
+
+    >>> scale_cluster("mycluster", 2000, step=50, interval="10s")  # doctest: +SKIP
+
+    """
+    cluster = get_cluster(name) if isinstance(name, str) else name
+    interval = parse_timedelta(interval)
+    if step:
+        timeout = dask.config.get("ctl.scale.step-timeout", override_with=timeout)
+
+    # Ask the scheduler, the manager's scheduler_info may lag behind
+    start_workers = cluster.sync(_count_workers, cluster)
+    if step and n_workers > start_workers:
+        targets = [*range(start_workers + step, n_workers, step), n_workers]
+    else:
+        targets = [n_workers]
+
+    for i, target in enumerate(targets):
+        if i and interval:
+            time.sleep(interval)
+        cluster.scale(target)
+        if wait or step:
+            cluster.sync(
+                lambda: wait_for_workers(
+                    cluster,
+                    target,
+                    timeout=timeout,
+                    callback=callback,
+                    asynchronous=True,
+                )
+            )
+
+
+async def _drain_cluster(cluster: Cluster, timeout=None, batch_size: int = None):
+    """Stop workers taking new tasks, wait for their tasks and then retire them.
+
+    Every worker is closed gracefully first, so tasks submitted while draining wait on
+    the scheduler instead of keeping the drain going. The batches are all retired at
+    once after the processing tasks have finished. Gives up once ``timeout`` has
+    passed, leaving the cluster to be closed anyway.
+
     """
 
-    return get_cluster(name).scale(n_workers)
+    async def _drain():
+        workers = await close_workers_gracefully(cluster.scheduler_comm)
+        while any((await cluster.scheduler_comm.processing()).values()):
+            await asyncio.sleep(0.5)
+        size = batch_size or len(workers) or 1
+        await asyncio.gather(
+            *[
+                cluster.scheduler_comm.retire_workers(
+                    workers=workers[i : i + size], close_workers=True
+                )
+                for i in range(0, len(workers), size)
+            ]
+        )
+
+    with suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(_drain(), timeout)
 
 
-def delete_cluster(name: str) -> None:
+def delete_cluster(
+    name: Union[str, Cluster],
+    drain: bool = False,
+    timeout=None,
+    batch_size: int = None,
+) -> None:
     """Close a cluster by name.
 
     Constructs a cluster manager for the named cluster and calls
     ``.close()`` on it.
 
+    Optionally the cluster can be drained first. All workers are gracefully closed at
+    once, which stops them accepting new tasks, and the tasks they are processing are
+    given until ``timeout`` to finish before the workers are retired. Tasks submitted
+    while draining are not run. As the whole cluster is closing there are no other
+    workers to move data to.
+
     Parameters
     ----------
     name
-        Name of cluster to close.
+        Name of cluster to close, or a cluster manager.
+    drain (optional)
+        Drain the cluster before closing it. Default ``False``.
+    timeout (optional)
+        Maximum time to spend draining, e.g ``"5 minutes"``, after which the cluster
+        is closed anyway. Defaults to waiting forever.
+    batch_size (optional)
+        Number of workers to retire in each request to the scheduler when draining,
+        the requests are made concurrently. Defaults to all of them in one request.
 
     Examples
     --------
     >>> delete_cluster("mycluster")  # doctest: +SKIP
 
+    >>> delete_cluster("mycluster", drain=True, timeout="10 minutes")  # doctest: +SKIP
+
     """
+    cluster = get_cluster(name) if isinstance(name, str) else name
+    if drain:
+        timeout = parse_timedelta(timeout)
+        cluster.sync(
+            lambda: _drain_cluster(cluster, timeout=timeout, batch_size=batch_size)
+        )
+    return cluster.close()
+
+
+async def _shielded(coro):
+    """Await a coroutine to completion even if the caller is cancelled meanwhile.
 
-    return get_cluster(name).close()
+    Cancellation is raised once the coroutine has finished.
+
+    """
+    task = asyncio.ensure_future(coro)
+    cancelled = False
+    while not task.done():
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+    return task.result()
+
+
+class _TemporaryCluster:
+    def __init__(
+        self, spec_path, wait_for_workers, timeout, drain, drain_timeout, local_fallback
+    ):
+        self.spec_path = spec_path
+        self.local_fallback = local_fallback
+        self.wait_for_workers = wait_for_workers
+        self.timeout = timeout
+        self.drain = drain
+        self.drain_timeout = parse_timedelta(
+            dask.config.get(
+                "ctl.temporary-cluster.drain-timeout", override_with=drain_timeout
+            )
+        )
+        self.cluster = None
+
+    def __enter__(self) -> Cluster:
+        # If this fails create_cluster has already closed anything it started
+        self.cluster = create_cluster(
+            self.spec_path,
+            local_fallback=self.local_fallback,
+            wait_for_workers=self.wait_for_workers,
+            timeout=self.timeout,
+        )
+        return self.cluster
+
+    def __exit__(self, *args):
+        cluster, self.cluster = self.cluster, None
+        try:
+            if self.drain:
+                with suppress(Exception):
+                    cluster.sync(lambda: self._drain(cluster))
+        finally:
+            cluster.close()
+
+    async def __aenter__(self) -> Cluster:
+        start = time.perf_counter()
+        timeout = parse_timedelta(self.timeout)
+        # Parsing the spec and importing the cluster manager would block the loop, so
+        # they happen in a thread and only the cluster is constructed and started here
+        spec = await asyncio.get_running_loop().run_in_executor(None, self._load)
+        self.cluster = _start_cluster(spec, start, {}, asynchronous=True)
+        remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+
+        phase = "scheduler"
+        try:
+            await asyncio.wait_for(self._start(self.cluster), remaining)
+        except BaseException as e:
+            if self.cluster.status.name == "running":
+                phase = "workers"
+            cluster, self.cluster = self.cluster, None
+            await _shielded(self._close(cluster, drain=False))
+            if not isinstance(e, Exception):
+                raise
+            if isinstance(e, asyncio.TimeoutError):
+                raise DaskClusterCreateTimeout(
+                    phase, f"Timed out after {timeout}s"
+                ) from e
+            raise DaskClusterCreateError(phase, str(e) or typename(type(e))) from e
+        return self.cluster
+
+    async def __aexit__(self, *args):
+        cluster, self.cluster = self.cluster, None
+        await _shielded(self._close(cluster, drain=self.drain))
+
+    def _load(self) -> ClusterSpec:
+        spec = _load_spec(self.spec_path, self.local_fallback)
+        with suppress(Exception):
+            # Failed imports are raised again when the cluster is built
+            resolve_cluster_manager(*spec[:2])
+        return spec
+
+    async def _start(self, cluster: Cluster):
+        await cluster
+        if self.wait_for_workers:
+            await _watch_workers(cluster, self.wait_for_workers, minimum=True)
+
+    async def _drain(self, cluster: Cluster):
+        await _drain_cluster(cluster, timeout=self.drain_timeout)
+
+    async def _close(self, cluster: Cluster, drain: bool):
+        try:
+            if drain:
+                with suppress(Exception):
+                    await self._drain(cluster)
+        finally:
+            await cluster.close()
+
+
+def temporary_cluster(
+    spec_path: str = None,
+    wait_for_workers: int = None,
+    timeout=None,
+    drain: bool = True,
+    drain_timeout=None,
+    local_fallback: bool = False,
+):
+    """Context manager which creates a cluster from a spec and always closes it.
+
+    Works with both ``with`` and ``async with``. In asynchronous code the spec is
+    parsed and the cluster manager imported in a thread, and the cluster manager is
+    started in asynchronous mode on the running event loop.
+
+    The cluster is torn down when the block exits, including when an exception is
+    raised or the task is cancelled. Workers are first drained, all at once, so that
+    running tasks can finish and then the cluster is closed. Unlike
+    :func:`create_cluster` nothing is left running afterwards.
+
+    Parameters
+    ----------
+    spec_path
+        Path to a cluster spec file. Defaults to ``dask-cluster.yaml``.
+    wait_for_workers (optional)
+        Wait until the cluster has at least this many workers before entering the block.
+    timeout (optional)
+        Maximum time to spend creating the cluster, see :func:`create_cluster`.
+    drain (optional)
+        Drain the workers before closing the cluster. Default ``True``.
+    drain_timeout (optional)
+        Maximum time to spend draining. Defaults to ``ctl.temporary-cluster.drain-timeout``.
+    local_fallback (optional)
+        Create a LocalCluster if the spec file is not found.
+
+    Examples
+    --------
+    >>> with temporary_cluster("spec.yaml", wait_for_workers=4) as cluster:  # doctest: +SKIP
+    ...     client = Client(cluster)
+
+    >>> async with temporary_cluster("/path/to/spec.yaml") as cluster:  # doctest: +SKIP
+    ...     client = await Client(cluster, asynchronous=True)
+
+    """
+    return _TemporaryCluster(
+        spec_path, wait_for_workers, timeout, drain, drain_timeout, local_fallback
+    )
+
+
+def _match_labels(cluster: Cluster, labels: Dict[str, str]) -> bool:
+    cluster_labels = cluster._cluster_info.get(LABELS_KEY, {}) or {}
+    return all(
+        str(cluster_labels.get(key)) == str(value) for key, value in labels.items()
+    )
+
+
+def _run_bulk(
+    operation: Callable[[Cluster], None],
+    pattern: Union[str, List[str]],
+    discovery: str = None,
+    labels: Dict[str, str] = None,
+    concurrency: int = None,
+    progress: Callable = None,
+) -> Dict[str, Optional[Exception]]:
+    patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+
+    async def _match_clusters():
+        return [
+            (cluster_name, (cluster_name, cluster_class))
+            async for cluster_name, cluster_class in discover_cluster_names(discovery)
+            if any(fnmatch(cluster_name, p) for p in patterns)
+        ]
+
+    # Resolve every matching cluster in a single discovery pass
+    matched = loop.run_sync(_match_clusters)
+
+    def _apply(cluster_name, cluster_class):
+        cluster = cluster_class.from_name(cluster_name)
+        try:
+            if labels and not _match_labels(cluster, labels):
+                return _SKIPPED
+            operation(cluster)
+        finally:
+            # Managers are only constructed here, so disconnect them whatever happened
+            _release(cluster)
+
+    return _run_concurrently(
+        _apply, matched, concurrency=concurrency, progress=progress
+    )
+
+
+def scale_clusters(
+    pattern: Union[str, List[str]],
+    n_workers: int,
+    discovery: str = None,
+    labels: Dict[str, str] = None,
+    concurrency: int = None,
+    progress: Callable = None,
+    step: int = None,
+    interval=None,
+    timeout=None,
+) -> Dict[str, Optional[Exception]]:
+    """Scale all clusters matching a selector.
+
+    Matching clusters are resolved in a single discovery pass and then scaled
+    concurrently.
+
+    Parameters
+    ----------
+    pattern
+        Glob pattern, or list of patterns, to match cluster names against.
+    n_workers
+        Number of workers to scale each cluster to.
+    discovery (optional)
+        Restrict matching to a single discovery method.
+    labels (optional)
+        Only act on clusters with all of these labels, which are set by the
+        ``labels`` of the spec the cluster was created from.
+    concurrency (optional)
+        Maximum number of clusters to act on at once. Defaults to ``ctl.concurrency``.
+    progress (optional)
+        Callable which is called as ``progress(name, error, completed, total)`` each
+        time a matched cluster has been handled.
+    step, interval, timeout (optional)
+        Ramp up each cluster gradually, see :func:`scale_cluster`.
+
+    Returns
+    -------
+    dict
+        Mapping of cluster name to the exception raised while scaling it, or ``None``
+        if it was scaled successfully.
+
+    Examples
+    --------
+    >>> scale_clusters("nightly-*", 10)  # doctest: +SKIP
+    {'nightly-a': None, 'nightly-b': None}
+
+    """
+
+    return _run_bulk(
+        lambda cluster: scale_cluster(
+            cluster, n_workers, step=step, interval=interval, timeout=timeout
+        ),
+        pattern,
+        discovery=discovery,
+        labels=labels,
+        concurrency=concurrency,
+        progress=progress,
+    )
+
+
+def delete_clusters(
+    pattern: Union[str, List[str]],
+    discovery: str = None,
+    labels: Dict[str, str] = None,
+    concurrency: int = None,
+    progress: Callable = None,
+    drain: bool = False,
+    timeout=None,
+    batch_size: int = None,
+) -> Dict[str, Optional[Exception]]:
+    """Close all clusters matching a selector.
+
+    Matching clusters are resolved in a single discovery pass and then closed
+    concurrently.
+
+    Parameters
+    ----------
+    pattern
+        Glob pattern, or list of patterns, to match cluster names against.
+    discovery (optional)
+        Restrict matching to a single discovery method.
+    labels (optional)
+        Only act on clusters with all of these labels, which are set by the
+        ``labels`` of the spec the cluster was created from.
+    concurrency (optional)
+        Maximum number of clusters to act on at once. Defaults to ``ctl.concurrency``.
+    progress (optional)
+        Callable which is called as ``progress(name, error, completed, total)`` each
+        time a matched cluster has been handled.
+    drain, timeout, batch_size (optional)
+        Drain each cluster before closing it, see :func:`delete_cluster`.
+
+    Returns
+    -------
+    dict
+        Mapping of cluster name to the exception raised while closing it, or ``None``
+        if it was closed successfully.
+
+    Examples
+    --------
+    >>> delete_clusters("nightly-*")  # doctest: +SKIP
+    {'nightly-a': None, 'nightly-b': None}
+
+    """
+
+    return _run_bulk(
+        lambda cluster: delete_cluster(
+            cluster, drain=drain, timeout=timeout, batch_size=batch_size
+        ),
+        pattern,
+        discovery=discovery,
+        labels=labels,
+        concurrency=concurrency,
+        progress=progress,
+    )
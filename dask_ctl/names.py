@@ -0,0 +1,336 @@
+"""Persisted index of discovered cluster names for shell completion.
+
+Discovering clusters means asking every discovery method, which is far too slow to do
+each time the shell completes a name. Instead the names found by ``dask cluster list``
+and by completion itself are kept on disk, and completion searches them by prefix and
+by subsequence. Completion only discovers clusters again once the index is older than
+``ctl.completion.ttl``.
+
+"""
+from bisect import bisect_left
+from contextlib import suppress
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Iterable, List, Tuple
+
+import dask.config
+from dask.utils import parse_timedelta
+
+from . import config  # noqa
+
+# Bump when the format of the index changes to ignore existing index files
+_INDEX_VERSION = 2
+
+# Weight of a name by how long ago it was last used or discovered, in seconds.
+# Older names have a weight of 0.25.
+_RECENCY_WEIGHTS = ((60 * 60, 4), (24 * 60 * 60, 2), (7 * 24 * 60 * 60, 0.5))
+
+
+def _recency_weight(age: float) -> float:
+    for limit, weight in _RECENCY_WEIGHTS:
+        if age < limit:
+            return weight
+    return 0.25
+
+
+class NameIndex:
+    """Cluster names searchable by prefix and subsequence, ranked by recency and usage.
+
+    The names are kept sorted, so the names with a given prefix are a contiguous run
+    found with a binary search, and matching subsequences is a single regular
+    expression search over all the names at once.
+
+    Parameters
+    ----------
+    entries (optional)
+        Details of each name, as ``{name: (discovery_method, seen, used, uses)}``
+        where ``seen`` and ``used`` are the times the name was last discovered and last
+        used on the command line.
+    text (optional)
+        The names sorted and joined by newlines, if already known.
+    refreshed (optional)
+        Time all discovery methods were last asked for names, ``0`` if never.
+
+    Examples
+    --------
+    >>> index = NameIndex()
+    >>> index.update([("proxycluster", "proxycluster-8786"), ("proxycluster", "ml-8787")])
+    >>> index.search("ml")
+    ['ml-8787']
+    >>> index.search("p8")
+    ['proxycluster-8786']
+
+    """
+
+    def __init__(self, entries: dict = None, text: str = None, refreshed: float = 0):
+        self.entries = dict(entries or {})
+        self.refreshed = refreshed
+        # The sorted names joined by newlines, which is saved with the index so that
+        # completion doesn't have to sort the names again
+        self._text = text
+        self._names = None
+
+    def _invalidate(self):
+        self._names = None
+        self._text = None
+
+    @property
+    def names(self) -> List[str]:
+        """All names in the index, sorted."""
+        if self._names is None:
+            if self._text is None:
+                self._names = sorted(self.entries)
+            else:
+                self._names = self._text.split("\n") if self._text else []
+        return self._names
+
+    @property
+    def text(self) -> str:
+        """All names in the index, sorted and joined by newlines."""
+        if self._text is None:
+            self._text = "\n".join(self.names)
+        return self._text
+
+    def update(
+        self,
+        discovered: Iterable[Tuple[str, str]],
+        complete: Iterable[str] = (),
+        now: float = None,
+    ):
+        """Add the names found by a discovery.
+
+        Parameters
+        ----------
+        discovered
+            Pairs of the discovery method and the name of each cluster it found.
+        complete (optional)
+            Discovery methods which ran to completion. Names from these methods which
+            were not discovered again no longer exist and are removed.
+        now (optional)
+            Time of the discovery, defaults to the current time.
+
+        """
+        now = time.time() if now is None else now
+        found = set()
+        for discovery_method, name in discovered:
+            _, _, used, uses = self.entries.get(name, (None, None, 0.0, 0))
+            self.entries[name] = (discovery_method, now, used, uses)
+            found.add(name)
+        complete = set(complete)
+        for name, (discovery_method, *_) in list(self.entries.items()):
+            if discovery_method in complete and name not in found:
+                del self.entries[name]
+        self._invalidate()
+
+    def remove(self, name: str) -> bool:
+        """Remove a name, returns whether it was in the index."""
+        if self.entries.pop(name, None) is None:
+            return False
+        self._invalidate()
+        return True
+
+    def is_stale(self, ttl, now: float = None) -> bool:
+        """Whether all discovery methods were last asked for names more than ``ttl`` ago."""
+        now = time.time() if now is None else now
+        return now - self.refreshed > parse_timedelta(ttl)
+
+    def use(self, name: str, now: float = None) -> bool:
+        """Record that a name was used, returns whether it is in the index."""
+        if name not in self.entries:
+            return False
+        discovery_method, seen, _, uses = self.entries[name]
+        now = time.time() if now is None else now
+        self.entries[name] = (discovery_method, seen, now, uses + 1)
+        return True
+
+    def score(self, name: str, now: float = None) -> float:
+        """Rank of a name among matches of the same kind, higher first.
+
+        Names which are used often and were used or discovered recently score highest.
+
+        """
+        _, seen, used, uses = self.entries[name]
+        now = time.time() if now is None else now
+        return (1 + uses) * _recency_weight(now - max(seen, used))
+
+    def search(
+        self, incomplete: str, limit: int = None, now: float = None
+    ) -> List[str]:
+        """Find names matching a partially typed name.
+
+        Names starting with ``incomplete`` come first, then names containing it and
+        then names containing its characters in order. Within each of those the names
+        are ordered by :meth:`score` and then alphabetically.
+
+        Parameters
+        ----------
+        incomplete
+            The partially typed name.
+        limit (optional)
+            Maximum number of names to return.
+        now (optional)
+            Time to measure recency from, defaults to the current time.
+
+        """
+        names = self.names
+        # Names starting with the prefix are a contiguous run of the sorted names
+        start = end = bisect_left(names, incomplete)
+        while end < len(names) and names[end].startswith(incomplete):
+            end += 1
+        prefixed = names[start:end]
+        if incomplete:
+            # A character class excluding the next character makes each step match its
+            # first occurrence without backtracking, so this is linear in the names
+            pattern = "".join(f"[^\n{re.escape(c)}]*{re.escape(c)}" for c in incomplete)
+            others = [
+                m.group()
+                for m in re.finditer(f"^{pattern}.*$", self.text, flags=re.MULTILINE)
+                if not m.group().startswith(incomplete)
+            ]
+        else:
+            others = []
+        containing = [name for name in others if incomplete in name]
+        subsequences = [name for name in others if incomplete not in name]
+
+        now = time.time() if now is None else now
+
+        def score(name):
+            return self.score(name, now)
+
+        # Each group is already in alphabetical order, which the stable sort keeps
+        # for names with the same score
+        ranked = []
+        for group in (prefixed, containing, subsequences):
+            ranked.extend(sorted(group, key=score, reverse=True))
+        return ranked if limit is None else ranked[:limit]
+
+
+class NameRecorder:
+    """Keep the names found by a discovery to add them to the index afterwards.
+
+    Pass it as ``on_complete`` to
+    :func:`dask_ctl.discovery.discover_cluster_names_concurrently`, then call
+    :meth:`save` once the event loop is done with, as the index is read and written
+    with blocking file operations.
+
+    Examples
+    --------
+    >>> names = NameRecorder()
+    >>> names([("proxycluster", "proxycluster-8786")], ["proxycluster"])
+    >>> names.discovered
+    [('proxycluster', 'proxycluster-8786')]
+
+    """
+
+    def __init__(self):
+        self.discovered = []
+        self.complete = []
+        self.finished = False
+
+    def __call__(self, discovered, complete):
+        self.discovered, self.complete = list(discovered), list(complete)
+        self.finished = True
+
+    def save(self, refreshed: bool = False):
+        """Add the names to the index on disk if the discovery finished.
+
+        See :func:`update_name_index` for ``refreshed``.
+
+        """
+        if self.finished:
+            update_name_index(self.discovered, self.complete, refreshed=refreshed)
+
+
+def name_index_path() -> str:
+    """Path of the name index, from ``ctl.completion.path``."""
+    return dask.config.get("ctl.completion.path") or os.path.join(
+        os.path.expanduser("~"), ".cache", "dask-ctl", "names.json"
+    )
+
+
+def load_name_index() -> NameIndex:
+    """Load the name index, which is empty if it is disabled, missing or unreadable."""
+    if dask.config.get("ctl.completion.index"):
+        with suppress(Exception):
+            with open(name_index_path()) as fh:
+                data = json.load(fh)
+            if data["version"] == _INDEX_VERSION:
+                # The details of each name are stored as one list per field, in name
+                # order, which is much quicker to load than a list per name
+                text = data["names"]
+                names = text.split("\n") if text else []
+                entries = dict(
+                    zip(
+                        names,
+                        zip(data["methods"], data["seen"], data["used"], data["uses"]),
+                    )
+                )
+                return NameIndex(entries, text, data["refreshed"])
+    return NameIndex()
+
+
+def save_name_index(index: NameIndex):
+    """Write the name index, replacing the file so readers never see a partial index."""
+    if not dask.config.get("ctl.completion.index"):
+        return
+    path = name_index_path()
+    entries = [index.entries[name] for name in index.names]
+    data = {
+        "version": _INDEX_VERSION,
+        "refreshed": index.refreshed,
+        "names": index.text,
+        "methods": [method for method, *_ in entries],
+        # Times are stored to the second, which is plenty to rank names by recency
+        "seen": [round(seen) for _, seen, _, _ in entries],
+        "used": [round(used) for _, _, used, _ in entries],
+        "uses": [uses for *_, uses in entries],
+    }
+    with suppress(Exception):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(path), delete=False
+        ) as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(fh.name, path)
+
+
+def update_name_index(
+    discovered: Iterable[Tuple[str, str]],
+    complete: Iterable[str],
+    refreshed: bool = False,
+):
+    """Add the names found by a discovery to the index on disk, see :meth:`NameIndex.update`.
+
+    Pass ``refreshed=True`` if every discovery method was asked for names, so that
+    completion does not discover clusters again until ``ctl.completion.ttl`` has passed.
+
+    """
+    if not dask.config.get("ctl.completion.index"):
+        return
+    now = time.time()
+    index = load_name_index()
+    index.update(discovered, complete, now=now)
+    if refreshed:
+        index.refreshed = now
+    save_name_index(index)
+
+
+def use_name(name: str):
+    """Record that a name was used on the command line, ranking it higher when completing."""
+    if not dask.config.get("ctl.completion.index"):
+        return
+    index = load_name_index()
+    if index.use(name):
+        save_name_index(index)
+
+
+def forget_names(names: Iterable[str]):
+    """Remove names from the index on disk, e.g once their clusters have been deleted."""
+    if not dask.config.get("ctl.completion.index"):
+        return
+    index = load_name_index()
+    if [name for name in names if index.remove(name)]:
+        save_name_index(index)
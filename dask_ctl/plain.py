@@ -0,0 +1,109 @@
+"""Plain fixed width text tables.
+
+Rendering a ``rich`` table measures every cell to lay out the columns, which with
+thousands of rows is slow and holds the whole table in memory. These tables write
+each row straight to the file as a line of padded columns instead.
+
+"""
+from io import StringIO
+import sys
+from typing import Dict, Iterable, Sequence
+
+import dask.config
+
+from . import config  # noqa
+
+
+def use_plain(rows: int = None, plain: bool = False, file=None) -> bool:
+    """Whether to write a plain table rather than a ``rich`` one.
+
+    Plain tables are used when asked for with ``plain``, when ``file`` is not a
+    terminal, or when there are more than ``ctl.table.plain-threshold`` rows.
+
+    """
+    file = file or sys.stdout
+    if plain or not file.isatty():
+        return True
+    threshold = dask.config.get("ctl.table.plain-threshold")
+    return rows is not None and threshold is not None and rows > threshold
+
+
+class PlainTable:
+    """Write rows of a table as lines of fixed width columns as they arrive.
+
+    Cells wider than their column are truncated so that later rows stay lined up,
+    except in the last column.
+
+    Parameters
+    ----------
+    columns
+        Titles of the columns.
+    widths
+        Width of each column, keyed by title. Defaults to the width of the title.
+    file (optional)
+        File to write to. Defaults to ``sys.stdout``.
+    header (optional)
+        Write the column titles before the first row. Default ``True``.
+
+    Examples
+    --------
+    >>> table = PlainTable(["Name", "Workers"], {"Name": 8})
+    >>> table.write(["my-cluster", 4])
+    NAME      WORKERS
+    my-clus…  4
+
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        widths: Dict[str, int] = None,
+        file=None,
+        header: bool = True,
+    ):
+        self.columns = list(columns)
+        self.widths = [max((widths or {}).get(c, 0), len(c)) for c in self.columns]
+        self.file = file or sys.stdout
+        self._header = header
+
+    def _line(self, cells) -> str:
+        padded = []
+        for cell, width in zip(cells[:-1], self.widths):
+            cell = str(cell)
+            if len(cell) > width:
+                cell = cell[: width - 1] + "…"
+            padded.append(cell.ljust(width))
+        padded.append(str(cells[-1]))
+        return "  ".join(padded).rstrip() + "\n"
+
+    def write(self, cells: Sequence):
+        if self._header:
+            self._header = False
+            self.file.write(self._line([c.upper() for c in self.columns]))
+        self.file.write(self._line(list(cells)))
+
+    def flush(self):
+        if self._header:
+            self._header = False
+            self.file.write(self._line([c.upper() for c in self.columns]))
+        self.file.flush()
+
+
+def write_plain(columns: Sequence[str], rows: Iterable[Sequence], file=None):
+    """Write a plain table with each column as wide as its widest cell."""
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = {
+        column: max([len(row[i]) for row in rows], default=0)
+        for i, column in enumerate(columns)
+    }
+    table = PlainTable(columns, widths, file)
+    for row in rows:
+        table.write(row)
+    table.flush()
+
+
+def format_plain(columns: Sequence[str], rows: Iterable[Sequence]) -> str:
+    """Render a plain table as a string, see :func:`write_plain`."""
+    output = StringIO()
+    write_plain(columns, rows, output)
+    return output.getvalue().rstrip("\n")
@@ -0,0 +1,154 @@
+from collections import deque
+from contextlib import suppress
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import dask.config
+from dask.utils import parse_timedelta
+from distributed.core import Status
+from distributed.deploy.cluster import Cluster
+
+from .spec import build_cluster, load_spec, spec_hash
+
+from . import config  # noqa
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[str, "ClusterPool"] = {}
+
+
+def get_pool(key: str) -> Optional["ClusterPool"]:
+    """Get the running pool for a spec hash, if there is one."""
+    return _pools.get(key)
+
+
+class ClusterPool:
+    """Pool of pre-started standby clusters for a spec.
+
+    While the pool is running :func:`dask_ctl.lifecycle.create_cluster` hands out one of
+    the standby clusters for a matching spec instead of starting a new one, and the pool
+    is refilled in the background. Standby clusters are closed once they are older than
+    ``ttl``, and they are only replaced if something was taken from the pool within
+    the last ``ttl``, so an unused pool empties until it is next used.
+
+    Parameters
+    ----------
+    spec_path
+        Path to a cluster spec file.
+    size (optional)
+        Number of standby clusters to keep. Defaults to ``ctl.pool.size``.
+    ttl (optional)
+        How long to keep each standby cluster around. Defaults to ``ctl.pool.ttl``.
+
+    Examples
+    --------
+    >>> with ClusterPool("/path/to/spec.yaml", size=2):  # doctest: +SKIP
+    ...     cluster = create_cluster("/path/to/spec.yaml")  # Returns instantly
+
+    """
+
+    def __init__(self, spec_path: str, size: int = None, ttl=None):
+        self.spec = load_spec(spec_path)
+        self.key = spec_hash(*self.spec, self.spec.labels)
+        self.size = dask.config.get("ctl.pool.size", override_with=size)
+        self.ttl = parse_timedelta(dask.config.get("ctl.pool.ttl", override_with=ttl))
+        # Pairs of the time each standby cluster was started and the cluster
+        self._standby = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._last_used = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name=f"dask-ctl-pool-{self.key}", daemon=True
+        )
+
+    def start(self) -> "ClusterPool":
+        if self.key in _pools:
+            raise ValueError(f"A pool is already running for spec {self.key}")
+        _pools[self.key] = self
+        self._thread.start()
+        return self
+
+    def acquire(self) -> Optional[Cluster]:
+        """Take a standby cluster out of the pool, returns ``None`` if it is empty."""
+        self._last_used = time.monotonic()
+        cluster = None
+        stopped = []
+        with self._lock:
+            while self._standby and cluster is None:
+                _, candidate = self._standby.popleft()
+                if candidate.status == Status.running:
+                    cluster = candidate
+                else:
+                    stopped.append(candidate)
+        self._wakeup.set()
+        # Closing can be slow, so it happens after other callers can use the pool
+        for candidate in stopped:
+            self._close_cluster(candidate)
+        return cluster
+
+    def _idle(self) -> bool:
+        return self.ttl is not None and time.monotonic() - self._last_used > self.ttl
+
+    def _reap(self):
+        if self.ttl is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            reaped = [c for started, c in self._standby if now - started > self.ttl]
+            kept = [(s, c) for s, c in self._standby if now - s <= self.ttl]
+            self._standby = deque(kept)
+        for cluster in reaped:
+            self._close_cluster(cluster)
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._reap()
+            while (
+                len(self._standby) < self.size
+                and not self._idle()
+                and not self._closed.is_set()
+            ):
+                try:
+                    started = time.monotonic()
+                    cluster = build_cluster(*self.spec, labels=self.spec.labels)
+                except Exception:
+                    logger.exception("Failed to start standby cluster")
+                    break
+                with self._lock:
+                    closed = self._closed.is_set()
+                    if not closed:
+                        self._standby.append((started, cluster))
+                if closed:
+                    self._close_cluster(cluster)
+            self._wakeup.wait(timeout=1)
+            self._wakeup.clear()
+
+    def _close_cluster(self, cluster: Cluster):
+        with suppress(Exception):
+            cluster.close()
+
+    def close(self):
+        """Stop refilling the pool and close all standby clusters."""
+        self._closed.set()
+        self._wakeup.set()
+        if _pools.get(self.key) is self:
+            del _pools[self.key]
+        if self._thread.is_alive():
+            self._thread.join()
+        with self._lock:
+            standby = [cluster for _, cluster in self._standby]
+            self._standby.clear()
+        for cluster in standby:
+            self._close_cluster(cluster)
+
+    def __len__(self) -> int:
+        return len(self._standby)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
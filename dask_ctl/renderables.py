@@ -1,90 +1,239 @@
 import datetime
+import threading
 
 import click
 from rich import box
+from rich.columns import Columns
+from rich.console import Group
+from rich.spinner import Spinner
 from rich.table import Table
 from rich.text import Text
 
-from dask.utils import format_bytes, format_time_ago, typename
+from dask.utils import format_bytes, format_time_ago
 from distributed.core import Status
 
-from .discovery import (
-    discover_clusters,
-    list_discovery_methods,
+from .discovery import discover_cluster_names_concurrently
+from .formats import (
+    FIELDS,
+    cluster_record,
+    discover_cluster_summaries,
+    name_record,
+    needs_cluster,
+    needs_summary,
 )
+from .plain import write_plain
+from .summary import STAT_FIELDS
+from .top import USAGE_COLUMNS, format_stat, format_usage
 
 
-def get_created(cluster):
-    try:
-        return format_time_ago(
-            datetime.datetime.fromtimestamp(float(cluster.scheduler_info["started"]))
-        )
-    except KeyError:
-        return "Unknown"
-
-
-def get_status(cluster):
-    cluster_status = cluster.status.name.title()
-    if cluster.status == Status.created:
+def format_status(status: str):
+    cluster_status = status.title()
+    if status == Status.created.name:
         cluster_status = Text(cluster_status, style="yellow")
-    elif cluster.status == Status.running:
+    elif status == Status.running.name:
         cluster_status = Text(cluster_status, style="green")
     else:
         cluster_status = Text(cluster_status, style="red")
     return cluster_status
 
 
-def get_workers(cluster):
+DISCOVERY_STATUS_ICONS = {
+    "done": ":heavy_check_mark:",
+    "timed out": ":hourglass:",
+    "failed": ":cross_mark:",
+}
+
+
+def format_field(field: str, value):
+    """Format a single value of a cluster record as a table cell."""
+    if field in ("workers", "threads"):
+        return str(value)
+    if field == "memory":
+        return format_bytes(value)
+    if field == "created":
+        if not value:
+            return "Unknown"
+        # format_time_ago compares against the naive local time
+        return format_time_ago(
+            datetime.datetime.fromisoformat(value).astimezone().replace(tzinfo=None)
+        )
+    if field == "status":
+        return format_status(value)
+    if field in STAT_FIELDS:
+        return format_stat(field, value)
+    return value
+
+
+def get_row(record: dict, fields=FIELDS):
+    """Format a record from :func:`dask_ctl.formats.cluster_record` as table cells."""
+    return tuple(format_field(field, record[field]) for field in fields)
+
+
+class ClusterTable:
+    """Table of discovered clusters which can be updated while it is being rendered.
+
+    Rows are ordered by discovery method and then cluster name, the same as the
+    machine readable formats, so the output does not depend on the order in which
+    clusters happened to be discovered. When rendered with
+    ``show_status`` the state of each discovery method is shown below the table.
+    Only the columns for ``fields`` are shown, see :func:`dask_ctl.formats.parse_fields`.
+
+    Once there are more than ``max_rows`` rows only a count is rendered, as laying out
+    a large table on every refresh is slow. Use :meth:`write_plain` to write it instead.
+
+    """
+
+    def __init__(self, show_status: bool = True, fields=FIELDS, max_rows: int = None):
+        self.show_status = show_status
+        self.fields = fields
+        self.max_rows = max_rows
+        self.status = {}
+        self._rows = {}
+        self._spinners = {}
+        self._lock = threading.Lock()
+
+    def set_status(self, discovery_method: str, status: str):
+        with self._lock:
+            self.status[discovery_method] = status
+
+    def add(self, discovery_method: str, cluster, summary: dict = None):
+        self.add_record(
+            cluster_record(
+                cluster,
+                discovery_method,
+                # The discovery method and name are always needed to key the row
+                tuple(dict.fromkeys(("discovery", "name", *self.fields))),
+                summary,
+            )
+        )
+
+    def add_record(self, record: dict):
+        row = get_row(record, self.fields)
+        with self._lock:
+            self.status.setdefault(record["discovery"], "discovering")
+            self._rows[(record["discovery"], record["name"])] = row
+
+    def remove_record(self, record: dict):
+        with self._lock:
+            self._rows.pop((record["discovery"], record["name"]), None)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _sorted_rows(self):
+        with self._lock:
+            return [self._rows[key] for key in sorted(self._rows)]
+
+    def _titles(self):
+        return [field.replace("_", " ").title() for field in self.fields]
+
+    def table(self) -> Table:
+        table = Table(box=box.SIMPLE)
+        for field, title in zip(self.fields, self._titles()):
+            if field == "name":
+                table.add_column(title, style="cyan", no_wrap=True)
+            else:
+                table.add_column(title)
+        for row in self._sorted_rows():
+            table.add_row(*row)
+        return table
+
+    def write_plain(self, file=None):
+        """Write the table as plain text, see :func:`dask_ctl.plain.write_plain`."""
+        write_plain(self._titles(), self._sorted_rows(), file)
+
+    def _status_indicator(self, discovery_method, status):
+        if status == "discovering":
+            if discovery_method not in self._spinners:
+                self._spinners[discovery_method] = Spinner(
+                    "dots", text=discovery_method, style="green"
+                )
+            return self._spinners[discovery_method]
+        return Text.from_markup(
+            f"{DISCOVERY_STATUS_ICONS.get(status, '')} {discovery_method}"
+            + ("" if status == "done" else f" [red]{status}[/red]")
+        )
+
+    def __rich__(self):
+        if self.max_rows is not None and len(self) > self.max_rows:
+            body = Text(f"Discovered {len(self)} clusters...", style="bold green")
+        else:
+            body = self.table()
+        if not self.show_status:
+            return body
+        with self._lock:
+            status = dict(self.status)
+        return Group(
+            body,
+            Columns([self._status_indicator(m, s) for m, s in status.items()]),
+        )
+
+
+async def populate_table(cluster_table, discovery=None, console=None, on_complete=None):
+    """Discover clusters concurrently and add each one to ``cluster_table`` as it arrives.
+
+    Cluster managers are only constructed if the table shows fields which need them.
+    ``on_complete`` is passed to
+    :func:`dask_ctl.discovery.discover_cluster_names_concurrently`.
+
+    """
     try:
-        return cluster.scheduler_info["workers"].values()
-    except KeyError:
-        return []
+        if needs_cluster(cluster_table.fields):
+            async for discovery_method, cluster, summary in discover_cluster_summaries(
+                discovery=discovery,
+                on_status=cluster_table.set_status,
+                summarize=needs_summary(cluster_table.fields),
+                on_complete=on_complete,
+            ):
+                cluster_table.add(discovery_method, cluster, summary)
+        else:
+            async for (
+                discovery_method,
+                name,
+                cluster_class,
+            ) in discover_cluster_names_concurrently(
+                discovery=discovery,
+                on_status=cluster_table.set_status,
+                on_complete=on_complete,
+            ):
+                cluster_table.add_record(
+                    name_record(name, discovery_method, cluster_class)
+                )
+    except Exception:
+        if console:
+            console.print_exception(show_locals=True)
+            raise click.Abort()
+        raise
+    if console and discovery is None:
+        for discovery_method, status in cluster_table.status.items():
+            if status in ("failed", "timed out"):
+                console.print(
+                    f":warning: Discovery {discovery_method} {status}. "
+                    f"Run `dask cluster list {discovery_method}` for more info.",
+                    style="yellow",
+                )
 
 
 async def generate_table(discovery=None, status=None, console=None):
+    if status:
+        status.update("[bold green]Discovering clusters...")
+    cluster_table = ClusterTable(show_status=False)
+    await populate_table(cluster_table, discovery=discovery, console=console)
+    return cluster_table.table()
+
+
+def usage_table(records, columns=USAGE_COLUMNS) -> Table:
+    """Render records from :func:`dask_ctl.top.usage_record` in the given order."""
     table = Table(box=box.SIMPLE)
-    table.add_column("Name", style="cyan", no_wrap=True)
-    table.add_column("Address")
-    table.add_column("Type")
-    table.add_column("Discovery")
-    table.add_column("Workers")
-    table.add_column("Threads")
-    table.add_column("Memory")
-    table.add_column("Created")
-    table.add_column("Status")
-
-    discovery_methods = list_discovery_methods()
-    for discovery_method in discovery_methods:
-        if status:
-            status.update(f"[bold green]Discovering {discovery_method}s...")
-        if discovery_methods[discovery_method]["enabled"] and (
-            discovery is None or discovery == discovery_method
-        ):
-            try:
-                async for cluster in discover_clusters(discovery=discovery_method):
-                    workers = get_workers(cluster)
-                    table.add_row(
-                        cluster.name,
-                        cluster.scheduler_address,
-                        typename(type(cluster)),
-                        discovery_method,
-                        str(len(workers)),
-                        str(sum(w["nthreads"] for w in workers)),
-                        format_bytes(sum([w["memory_limit"] for w in workers])),
-                        get_created(cluster),
-                        get_status(cluster),
-                    )
-            except Exception as e:
-                if console:
-                    if discovery is None:
-                        console.print(
-                            f":warning: Discovery {discovery_method} failed. "
-                            f"Run `dask cluster list {discovery_method}` for more info.",
-                            style="yellow",
-                        )
-                    else:
-                        console.print_exception(show_locals=True)
-                        raise click.Abort()
-                else:
-                    raise e
+    for column in columns:
+        if column == "name":
+            table.add_column(
+                column.replace("_", " ").title(), style="cyan", no_wrap=True
+            )
+        elif column == "discovery":
+            table.add_column(column.replace("_", " ").title())
+        else:
+            table.add_column(column.replace("_", " ").title(), justify="right")
+    for record in records:
+        table.add_row(*format_usage(record, columns).values())
     return table
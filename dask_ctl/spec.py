@@ -1,20 +1,454 @@
+from contextlib import nullcontext, suppress
+import compileall
+import copy
+import functools
+import hashlib
+import importlib
+import json
+import os
+import re
+import sys
+import tempfile
+
 import yaml
 
+import dask.config
+
+from .exceptions import DaskClusterSpecInvalid
+
+from . import config  # noqa
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # libyaml is not available
+    from yaml import SafeLoader
+
+#: Key in the cluster info, which is mirrored in the scheduler metadata, holding the spec hash
+SPEC_HASH_KEY = "spec-hash"
+#: Key in the cluster info holding the ``labels`` of the spec, used to select clusters
+LABELS_KEY = "labels"
+
+
+class ClusterSpec(tuple):
+    """A parsed cluster spec, which is a ``(module, class, args, kwargs)`` tuple.
+
+    The ``labels`` of the spec are held as an attribute, so the spec still unpacks into
+    the arguments of the cluster manager.
+
+    """
+
+    def __new__(cls, cm_module, cm_class, args, kwargs, labels=None):
+        spec = super().__new__(cls, (cm_module, cm_class, args, kwargs))
+        spec.labels = {str(key): str(value) for key, value in (labels or {}).items()}
+        return spec
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+
+# In-process cache of parsed spec files keyed by (path, mtime, size)
+_spec_cache = {}
+
+# Bump when the format of cached entries changes to ignore existing on disk entries
+_DISK_CACHE_VERSION = 3
+
+
+def _disk_cache_directory():
+    return dask.config.get("ctl.spec-cache.directory") or os.path.join(
+        os.path.expanduser("~"), ".cache", "dask-ctl", "specs"
+    )
+
+
+def _disk_cache_path(key):
+    digest = hashlib.sha256(repr((_DISK_CACHE_VERSION, key)).encode()).hexdigest()
+    return os.path.join(_disk_cache_directory(), f"{digest}.json")
+
+
+def _read_disk_cache(key):
+    if not dask.config.get("ctl.spec-cache.disk"):
+        return None
+    with suppress(Exception):
+        with open(_disk_cache_path(key), "r") as fh:
+            return json.load(fh)
+    return None
+
 
-def load_spec(path):
+def _prune_disk_cache(directory, size):
+    """Remove all but the ``size`` most recently written entries.
+
+    Entries pickled by earlier versions are removed too.
+
+    """
+    with suppress(Exception):
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                entries.append(entry)
+            elif entry.name.endswith(".pickle"):
+                with suppress(OSError):
+                    os.remove(entry.path)
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[size:]:
+            with suppress(OSError):
+                os.remove(entry.path)
+
+
+def _write_disk_cache(key, documents):
+    if not dask.config.get("ctl.spec-cache.disk"):
+        return
+    # Specs are stored as JSON so that reading the cache can never run code. YAML
+    # values JSON can't represent the same way, such as dates or integer keys, are
+    # left uncached.
+    try:
+        encoded = json.dumps(documents)
+    except (TypeError, ValueError):
+        return
+    if json.loads(encoded) != documents:
+        return
+    cache_path = _disk_cache_path(key)
+    directory = os.path.dirname(cache_path)
+    with suppress(Exception):
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as fh:
+            fh.write(encoded)
+        os.replace(fh.name, cache_path)
+    _prune_disk_cache(directory, dask.config.get("ctl.spec-cache.size"))
+
+
+def _read_documents(path):
+    """Read the YAML documents in a file, cached on the path, mtime and size."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _spec_cache:
+        documents = _read_disk_cache(key)
+        if documents is None:
+            documents = _parse_documents(path)
+            _write_disk_cache(key, documents)
+        for stale in [k for k in _spec_cache if k[0] == key[0]]:
+            del _spec_cache[stale]
+        _spec_cache[key] = documents
+    # Callers may modify the args and kwargs so never hand out the cached objects
+    return copy.deepcopy(_spec_cache[key])
+
+
+def _parse_documents(path):
     with open(path, "r") as fh:
-        spec = yaml.safe_load(fh.read())
+        return [
+            doc
+            for doc in yaml.load_all(fh.read(), Loader=SafeLoader)
+            if doc is not None
+        ]
+
+
+def load_specs(path, environment=None):
+    """Load every cluster spec from a spec file.
+
+    A spec file may contain a single cluster spec, several YAML documents each containing
+    a cluster spec, or a document with a ``clusters`` list of cluster specs. Each cluster
+    can be given a ``name``, otherwise one is generated from the file name.
 
-    version = spec["version"]
-    if version == 1:
+    Parsed files are cached in process and on disk, keyed by the path, modification
+    time and size of the file, so unchanged files are only parsed once.
+
+    Parameters
+    ----------
+    path
+        Path to the spec file.
+    environment (optional)
+        Environment overlay to apply to version 2 specs. Defaults to ``ctl.environment``.
+
+    Returns
+    -------
+    dict
+        Mapping of cluster name to a :class:`ClusterSpec`.
+
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    entries = []
+    for doc in _read_documents(path):
+        _validate_version(doc, source=path)
+        if "clusters" in doc:
+            entries.extend(
+                {"version": doc["version"], **cluster} for cluster in doc["clusters"]
+            )
+        else:
+            entries.append(doc)
+
+    specs = {}
+    for i, spec in enumerate(entries):
+        name = spec.get("name", stem if len(entries) == 1 else f"{stem}-{i}")
+        if name in specs:
+            raise ValueError(f"Duplicate cluster name {name} in {path}")
+        specs[name] = parse_spec(spec, path=path, environment=environment)
+    return specs
+
+
+def load_spec(path, environment=None):
+    specs = load_specs(path, environment=environment)
+    if len(specs) != 1:
+        raise ValueError(
+            f"{path} contains {len(specs)} cluster specs, use create_clusters instead"
+        )
+    return next(iter(specs.values()))
+
+
+def parse_spec(spec, path=None, environment=None):
+    _validate_version(spec, source=path or "spec")
+    if spec["version"] == 1:
         return load_v1_spec(spec)
-    else:
-        raise KeyError(f"No such dask cluster spec version {version}")
+    return load_v2_spec(spec, path=path, environment=environment)
+
+
+def _compile_schema(schema, required=(), strict=True, choices=None):
+    """Compile a ``{key: type}`` schema into a validation function.
+
+    Validation only does dictionary lookups and ``isinstance`` checks, so specs can be
+    checked cheaply before anything is imported. Keys which are not in the schema are
+    rejected when ``strict``, and ``choices`` maps keys to the values they may take.
+
+    """
+    allowed = frozenset(schema) if strict else None
+    required = tuple(required)
+    checks = tuple(schema.items())
+    choices = tuple((choices or {}).items())
+
+    def validate(spec, source="spec"):
+        if not isinstance(spec, dict):
+            raise DaskClusterSpecInvalid(f"Invalid {source}: expected a mapping")
+        errors = []
+        if allowed is not None:
+            errors += [f"unknown key {key!r}" for key in spec if key not in allowed]
+        errors += [f"missing key {key!r}" for key in required if key not in spec]
+        errors += [
+            f"{key!r} must be of type {expected.__name__}"
+            for key, expected in checks
+            if key in spec and not isinstance(spec[key], expected)
+        ]
+        errors += [
+            f"unsupported {key!r} {spec[key]!r}, expected one of "
+            + ", ".join(map(repr, values))
+            for key, values in choices
+            if isinstance(spec.get(key), schema[key]) and spec[key] not in values
+        ]
+        if errors:
+            raise DaskClusterSpecInvalid(f"Invalid {source}: " + ", ".join(errors))
+
+    return validate
+
+
+_OVERLAY_SCHEMA = {
+    "module": str,
+    "class": str,
+    "args": list,
+    "kwargs": dict,
+    "labels": dict,
+    "variables": dict,
+}
+_V2_SCHEMA = {
+    **_OVERLAY_SCHEMA,
+    "version": int,
+    "name": str,
+    "base": str,
+    "environments": dict,
+}
+
+# Validators are compiled once at import time. Version 1 specs have always allowed
+# other keys, so only the required keys are checked.
+_validate_version = _compile_schema(
+    {"version": int}, required=("version",), strict=False, choices={"version": (1, 2)}
+)
+_validate_v1 = _compile_schema(
+    {"module": str, "class": str, "labels": dict},
+    required=("module", "class"),
+    strict=False,
+)
+_validate_v2 = _compile_schema(_V2_SCHEMA)
+_validate_v2_resolved = _compile_schema(_V2_SCHEMA, required=("module", "class"))
+_validate_overlay = _compile_schema(_OVERLAY_SCHEMA)
 
 
 def load_v1_spec(spec):
+    _validate_v1(spec)
     cm_module = spec["module"]
     cm_class = spec["class"]
     args = spec.get("args", [])
     kwargs = spec.get("kwargs", {})
-    return cm_module, cm_class, args, kwargs
+    return ClusterSpec(cm_module, cm_class, args, kwargs, spec.get("labels"))
+
+
+def _merge(base, overlay):
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _resolve_base(spec, path, seen=()):
+    _validate_v2(spec, source=path or "spec")
+    if "base" not in spec:
+        return spec
+    if path is None:
+        raise DaskClusterSpecInvalid("Specs with a base must be loaded from a file")
+
+    base_path = os.path.abspath(
+        os.path.join(os.path.dirname(os.path.abspath(path)), spec["base"])
+    )
+    if base_path in seen:
+        raise DaskClusterSpecInvalid(f"Circular base spec {base_path}")
+    documents = _read_documents(base_path)
+    if len(documents) != 1 or documents[0].get("version") != 2:
+        raise DaskClusterSpecInvalid(
+            f"Base spec {base_path} must be a single version 2 spec"
+        )
+
+    base = _resolve_base(documents[0], base_path, (*seen, os.path.abspath(path)))
+    base.pop("name", None)
+    spec = {key: value for key, value in spec.items() if key != "base"}
+    return _merge(base, spec)
+
+
+_VARIABLE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+
+def _substitute(value, variables):
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    def lookup(match):
+        name, default = match.groups()
+        if name in os.environ:
+            return os.environ[name]
+        if name in variables:
+            return variables[name]
+        if default is not None:
+            return default
+        raise DaskClusterSpecInvalid(f"Undefined variable {name!r} in spec")
+
+    # A value which is entirely one variable keeps the type of the variable
+    match = _VARIABLE.fullmatch(value)
+    if match:
+        return lookup(match)
+    return _VARIABLE.sub(lambda m: str(lookup(m)), value)
+
+
+def load_v2_spec(spec, path=None, environment=None):
+    """Resolve a version 2 spec.
+
+    Version 2 specs extend version 1 with a ``base`` spec file to inherit from,
+    ``environments`` overlays which are merged on top when selected and
+    ``${VAR}`` or ``${VAR:-default}`` substitution from ``variables`` and environment
+    variables. The spec is fully validated before anything is imported.
+
+    """
+    environment = dask.config.get("ctl.environment", override_with=environment)
+
+    spec = _resolve_base(spec, path)
+    environments = spec.pop("environments", {})
+    # Every overlay is validated, so mistakes in one are reported before it is used
+    for name, overlay in environments.items():
+        _validate_overlay(overlay, source=f"environment {name!r}")
+    if environment is not None and environment in environments:
+        spec = _merge(spec, environments[environment])
+    _validate_v2_resolved(spec, source=path or "spec")
+
+    variables = spec.get("variables", {})
+    cm_module = _substitute(spec["module"], variables)
+    cm_class = _substitute(spec["class"], variables)
+    args = _substitute(spec.get("args", []), variables)
+    kwargs = _substitute(spec.get("kwargs", {}), variables)
+    labels = _substitute(spec.get("labels", {}), variables)
+    return ClusterSpec(cm_module, cm_class, args, kwargs, labels)
+
+
+def normalize_kwargs(kwargs):
+    return {key.replace("-", "_"): entry for key, entry in kwargs.items()}
+
+
+def spec_hash(cm_module, cm_class, args, kwargs, labels=None):
+    """Hash a cluster spec so that equivalent specs produce the same key."""
+    # Specs without labels keep the hash they had before labels were supported
+    canonical = json.dumps(
+        [cm_module, cm_class, list(args), normalize_kwargs(kwargs)]
+        + ([labels] if labels else []),
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def warm_module(name, cm_class=None):
+    """Import a module and compile bytecode for its whole package.
+
+    Writing bytecode for the package means future processes can import it
+    without compiling anything. If ``cm_class`` is given the package which defines
+    that class is compiled, as modules such as ``dask.distributed`` only re-export
+    classes from another package.
+
+    """
+    module = importlib.import_module(name)
+    defined_in = getattr(module, cm_class).__module__ if cm_class else name
+    package = sys.modules[defined_in.partition(".")[0]]
+    for path in getattr(package, "__path__", []):
+        compileall.compile_dir(path, quiet=2)
+    return module
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_cluster_manager(cm_module, cm_class):
+    """Import and return the cluster manager class named in a spec."""
+    module = importlib.import_module(cm_module)
+    return getattr(module, cm_class)
+
+
+def build_cluster(
+    cm_module, cm_class, args, kwargs, asynchronous=False, track=None, labels=None
+):
+    """Construct the cluster manager described by a spec.
+
+    If ``track`` is given it is called with the cluster manager before it is
+    initialised, so that a cluster which fails or hangs part way through starting can
+    still be closed. Any ``labels`` are recorded in the cluster info.
+    """
+    cluster_manager = resolve_cluster_manager(cm_module, cm_class)
+    starting = nullcontext()
+    if dask.config.get("ctl.fast-start.enabled"):
+        # Imported here as it pulls in distributed, which parsing specs does not need
+        from .faststart import fast_start, is_local_cluster_manager
+
+        if is_local_cluster_manager(cluster_manager):
+            starting = fast_start()
+    init_kwargs = dict(normalize_kwargs(kwargs), asynchronous=asynchronous)
+
+    with starting:
+        if track is None:
+            cluster = cluster_manager(*args, **init_kwargs)
+        else:
+            cluster = cluster_manager.__new__(cluster_manager, *args, **init_kwargs)
+            track(cluster)
+            cluster.__init__(*args, **init_kwargs)
+    cluster.shutdown_on_close = False
+
+    # Record the spec on the scheduler so that the cluster can be matched and reused later
+    cluster._cluster_info[SPEC_HASH_KEY] = spec_hash(
+        cm_module, cm_class, args, kwargs, labels
+    )
+    if labels:
+        cluster._cluster_info[LABELS_KEY] = dict(labels)
+    if not asynchronous:
+        with suppress(Exception):
+            cluster.sync(
+                cluster.scheduler_comm.set_metadata,
+                keys=["cluster-manager-info"],
+                value=cluster._cluster_info.copy(),
+            )
+    return cluster
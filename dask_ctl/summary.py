@@ -0,0 +1,199 @@
+"""Worker totals and statistics aggregated on the scheduler.
+
+The scheduler ``identity`` includes the details and metrics of every worker, which on a
+scheduler with thousands of workers is megabytes per call. Instead a small function is
+run on the scheduler with the ``run_function`` handler, the same one
+:meth:`distributed.Client.run_on_scheduler` uses, and only the aggregates are sent back.
+
+"""
+import asyncio
+from typing import Dict, Iterable
+
+import dask.config
+
+from .utils import pickle_by_value, run_on_scheduler
+
+from . import config  # noqa
+
+pickle_by_value(__name__)
+
+#: Totals in the summary returned by :func:`get_summary`
+SUMMARY_FIELDS = (
+    "workers",
+    "threads",
+    "memory_limit",
+    "cpu",
+    "memory",
+    "processing",
+    "queued",
+    "network",
+    "spilled",
+)
+
+#: Per worker metrics which have statistics in the summary
+STAT_METRICS = ("memory", "cpu", "processing")
+
+#: Statistics of each of the :data:`STAT_METRICS`, as percentiles
+STATS = {"min": 0, "median": 50, "p95": 95, "max": 100}
+
+#: Statistics in the summary returned by :func:`get_summary`
+STAT_FIELDS = (
+    *(f"{metric}_{stat}" for metric in STAT_METRICS for stat in STATS),
+    "stragglers",
+)
+
+
+def _columns(nthreads: list, memory_limit: list, metrics: list) -> dict:
+    # Each column is filled straight from the worker details without an intermediate
+    # row per worker
+    import numpy as np
+
+    count = len(metrics)
+    metrics = [m or {} for m in metrics]
+    task_counts = [m.get("task_counts") or {} for m in metrics]
+    network = [m.get("host_net_io") or {} for m in metrics]
+
+    def column(values):
+        return np.fromiter(values, dtype=float, count=count)
+
+    return {
+        "threads": column(n or 0 for n in nthreads),
+        "memory_limit": column(limit or 0 for limit in memory_limit),
+        "cpu": column(m.get("cpu") or 0 for m in metrics),
+        "memory": column(m.get("memory") or 0 for m in metrics),
+        "processing": column(
+            t.get("executing", 0) + t.get("long-running", 0) for t in task_counts
+        ),
+        "queued": column(
+            t.get("ready", 0) + t.get("constrained", 0) for t in task_counts
+        ),
+        "network": column(
+            n.get("read_bps", 0) + n.get("write_bps", 0) for n in network
+        ),
+        "spilled": column(
+            (m.get("spilled_bytes") or {}).get("disk", 0) for m in metrics
+        ),
+    }
+
+
+def worker_columns(workers: Iterable[dict]) -> dict:
+    """Arrange worker details from a scheduler identity as one NumPy array per field.
+
+    The keys are the :data:`SUMMARY_FIELDS` other than ``workers``.
+
+    """
+    workers = list(workers)
+    return _columns(
+        [w.get("nthreads") for w in workers],
+        [w.get("memory_limit") for w in workers],
+        [w.get("metrics") for w in workers],
+    )
+
+
+def _summarize_columns(columns: dict, straggler_factor: float) -> dict:
+    import numpy as np
+
+    count = len(columns["cpu"])
+    summary = {"workers": count}
+    for field, values in columns.items():
+        total = values.sum()
+        summary[field] = float(total) if field in ("cpu", "network") else int(total)
+    for metric in STAT_METRICS:
+        values = columns[metric]
+        stats = (
+            np.percentile(values, list(STATS.values()))
+            if count
+            else np.zeros(len(STATS))
+        )
+        for stat, value in zip(STATS, stats):
+            summary[f"{metric}_{stat}"] = float(value)
+    queued = columns["queued"]
+    threshold = straggler_factor * max(np.median(queued) if count else 0, 1)
+    summary["stragglers"] = int(np.count_nonzero(queued > threshold))
+    return summary
+
+
+def summarize_workers(workers: Iterable[dict], straggler_factor: float = 2) -> dict:
+    """Total and summarise the threads, memory and metrics of workers.
+
+    ``cpu`` is the total of each worker's CPU percentage, ``processing`` counts the
+    tasks executing on workers and ``queued`` the tasks ready on workers but waiting for
+    a thread. ``network`` is the host network traffic in bytes per second and
+    ``spilled`` the bytes workers have spilled to disk.
+
+    The :data:`STAT_FIELDS` hold the min, median, 95th percentile and max of each of the
+    :data:`STAT_METRICS` across workers. ``stragglers`` counts the workers with more
+    than ``straggler_factor`` times the median number of queued tasks, taking the
+    median as at least one, as they will be the last to finish their work.
+
+    Parameters
+    ----------
+    workers
+        Worker details, as in the ``workers`` of a scheduler identity.
+    straggler_factor (optional)
+        Defaults to ``2``.
+
+    """
+    return _summarize_columns(worker_columns(workers), straggler_factor)
+
+
+def scheduler_summary(dask_scheduler=None, straggler_factor: float = 2) -> dict:
+    """Summarise all workers, run on the scheduler itself."""
+    workers = list(dask_scheduler.workers.values())
+    return _summarize_columns(
+        _columns(
+            [ws.nthreads for ws in workers],
+            [ws.memory_limit for ws in workers],
+            [ws.metrics for ws in workers],
+        ),
+        straggler_factor,
+    )
+
+
+async def get_summary(scheduler_comm, straggler_factor: float = None) -> dict:
+    """Get worker totals and statistics from a scheduler, see :func:`summarize_workers`.
+
+    The summary is computed on the scheduler. If the scheduler can't run it, for
+    example because NumPy is not installed there, the full identity is fetched and
+    summarised locally instead.
+
+    Parameters
+    ----------
+    scheduler_comm
+        An rpc to the scheduler, such as ``cluster.scheduler_comm``.
+    straggler_factor (optional)
+        Defaults to ``ctl.stats.straggler-factor``.
+
+    Examples
+    --------
+    >>> await get_summary(cluster.scheduler_comm)  # doctest: +SKIP
+    {'workers': 4, 'threads': 12, 'memory_limit': 17179869184, 'cpu': 8.2, ...}
+
+    """
+    kwargs = {
+        "straggler_factor": dask.config.get(
+            "ctl.stats.straggler-factor", override_with=straggler_factor
+        )
+    }
+    return await run_on_scheduler(
+        scheduler_comm,
+        scheduler_summary,
+        lambda identity: summarize_workers(
+            identity.get("workers", {}).values(), **kwargs
+        ),
+        **kwargs,
+    )
+
+
+async def get_cluster_summary(cluster) -> Dict[str, float]:
+    """Get the summary of a cluster manager's scheduler, see :func:`get_summary`.
+
+    The request is made on the manager's own loop and connection rather than opening
+    another one.
+
+    """
+    return await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(
+            get_summary(cluster.scheduler_comm), cluster.loop.asyncio_loop
+        )
+    )
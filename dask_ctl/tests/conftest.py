@@ -1,14 +1,54 @@
 import asyncio
 
 import pytest
+import dask.config
 import os
 
+SPECS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+
 
 @pytest.fixture
 def simple_spec_path():
-    return os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "specs", "simple.yaml"
-    )
+    return os.path.join(SPECS, "simple.yaml")
+
+
+@pytest.fixture
+def multi_spec_path():
+    return os.path.join(SPECS, "multi.yaml")
+
+
+@pytest.fixture
+def local_spec_path():
+    # One worker process
+    return os.path.join(SPECS, "local.yaml")
+
+
+@pytest.fixture
+def threaded_spec_path():
+    # Two workers in this process
+    return os.path.join(SPECS, "threaded.yaml")
+
+
+@pytest.fixture
+def labelled_spec_path():
+    # Labelled, with no workers and the scheduler on the port proxy discovery checks
+    return os.path.join(SPECS, "labelled.yaml")
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path_factory, monkeypatch):
+    # Keep on disk caches out of the home directory, including in CLI subprocesses
+    cache = tmp_path_factory.mktemp("cache")
+    settings = {
+        "ctl.spec-cache.directory": str(cache / "specs"),
+        "ctl.completion.path": str(cache / "names.json"),
+    }
+    for key, value in settings.items():
+        monkeypatch.setenv(
+            "DASK_" + key.upper().replace(".", "__").replace("-", "_"), value
+        )
+    with dask.config.set(settings):
+        yield cache
 
 
 @pytest.fixture
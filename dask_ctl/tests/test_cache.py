@@ -0,0 +1,48 @@
+import time
+
+from dask.distributed import LocalCluster
+from distributed.core import Status
+
+from dask_ctl.cache import ClusterManagerCache, cluster_cache
+from dask_ctl.lifecycle import get_cluster
+
+
+class FakeComm:
+    async def echo(self, data=None):
+        return data
+
+
+class FakeCluster:
+    status = Status.running
+    scheduler_comm = FakeComm()
+
+    def sync(self, *args, **kwargs):
+        pass
+
+
+def test_cache_lru_and_ttl():
+    cache = ClusterManagerCache(maxsize=2, ttl=0.5)
+    a, b, c = FakeCluster(), FakeCluster(), FakeCluster()
+    cache.put("a", a)
+    cache.put("b", b)
+    assert cache.get("a") is a
+
+    cache.put("c", c)
+    assert "b" not in cache
+    assert len(cache) == 2
+
+    c.status = Status.closed
+    assert cache.get("c") is None
+    assert "c" not in cache
+
+    time.sleep(0.6)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_get_cluster_cached():
+    with LocalCluster(scheduler_port=8786) as _:
+        cluster = get_cluster("proxycluster-8786", cache=True)
+        assert get_cluster("proxycluster-8786", cache=True) is cluster
+    assert cluster_cache.get("proxycluster-8786") is None
+    assert "proxycluster-8786" not in cluster_cache
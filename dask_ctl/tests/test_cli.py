@@ -1,6 +1,11 @@
+import json
+import sys
+
+import dask.config
 from distributed import LocalCluster
 from subprocess import check_output
 from dask_ctl.cli import autocomplete_cluster_names
+from dask_ctl.names import load_name_index
 
 
 def test_list_discovery():
@@ -11,23 +16,160 @@ def test_list():
     with LocalCluster(name="testcluster", scheduler_port=8786) as _:
         output = check_output(["dask", "cluster", "list"])
 
-        assert b"Name" in output
+        # Output which is not to a terminal is written as a plain table, which is never
+        # truncated to the terminal width
+        assert output.startswith(b"NAME")
+        assert b"dask_ctl.proxy.ProxyCluster" in output
+        assert b"Running" in output
+
+
+def test_list_output():
+    with LocalCluster(scheduler_port=8786, dashboard_address=None) as cluster:
+        [record] = json.loads(check_output(["dask", "cluster", "list", "-o", "json"]))
+        assert record["type"] == "dask_ctl.proxy.ProxyCluster"
+        assert record["status"] == "running"
+        assert record["workers"] == len(cluster.workers)
+
+        output = check_output(["dask", "cluster", "list", "-o", "ndjson"])
+        assert [json.loads(line)["name"] for line in output.splitlines()] == [
+            record["name"]
+        ]
+
+        output = check_output(["dask", "cluster", "list", "-o", "csv"])
+        assert output.splitlines()[0].startswith(b"name,address,type")
+
+        assert check_output(["dask", "cluster", "list", "-o", "names"]) == (
+            b"proxycluster-8786\n"
+        )
+
+        output = check_output(["dask", "cluster", "list", "-o", "csv", "-c", "workers"])
+        assert output.splitlines() == [b"workers", str(len(cluster.workers)).encode()]
 
-        # Rich truncates output on small displays and check_output seems to set a small
-        # terminal size so these strings are truncated.
-        # TODO Figure out how to set the terminal size in check_output.
-        #
-        # assert b"dask_ctl.proxy.ProxyCluster" in output
-        # assert b"Running" in output
+        # Columns known from discovery never construct a cluster manager
+        script = (
+            "from dask_ctl.proxy import ProxyCluster\n"
+            "from dask_ctl.cli import cluster\n"
+            "ProxyCluster.from_name = None\n"
+            "cluster.main(['list', '-o', 'csv', '-c', 'name,type'], standalone_mode=False)\n"
+        )
+        assert check_output([sys.executable, "-c", script]).splitlines() == [
+            b"name,type",
+            b"proxycluster-8786,dask_ctl.proxy.ProxyCluster",
+        ]
+
+        # Machine readable output never sets up rich
+        script = (
+            "import sys\n"
+            "from dask_ctl.cli import cluster\n"
+            "cluster.main(['list', '-o', 'names'], standalone_mode=False)\n"
+            "assert 'rich' not in sys.modules\n"
+        )
+        check_output([sys.executable, "-c", script])
 
 
 def test_create(simple_spec_path):
     output = check_output(["dask", "cluster", "create", "-f", simple_spec_path])
-    assert b"Created" in output
+    assert b"Created cluster" in output
+    # The cluster manager's name is shown, not the name of the spec
+    assert b"Created cluster simple." not in output
+
+
+def test_create_wait_for_workers(multi_spec_path):
+    output = check_output(
+        ["dask", "cluster", "create", "-f", multi_spec_path, "-w", "1", "-t", "60"]
+    )
+    assert b"Created 2 of 2 clusters" in output
+    assert b"all-workers" in output
+
+
+def test_warm(simple_spec_path):
+    output = check_output(["dask", "cluster", "warm", "-f", simple_spec_path])
+    assert b"Warmed dask.distributed" in output
+
+
+def test_autocompletion(cache_directory):
+    # Without an index the clusters are discovered, which writes the index
+    assert autocomplete_cluster_names(None, None, "") == []
+    assert (cache_directory / "names.json").exists()
 
+    with LocalCluster(scheduler_port=8786, dashboard_address=None) as _:
+        # Answered from the index until it is older than the ttl
+        assert autocomplete_cluster_names(None, None, "") == []
+        with dask.config.set({"ctl.completion.ttl": "0s"}):
+            assert autocomplete_cluster_names(None, None, "") == ["proxycluster-8786"]
 
-def test_autocompletion():
-    with LocalCluster(scheduler_port=8786) as _:
+        assert autocomplete_cluster_names(None, None, "proxy") == ["proxycluster-8786"]
+        assert autocomplete_cluster_names(None, None, "p86") == ["proxycluster-8786"]
+        assert autocomplete_cluster_names(None, None, "local") == []
+
+    assert autocomplete_cluster_names(None, None, "") == ["proxycluster-8786"]
+    with dask.config.set({"ctl.completion.ttl": "0s"}):
+        assert autocomplete_cluster_names(None, None, "") == []
+
+
+def test_list_updates_name_index():
+    with LocalCluster(scheduler_port=8786, dashboard_address=None) as _:
+        check_output(["dask", "cluster", "list", "-o", "names"])
+        index = load_name_index()
+        assert index.names == ["proxycluster-8786"]
+        assert not index.is_stale("1 minute")
+
+
+def test_autocompletion_without_index():
+    with dask.config.set({"ctl.completion.index": False}), LocalCluster(
+        scheduler_port=8786
+    ) as _:
         assert len(autocomplete_cluster_names(None, None, "")) == 1
         assert len(autocomplete_cluster_names(None, None, "proxy")) == 1
         assert len(autocomplete_cluster_names(None, None, "local")) == 0
+
+
+def test_bulk_delete():
+    output = check_output(["dask", "cluster", "delete", "nomatch-*"])
+    assert b"0 of 0" in output
+
+
+def test_bulk_delete_label_mismatch():
+    with LocalCluster(scheduler_port=8786, dashboard_address=None) as cluster:
+        output = check_output(
+            ["dask", "cluster", "delete", "proxycluster-*", "-l", "team=nomatch"]
+        )
+        assert b"deleted" not in output
+        assert b"0 of 0" in output
+        assert cluster.status.name == "running"
+
+
+def test_top():
+    with LocalCluster(scheduler_port=8786, dashboard_address=None, n_workers=1):
+        output = check_output(["dask", "cluster", "top", "--once", "-s", "memory"])
+        header, row = output.decode().splitlines()
+        assert header.split()[:2] == ["NAME", "DISCOVERY"]
+        assert row.split()[1] == "proxycluster"
+
+
+def test_workers():
+    with LocalCluster(
+        scheduler_port=8786, dashboard_address=None, n_workers=2
+    ) as cluster:
+        output = check_output(
+            [
+                "dask",
+                "cluster",
+                "workers",
+                "proxycluster-8786",
+                "-o",
+                "ndjson",
+                "-t",
+                "1",
+            ]
+        )
+        [row] = [json.loads(line) for line in output.splitlines()]
+        assert row["nthreads"] > 0
+        assert row["address"].startswith("tcp://")
+
+        # Plain output shows whole addresses so they can be copied
+        output = check_output(
+            ["dask", "cluster", "workers", "proxycluster-8786", "--plain"]
+        ).decode()
+        for address in cluster.scheduler_info["workers"]:
+            assert address in output
@@ -6,6 +6,7 @@ from dask.distributed import LocalCluster
 from dask_ctl.discovery import (
     discover_cluster_names,
     discover_clusters,
+    discover_clusters_concurrently,
     list_discovery_methods,
 )
 
@@ -57,3 +58,23 @@ async def test_discover_clusters():
         discovered_clusters = [cluster async for cluster in discover_clusters()]
         assert discovered_clusters
         assert cluster.name in [c.name for c in discovered_clusters]
+
+
+@pytest.mark.asyncio
+async def test_discover_clusters_concurrently():
+    async with LocalCluster(
+        scheduler_port=SCHEDULER_PORT, asynchronous=True, dashboard_address=None
+    ) as cluster:
+        statuses = []
+        discovered = [
+            item
+            async for item in discover_clusters_concurrently(
+                on_status=lambda *args: statuses.append(args)
+            )
+        ]
+        assert [method for method, _ in discovered] == ["proxycluster"]
+        assert discovered[0][1].scheduler_info["id"] == cluster.scheduler.id
+        assert statuses == [
+            ("proxycluster", "discovering"),
+            ("proxycluster", "done"),
+        ]
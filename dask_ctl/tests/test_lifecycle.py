@@ -1,11 +1,37 @@
+import asyncio
+from contextlib import suppress
+import os
+import threading
+import time
+
 import pytest
 import ast
 
 import dask.config
-from dask.distributed import LocalCluster
+from dask.distributed import Client, LocalCluster
+from distributed.deploy.spec import SpecCluster
 
-from dask_ctl.lifecycle import create_cluster, get_snippet
-from dask_ctl.exceptions import DaskClusterConfigNotFound
+import dask_ctl
+from dask_ctl import lifecycle
+from dask_ctl.cache import _release as release
+from dask_ctl.proxy import ProxyCluster
+from dask_ctl.lifecycle import (
+    create_cluster,
+    create_clusters,
+    delete_cluster,
+    delete_clusters,
+    get_snippet,
+    scale_cluster,
+    scale_clusters,
+    temporary_cluster,
+    wait_for_workers,
+)
+from dask_ctl.utils import loop
+from dask_ctl.exceptions import (
+    DaskClusterConfigNotFound,
+    DaskClusterCreateError,
+    DaskClusterCreateTimeout,
+)
 
 
 def test_create_cluster(simple_spec_path):
@@ -14,6 +40,136 @@ def test_create_cluster(simple_spec_path):
     assert isinstance(cluster, LocalCluster)
 
 
+def test_create_cluster_reuse(labelled_spec_path):
+    with create_cluster(labelled_spec_path) as _:
+        reused = create_cluster(labelled_spec_path, reuse=True)
+        assert not isinstance(reused, LocalCluster)
+        assert reused.scheduler_address.endswith(":8786")
+
+
+def test_find_clusters_by_spec_hash_releases_others(monkeypatch):
+    released = []
+
+    def _release(cluster):
+        released.append(cluster)
+        release(cluster)
+
+    monkeypatch.setattr(lifecycle, "_release", _release)
+    with LocalCluster(scheduler_port=8786, n_workers=0, dashboard_address=None):
+        found = loop.run_sync(
+            lambda: lifecycle._find_clusters_by_spec_hash({"nomatch"})
+        )
+        assert found == {}
+        assert [type(c) for c in released] == [ProxyCluster]
+
+
+def test_create_clusters(multi_spec_path):
+    progress = []
+    clusters = create_clusters(
+        multi_spec_path, progress=lambda *args: progress.append(args)
+    )
+    try:
+        assert sorted(clusters) == ["large", "small"]
+        assert all(isinstance(c, LocalCluster) for c in clusters.values())
+        assert sorted(name for name, *_ in progress) == ["large", "small"]
+    finally:
+        for cluster in clusters.values():
+            cluster.close()
+
+
+def test_create_cluster_wait_for_workers(threaded_spec_path):
+    timings = {}
+    with create_cluster(
+        threaded_spec_path, wait_for_workers=2, timeout=30, timings=timings
+    ) as cluster:
+        assert len(cluster.scheduler.workers) >= 2
+        assert list(timings) == [
+            "parse",
+            "import",
+            "scheduler",
+            "first-worker",
+            "all-workers",
+        ]
+        assert timings["parse"] <= timings["all-workers"]
+
+    with pytest.raises(ValueError, match="asynchronous"):
+        create_cluster(threaded_spec_path, wait_for_workers=2, asynchronous=True)
+
+
+def test_create_cluster_failure_cleanup(local_spec_path, tmp_path):
+    before = set(SpecCluster._instances)
+    with pytest.raises(DaskClusterCreateTimeout, match="3 workers") as e:
+        create_cluster(local_spec_path, wait_for_workers=3, timeout=5)
+    assert e.value.phase == "workers"
+    assert isinstance(e.value, TimeoutError)
+    started = set(SpecCluster._instances) - before
+    assert started and all(c.status.name == "closed" for c in started)
+
+    spec_path = tmp_path / "invalid.yaml"
+    spec_path.write_text("version: 1\nmodule: dask.distributed\nclass: NoSuchCluster\n")
+    with pytest.raises(DaskClusterCreateError) as e:
+        create_cluster(str(spec_path))
+    assert e.value.phase == "import"
+
+    spec_path.write_text(
+        "version: 1\n"
+        "module: dask.distributed\n"
+        "class: LocalCluster\n"
+        "kwargs:\n"
+        "  no_such_argument: 1\n"
+    )
+    with pytest.raises(DaskClusterCreateError) as e:
+        create_cluster(str(spec_path))
+    assert e.value.phase == "scheduler"
+
+
+def test_create_cluster_timeout_starting_scheduler(tmp_path, monkeypatch):
+    (tmp_path / "slow_cluster.py").write_text(
+        "import time\n"
+        "from dask.distributed import LocalCluster\n\n"
+        "class SlowLocalCluster(LocalCluster):\n"
+        "    def __init__(self, *args, **kwargs):\n"
+        "        time.sleep(3)\n"
+        "        super().__init__(*args, **kwargs)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    spec_path = tmp_path / "slow.yaml"
+    spec_path.write_text(
+        "version: 1\n"
+        "module: slow_cluster\n"
+        "class: SlowLocalCluster\n"
+        "kwargs:\n"
+        "  n_workers: 0\n"
+        "  processes: false\n"
+        "  dashboard_address: null\n"
+    )
+    before = set(SpecCluster._instances)
+    with pytest.raises(DaskClusterCreateTimeout) as e:
+        create_cluster(str(spec_path), timeout=1)
+    assert e.value.phase == "scheduler"
+    # The cluster finished starting after the timeout and was closed then
+    started = set(SpecCluster._instances) - before
+    assert started and all(c.status.name == "closed" for c in started)
+
+
+def test_create_cluster_fast_start(local_spec_path):
+    with dask.config.set(
+        {
+            "ctl.fast-start.enabled": True,
+            "ctl.fast-start.preload": ["json"],
+            "distributed.worker.multiprocessing-method": "spawn",
+        }
+    ):
+        with create_cluster(local_spec_path, wait_for_workers=1, timeout=60) as cluster:
+            # Only the cluster being built uses the forkserver
+            assert (
+                dask.config.get("distributed.worker.multiprocessing-method") == "spawn"
+            )
+            with Client(cluster) as client:
+                [parent] = client.run(os.getppid).values()
+                assert parent != os.getpid()
+
+
 def test_create_cluster_fallback():
     with pytest.raises(DaskClusterConfigNotFound, match="dask-cluster.yaml"):
         cluster = create_cluster()
@@ -22,8 +178,13 @@ def test_create_cluster_fallback():
         with pytest.raises(DaskClusterConfigNotFound, match="foo.yaml"):
             cluster = create_cluster()
 
-    cluster = create_cluster(local_fallback=True)
-    assert isinstance(cluster, LocalCluster)
+    timings = {}
+    with create_cluster(
+        local_fallback=True, wait_for_workers=1, timeout=60, timings=timings
+    ) as cluster:
+        assert isinstance(cluster, LocalCluster)
+        assert len(cluster.scheduler.workers) >= 1
+        assert "all-workers" in timings
 
 
 @pytest.mark.xfail(reason="Proxy cluster discovery not working")
@@ -35,3 +196,198 @@ def test_snippet():
         ast.parse(snippet)
 
         assert "proxycluster-8786" in snippet
+
+
+def test_bulk_operations():
+    with LocalCluster(scheduler_port=8786) as _:
+        assert delete_clusters("nomatch-*") == {}
+
+        events = []
+        results = scale_clusters(
+            "proxycluster-*", 2, progress=lambda *args: events.append(args)
+        )
+        # Proxy clusters cannot be scaled so we expect a per-cluster error
+        assert isinstance(results["proxycluster-8786"], TypeError)
+        assert events[0][0] == "proxycluster-8786"
+        assert events[0][2:] == (1, 1)
+
+        assert delete_clusters("proxycluster-*", labels={"team": "foo"}) == {}
+
+
+def test_bulk_operations_labels(labelled_spec_path):
+    with create_cluster(labelled_spec_path) as cluster:
+        assert cluster._cluster_info["labels"] == {"team": "data"}
+        assert scale_clusters("proxycluster-*", 2, labels={"team": "foo"}) == {}
+
+        events = []
+        results = scale_clusters(
+            "proxycluster-*",
+            2,
+            labels={"team": "data"},
+            progress=lambda *args: events.append(args),
+        )
+        assert isinstance(results["proxycluster-8786"], TypeError)
+        assert events[0][2:] == (1, 1)
+
+
+def test_wait_for_workers():
+    with LocalCluster(n_workers=2, scheduler_port=8786) as cluster:
+        counts = []
+        assert wait_for_workers(cluster, 2, callback=counts.append) == 2
+        assert counts == [2]
+
+        assert wait_for_workers("proxycluster-8786", 2) == 2
+
+        with pytest.raises(TimeoutError, match="3 workers"):
+            wait_for_workers(cluster, 3, timeout=0.5)
+
+
+def test_wait_for_workers_keeps_scheduler_info_updating():
+    with LocalCluster(n_workers=1, dashboard_address=None) as cluster:
+        wait_for_workers(cluster, 1, timeout=10)
+        cluster.scale(3)
+        wait_for_workers(cluster, 3, timeout=30)
+
+        # The manager still receives worker updates after waiting
+        deadline = time.monotonic() + 10
+        while len(cluster.scheduler_info["workers"]) < 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_workers_async():
+    async with LocalCluster(n_workers=1, asynchronous=True) as cluster:
+        cluster.scale(2)
+        assert await wait_for_workers(cluster, 2, timeout=30, asynchronous=True) == 2
+
+
+def test_scale_cluster_ramp():
+    with LocalCluster(n_workers=1, threads_per_worker=1) as cluster:
+        counts = []
+        scale_cluster(cluster, 3, step=1, timeout=30, callback=counts.append)
+        assert len(cluster.scheduler.workers) == 3
+        assert 2 in counts and counts[-1] == 3
+
+
+def test_scale_cluster_ramp_default_timeout():
+    with LocalCluster(n_workers=1, processes=False, dashboard_address=None) as cluster:
+        with dask.config.set({"ctl.scale.step-timeout": "1ms"}):
+            with pytest.raises(TimeoutError):
+                scale_cluster(cluster, 3, step=2)
+
+
+def test_delete_cluster_drain():
+    with LocalCluster(n_workers=2, threads_per_worker=1) as cluster:
+        with Client(cluster.scheduler_address) as client:
+            statuses = []
+            future = client.submit(time.sleep, 1)
+            future.add_done_callback(lambda f: statuses.append(f.status))
+            while not any(client.processing().values()):
+                time.sleep(0.01)
+            delete_cluster(cluster, drain=True, timeout=30, batch_size=1)
+            assert statuses[0] == "finished"
+        assert cluster.status.name == "closed"
+
+
+def test_delete_cluster_drain_stops_submissions():
+    with LocalCluster(
+        n_workers=1, threads_per_worker=1, processes=False, dashboard_address=None
+    ) as cluster:
+        with Client(cluster) as client:
+            futures = []
+            stop = threading.Event()
+
+            def _submit():
+                # Keeps submitting until the cluster has closed
+                while not stop.is_set():
+                    with suppress(Exception):
+                        futures.append(client.submit(time.sleep, 0.2, pure=False))
+                    time.sleep(0.05)
+
+            thread = threading.Thread(target=_submit, daemon=True)
+            thread.start()
+            try:
+                while not any(client.processing().values()):
+                    time.sleep(0.01)
+                start = time.monotonic()
+                delete_cluster(cluster, drain=True, timeout=30)
+                assert time.monotonic() - start < 10
+            finally:
+                stop.set()
+                thread.join()
+        assert cluster.status.name == "closed"
+
+
+def test_delete_cluster_drain_timeout():
+    with LocalCluster(n_workers=1, threads_per_worker=1) as cluster:
+        with Client(cluster.scheduler_address) as client:
+            future = client.submit(time.sleep, 60)  # noqa: F841
+            while not any(client.processing().values()):
+                time.sleep(0.01)
+            start = time.monotonic()
+            delete_cluster(cluster, drain=True, timeout=1)
+            assert time.monotonic() - start < 30
+        assert cluster.status.name == "closed"
+
+
+def test_temporary_cluster(threaded_spec_path):
+    with pytest.raises(ValueError, match="boom"):
+        with temporary_cluster(threaded_spec_path, wait_for_workers=2) as cluster:
+            assert len(cluster.scheduler.workers) == 2
+            raise ValueError("boom")
+    assert cluster.status.name == "closed"
+    assert cluster.scheduler.status.name == "closed"
+
+
+@pytest.mark.asyncio
+async def test_temporary_cluster_async(threaded_spec_path):
+    # Also available from the top level package
+    assert dask_ctl.temporary_cluster is temporary_cluster
+
+    async with temporary_cluster(threaded_spec_path, wait_for_workers=2) as cluster:
+        assert cluster.asynchronous
+        assert len(cluster.scheduler.workers) == 2
+    assert cluster.status.name == "closed"
+
+    async def _use_cluster(started):
+        async with temporary_cluster(threaded_spec_path) as cluster:
+            started.set_result(cluster)
+            await asyncio.sleep(60)
+
+    started = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(_use_cluster(started))
+    cluster = await started
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cluster.status.name == "closed"
+
+
+@pytest.mark.asyncio
+async def test_temporary_cluster_cancelled_while_closing(threaded_spec_path):
+    async def _use_cluster(started):
+        async with temporary_cluster(threaded_spec_path, drain=False) as cluster:
+            started.set_result(cluster)
+            await asyncio.sleep(60)
+
+    started = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(_use_cluster(started))
+    cluster = await started
+    # Cancel again while the cluster is closing, the close still finishes first
+    task.cancel()
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cluster.status.name == "closed"
+
+
+@pytest.mark.asyncio
+async def test_temporary_cluster_local_fallback(tmp_path):
+    async with temporary_cluster(
+        str(tmp_path / "missing.yaml"), local_fallback=True, drain=False
+    ) as cluster:
+        assert isinstance(cluster, LocalCluster)
+        assert cluster.asynchronous
+    assert cluster.status.name == "closed"
@@ -0,0 +1,120 @@
+import json
+import random
+import time
+
+import dask.config
+
+from dask_ctl.names import (
+    NameIndex,
+    NameRecorder,
+    forget_names,
+    load_name_index,
+    update_name_index,
+    use_name,
+)
+
+HOUR = 60 * 60
+
+
+def is_subsequence(incomplete, name):
+    characters = iter(name)
+    return all(c in characters for c in incomplete)
+
+
+def test_search_ranks_prefix_then_substring_then_subsequence():
+    index = NameIndex()
+    index.update(
+        [
+            ("proxycluster", "ml-train"),
+            ("proxycluster", "team-ml"),
+            ("proxycluster", "mail-relay"),
+            ("proxycluster", "etl"),
+        ]
+    )
+    assert index.search("ml") == ["ml-train", "team-ml", "mail-relay"]
+    assert index.search("ml", limit=1) == ["ml-train"]
+    assert index.search("") == ["etl", "mail-relay", "ml-train", "team-ml"]
+    assert index.search("xyz") == []
+
+
+def test_search_ranks_by_usage_and_recency():
+    now = time.time()
+    index = NameIndex()
+    index.update([("kube", "etl-a"), ("kube", "etl-b"), ("kube", "etl-c")], now=now)
+    assert index.search("etl", now=now) == ["etl-a", "etl-b", "etl-c"]
+
+    index.use("etl-c", now=now)
+    assert index.search("etl", now=now) == ["etl-c", "etl-a", "etl-b"]
+
+    # Names last seen long ago drop below recently discovered ones
+    index.update([("kube", "etl-b")], now=now + 2 * HOUR)
+    assert index.search("etl", now=now + 2 * HOUR) == ["etl-b", "etl-c", "etl-a"]
+
+
+def test_update_removes_names_from_complete_discovery():
+    index = NameIndex()
+    index.update([("kube", "a"), ("kube", "b"), ("gateway", "c")])
+    index.use("b")
+
+    # Only names from discovery methods which completed are known to be gone
+    index.update([("kube", "b")], complete=["kube"])
+    assert index.names == ["b", "c"]
+    assert index.entries["b"][3] == 1
+
+    assert not index.use("a")
+
+    assert index.remove("b")
+    assert not index.remove("b")
+    assert index.names == ["c"]
+
+
+def test_index_persisted(cache_directory):
+    assert load_name_index().entries == {}
+    assert load_name_index().is_stale("1 minute")
+
+    update_name_index([("kube", "a"), ("kube", "b")], complete=["kube"])
+    use_name("b")
+    use_name("missing")
+    index = load_name_index()
+    assert index.names == ["a", "b"]
+    assert index.search("") == ["b", "a"]
+    assert index.entries["b"][3] == 1
+    # Only a discovery which asked every method makes the index fresh
+    assert index.is_stale("1 minute")
+
+    # Names are saved as JSON
+    with open(cache_directory / "names.json") as fh:
+        assert json.load(fh)["names"] == "a\nb"
+
+    names = NameRecorder()
+    names.save(refreshed=True)
+    assert load_name_index().is_stale("1 minute")
+    names([("kube", "b"), ("kube", "c")], ["kube"])
+    names.save(refreshed=True)
+    index = load_name_index()
+    assert index.names == ["b", "c"]
+    assert not index.is_stale("1 minute")
+
+    forget_names(["b", "missing"])
+    assert load_name_index().names == ["c"]
+
+    with dask.config.set({"ctl.completion.index": False}):
+        update_name_index([("kube", "d")], complete=["kube"])
+        assert load_name_index().entries == {}
+    assert load_name_index().names == ["c"]
+
+
+def test_search_large_index():
+    random.seed(0)
+    teams = ["ml", "data", "etl", "research", "platform", "analytics"]
+    names = {
+        f"{random.choice(teams)}-{random.choice(teams)}-{random.randint(0, 99999):05d}"
+        for _ in range(10000)
+    }
+    update_name_index([("kube", name) for name in names], complete=["kube"])
+    index = load_name_index()
+    assert len(index.entries) == len(names)
+    for incomplete in ["ml-etl", "mdt9", "zzz"]:
+        assert sorted(index.search(incomplete)) == sorted(
+            name for name in names if is_subsequence(incomplete, name)
+        )
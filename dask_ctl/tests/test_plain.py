@@ -0,0 +1,41 @@
+import io
+
+import dask.config
+
+from dask_ctl.plain import PlainTable, use_plain, write_plain
+
+
+def test_write_plain():
+    output = io.StringIO()
+    write_plain(["Name", "Workers"], [["a", 1], ["longer-name", 10]], output)
+    assert output.getvalue().splitlines() == [
+        "NAME         WORKERS",
+        "a            1",
+        "longer-name  10",
+    ]
+
+    # Empty tables still have a header
+    output = io.StringIO()
+    write_plain(["Name", "Workers"], [], output)
+    assert output.getvalue() == "NAME  WORKERS\n"
+
+
+def test_plain_table_truncates():
+    output = io.StringIO()
+    table = PlainTable(["Name", "Status"], {"Name": 6}, output)
+    table.write(["a-long-name", "running-for-a-long-time"])
+    assert output.getvalue().splitlines()[1] == "a-lon…  running-for-a-long-time"
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_use_plain():
+    assert use_plain(file=io.StringIO())
+    assert not use_plain(file=Terminal())
+    assert use_plain(plain=True, file=Terminal())
+    with dask.config.set({"ctl.table.plain-threshold": 10}):
+        assert not use_plain(rows=10, file=Terminal())
+        assert use_plain(rows=11, file=Terminal())
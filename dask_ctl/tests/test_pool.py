@@ -0,0 +1,48 @@
+import time
+
+from dask_ctl.lifecycle import create_cluster
+from dask_ctl.pool import ClusterPool
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+
+
+def test_pool_hands_out_standby(local_spec_path):
+    with ClusterPool(local_spec_path, size=1) as pool:
+        wait_for(lambda: len(pool) == 1)
+        _, standby = pool._standby[0]
+
+        cluster = create_cluster(local_spec_path)
+        assert cluster is standby
+        wait_for(lambda: len(pool) == 1)
+        cluster.close()
+
+
+def test_pool_reaps_idle_standbys(local_spec_path):
+    with ClusterPool(local_spec_path, size=1, ttl=3) as pool:
+        wait_for(lambda: len(pool) == 1)
+        _, standby = pool._standby[0]
+
+        # Once the pool has been idle for the ttl the standby is closed and not replaced
+        wait_for(lambda: pool._idle() and len(pool) == 0)
+        wait_for(lambda: standby.status.name == "closed")
+        time.sleep(1.5)
+        assert len(pool) == 0
+
+
+def test_pool_replaces_old_standbys(local_spec_path):
+    with ClusterPool(local_spec_path, size=1, ttl=3) as pool:
+        wait_for(lambda: len(pool) == 1)
+        _, standby = pool._standby[0]
+
+        # Standbys are replaced by age even while the pool keeps being used
+        def replaced():
+            pool._last_used = time.monotonic()
+            return len(pool) == 1 and pool._standby[0][1] is not standby
+
+        wait_for(replaced)
+        assert standby.status.name == "closed"
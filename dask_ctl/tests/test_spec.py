@@ -0,0 +1,225 @@
+import os
+
+import pytest
+
+import dask.config
+
+from dask_ctl import spec
+from dask_ctl.exceptions import DaskClusterSpecInvalid
+from dask_ctl.spec import (
+    load_spec,
+    load_specs,
+    spec_hash,
+    warm_module,
+)
+
+
+def test_load_spec(simple_spec_path):
+    assert load_spec(simple_spec_path) == ("dask.distributed", "LocalCluster", [], {})
+    assert list(load_specs(simple_spec_path)) == ["simple"]
+
+
+def test_load_specs_multi_document(tmp_path):
+    spec_path = tmp_path / "nightly.yaml"
+    spec_path.write_text(
+        "version: 1\nmodule: dask.distributed\nclass: LocalCluster\n"
+        "---\n"
+        "version: 1\nname: big\nmodule: dask.distributed\nclass: LocalCluster\n"
+        "kwargs:\n  n_workers: 4\n"
+    )
+    specs = load_specs(str(spec_path))
+    assert list(specs) == ["nightly-0", "big"]
+    assert specs["big"][3] == {"n_workers": 4}
+
+    with pytest.raises(ValueError, match="2 cluster specs"):
+        load_spec(str(spec_path))
+
+
+def test_load_specs_clusters_list(multi_spec_path):
+    specs = load_specs(multi_spec_path)
+    assert list(specs) == ["small", "large"]
+    assert specs["large"][:2] == ("dask.distributed", "LocalCluster")
+
+
+def test_load_spec_labels(labelled_spec_path):
+    cluster_spec = load_spec(labelled_spec_path)
+    assert cluster_spec.labels == {"team": "data"}
+    assert spec_hash(*cluster_spec, cluster_spec.labels) != spec_hash(*cluster_spec)
+
+
+def test_spec_hash():
+    a = spec_hash("dask.distributed", "LocalCluster", [], {"n-workers": 2, "foo": 1})
+    b = spec_hash("dask.distributed", "LocalCluster", [], {"foo": 1, "n_workers": 2})
+    c = spec_hash("dask.distributed", "LocalCluster", [], {"n_workers": 3})
+    assert a == b
+    assert a != c
+
+
+def test_load_specs_cached(tmp_path, monkeypatch):
+    spec_path = tmp_path / "cached.yaml"
+    spec_path.write_text("version: 1\nmodule: dask.distributed\nclass: LocalCluster\n")
+
+    parsed = []
+    parse_documents = spec._parse_documents
+    monkeypatch.setattr(
+        spec, "_parse_documents", lambda p: parsed.append(p) or parse_documents(p)
+    )
+
+    with dask.config.set({"ctl.spec-cache.directory": str(tmp_path / "cache")}):
+        first = load_specs(str(spec_path))
+        first["cached"][3]["mutated"] = True
+        assert load_specs(str(spec_path))["cached"][3] == {}
+        assert len(parsed) == 1
+
+        # Modifying the file invalidates the cache
+        spec_path.write_text(
+            "version: 1\nmodule: dask.distributed\nclass: LocalCluster\n"
+            "kwargs:\n  n_workers: 1\n"
+        )
+        os.utime(spec_path, ns=(0, 0))
+        assert load_specs(str(spec_path))["cached"][3] == {"n_workers": 1}
+        assert len(parsed) == 2
+
+        # A fresh process is served from the on disk cache
+        spec._spec_cache.clear()
+        assert load_specs(str(spec_path))["cached"][3] == {"n_workers": 1}
+        assert len(parsed) == 2
+        assert all(p.suffix == ".json" for p in (tmp_path / "cache").iterdir())
+
+
+def test_disk_cache_bounded(tmp_path):
+    cache = tmp_path / "cache"
+    with dask.config.set(
+        {"ctl.spec-cache.directory": str(cache), "ctl.spec-cache.size": 2}
+    ):
+        for i in range(4):
+            spec_path = tmp_path / f"spec-{i}.yaml"
+            spec_path.write_text(
+                "version: 1\nmodule: dask.distributed\nclass: LocalCluster\n"
+            )
+            load_specs(str(spec_path))
+        assert len(os.listdir(cache)) == 2
+
+
+def test_disk_cache_skips_values_json_changes(tmp_path, cache_directory):
+    spec_path = tmp_path / "dated.yaml"
+    spec_path.write_text(
+        "version: 1\nmodule: dask.distributed\nclass: LocalCluster\n"
+        "kwargs:\n  created: 2022-01-01\n"
+    )
+    load_specs(str(spec_path))
+    spec._spec_cache.clear()
+    assert str(load_specs(str(spec_path))["dated"][3]["created"]) == "2022-01-01"
+    assert not (cache_directory / "specs").exists()
+
+
+def test_load_v2_spec(tmp_path, monkeypatch):
+    (tmp_path / "base.yaml").write_text(
+        "version: 2\n"
+        "module: dask.distributed\n"
+        "class: LocalCluster\n"
+        "variables:\n"
+        "  workers: 2\n"
+        "kwargs:\n"
+        "  n_workers: ${workers}\n"
+        "  memory_limit: ${MEMORY:-1GB}\n"
+        "  name: cluster-${TEAM}\n"
+        "environments:\n"
+        "  prod:\n"
+        "    variables:\n"
+        "      workers: 10\n"
+    )
+    spec_path = tmp_path / "child.yaml"
+    spec_path.write_text(
+        "version: 2\n"
+        "base: base.yaml\n"
+        "kwargs:\n"
+        "  threads_per_worker: 1\n"
+        "environments:\n"
+        "  prod:\n"
+        "    kwargs:\n"
+        "      threads_per_worker: 4\n"
+    )
+    monkeypatch.setenv("TEAM", "data")
+
+    cm_module, cm_class, args, kwargs = load_spec(str(spec_path))
+    assert (cm_module, cm_class, args) == ("dask.distributed", "LocalCluster", [])
+    assert kwargs == {
+        "n_workers": 2,
+        "memory_limit": "1GB",
+        "name": "cluster-data",
+        "threads_per_worker": 1,
+    }
+
+    with dask.config.set({"ctl.environment": "prod"}):
+        *_, kwargs = load_spec(str(spec_path))
+    assert kwargs["n_workers"] == 10
+    assert kwargs["threads_per_worker"] == 4
+
+
+def test_invalid_specs(tmp_path):
+    spec_path = tmp_path / "invalid.yaml"
+
+    spec_path.write_text("version: 1\nmodule: dask.distributed\n")
+    with pytest.raises(DaskClusterSpecInvalid, match="missing key 'class'"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text("module: dask.distributed\nclass: C\n")
+    with pytest.raises(DaskClusterSpecInvalid, match="missing key 'version'"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text("version: 3\nmodule: dask.distributed\nclass: C\n")
+    with pytest.raises(DaskClusterSpecInvalid, match="unsupported 'version' 3"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text("clusters:\n  - module: dask.distributed\n    class: C\n")
+    with pytest.raises(DaskClusterSpecInvalid, match="missing key 'version'"):
+        load_specs(str(spec_path))
+
+    # Version 1 specs may hold other keys
+    spec_path.write_text("version: 1\nmodule: dask.distributed\nclass: C\nfoo: bar\n")
+    assert load_spec(str(spec_path))[:2] == ("dask.distributed", "C")
+
+    # Environments are validated even when they are not selected
+    spec_path.write_text(
+        "version: 2\nmodule: dask.distributed\nclass: C\n"
+        "environments:\n  prod:\n    kwrags: {}\n"
+    )
+    with pytest.raises(DaskClusterSpecInvalid, match="'prod'.*unknown key 'kwrags'"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text(
+        "version: 2\nmodule: doesnotexist\nclass: Foo\nkwargs: []\nfoo: bar\n"
+    )
+    with pytest.raises(DaskClusterSpecInvalid, match="unknown key 'foo'.*kwargs"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text(
+        "version: 2\nmodule: doesnotexist\nclass: Foo\nargs: ['${UNDEFINED}']\n"
+    )
+    with pytest.raises(DaskClusterSpecInvalid, match="UNDEFINED"):
+        load_spec(str(spec_path))
+
+    spec_path.write_text("version: 2\nbase: invalid.yaml\n")
+    with pytest.raises(DaskClusterSpecInvalid, match="Circular"):
+        load_spec(str(spec_path))
+
+
+def test_warm_module(tmp_path, monkeypatch):
+    package = tmp_path / "warm_package"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "other.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    warm_module("warm_package")
+    assert any(p.name.startswith("other.") for p in (package / "__pycache__").iterdir())
+
+    # Modules which re-export a class warm the package that defines it
+    (tmp_path / "reexport.py").write_text("from warm_package.other import Cluster\n")
+    (package / "other.py").write_text("class Cluster:\n    pass\n")
+    (package / "unused.py").write_text("")
+    warm_module("reexport", "Cluster")
+    assert any(
+        p.name.startswith("unused.") for p in (package / "__pycache__").iterdir()
+    )
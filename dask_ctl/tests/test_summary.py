@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+import dask.config
+from dask.distributed import LocalCluster
+
+from dask_ctl import formats
+from dask_ctl.summary import STAT_FIELDS, get_summary, summarize_workers
+from dask_ctl.utils import _unsupported
+
+
+def test_summarize_workers():
+    workers = [
+        {
+            "nthreads": 1,
+            "memory_limit": 100,
+            "metrics": {
+                "cpu": 10.0,
+                "memory": memory,
+                "task_counts": {"executing": 1, "ready": 1},
+            },
+        }
+        for memory in range(1, 21)
+    ]
+    # Two workers with a backlog of queued tasks
+    workers[0]["metrics"]["task_counts"]["ready"] = 5
+    workers[1]["metrics"]["task_counts"]["constrained"] = 2
+    summary = summarize_workers(workers)
+    assert summary["workers"] == 20
+    assert summary["memory"] == 210
+    assert summary["memory_min"] == 1
+    assert summary["memory_median"] == 10.5
+    assert summary["memory_p95"] == pytest.approx(19.05)
+    assert summary["memory_max"] == 20
+    assert summary["cpu_max"] == 10
+    assert summary["processing_median"] == 1
+    assert summary["stragglers"] == 2
+    assert summarize_workers(workers, straggler_factor=4)["stragglers"] == 1
+
+    empty = summarize_workers([])
+    assert empty["workers"] == 0
+    assert all(empty[field] == 0 for field in STAT_FIELDS)
+
+
+@pytest.mark.asyncio
+async def test_get_summary():
+    async with LocalCluster(
+        n_workers=2,
+        threads_per_worker=2,
+        processes=False,
+        dashboard_address=None,
+        asynchronous=True,
+    ) as cluster:
+        summary = await get_summary(cluster.scheduler_comm)
+        assert summary["workers"] == 2
+        assert summary["threads"] == 4
+        assert set(STAT_FIELDS) <= set(summary)
+        assert summary["memory_limit"] == sum(
+            w["memory_limit"] for w in cluster.scheduler_info["workers"].values()
+        )
+        key = (cluster.scheduler_comm.address, "scheduler_summary")
+        assert key not in _unsupported
+
+        # Falls back to summarising the identity when the scheduler refuses to run it
+        with dask.config.set({"distributed.scheduler.pickle": False}):
+            fallback = await get_summary(cluster.scheduler_comm)
+        assert key in _unsupported
+        assert fallback["threads"] == summary["threads"]
+        assert fallback["memory_limit"] == summary["memory_limit"]
+
+
+@pytest.mark.asyncio
+async def test_discover_cluster_summaries_concurrently(monkeypatch):
+    async def discover_clusters(discovery=None, on_status=None, on_complete=None):
+        for name in ["slow", "fast", "broken"]:
+            yield "test", name
+
+    running = []
+
+    async def get_cluster_summary(cluster):
+        running.append(cluster)
+        await asyncio.sleep({"slow": 0.2, "fast": 0.1, "broken": 0}[cluster])
+        if cluster == "broken":
+            raise OSError("unreachable")
+        # All summaries were requested before the first one finished
+        assert len(running) == 3
+        return {"workers": len(cluster)}
+
+    monkeypatch.setattr(formats, "discover_clusters_concurrently", discover_clusters)
+    monkeypatch.setattr(formats, "get_cluster_summary", get_cluster_summary)
+    results = [r async for r in formats.discover_cluster_summaries()]
+    assert results == [
+        ("test", "broken", None),
+        ("test", "fast", {"workers": 4}),
+        ("test", "slow", {"workers": 4}),
+    ]
+
+    results = [r async for r in formats.discover_cluster_summaries(summarize=False)]
+    assert [summary for *_, summary in results] == [None] * 3
+    assert len(running) == 3
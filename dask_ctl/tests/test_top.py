@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from dask.distributed import LocalCluster
+
+from dask_ctl.summary import summarize_workers
+from dask_ctl.top import UsageWatcher, format_usage_plain, sort_records, usage_record
+
+
+def test_usage_record():
+    worker = {
+        "nthreads": 2,
+        "memory_limit": 1000,
+        "metrics": {
+            "cpu": 50.0,
+            "memory": 250,
+            "task_counts": {"executing": 2, "long-running": 1, "ready": 3},
+            "host_net_io": {"read_bps": 10, "write_bps": 5},
+            "spilled_bytes": {"memory": 7, "disk": 100},
+        },
+    }
+    record = usage_record("test", "proxycluster", summarize_workers([worker, worker]))
+    assert record["workers"] == 2
+    assert record["threads"] == 4
+    assert record["cpu"] == 100
+    assert record["memory"] == 500
+    assert record["memory_limit"] == 2000
+    assert record["processing"] == 6
+    assert record["queued"] == 6
+    assert record["network"] == 30
+    assert record["spilled"] == 200
+
+    idle = usage_record("idle", "proxycluster", summarize_workers([]))
+    assert [r["name"] for r in sort_records([idle, record], "cpu")] == ["test", "idle"]
+    assert [r["name"] for r in sort_records([record, idle], "cpu", False)] == [
+        "idle",
+        "test",
+    ]
+    header, *rows = format_usage_plain([record, idle]).splitlines()
+    assert header.split()[:3] == ["NAME", "DISCOVERY", "WORKERS"]
+    assert "500 B / 1.95 kiB (25%)" in rows[0]
+
+    header, row, _ = format_usage_plain(
+        [record, idle], ["name", "memory_p95", "stragglers"]
+    ).splitlines()
+    assert header.split() == ["NAME", "MEMORY_P95", "STRAGGLERS"]
+    assert row.split() == ["test", "250", "B", "0"]
+
+
+@pytest.mark.asyncio
+async def test_usage_watcher():
+    async with LocalCluster(
+        scheduler_port=8786,
+        n_workers=2,
+        threads_per_worker=1,
+        processes=False,
+        dashboard_address=None,
+        asynchronous=True,
+    ):
+        async with UsageWatcher(interval=0.05) as watcher:
+            changed, _ = await watcher.watch().__anext__()
+            [record] = changed
+            assert record["workers"] == 2
+            assert record["threads"] == 2
+            assert record["memory_limit"] > 0
+
+
+@pytest.mark.asyncio
+async def test_tui():
+    pytest.importorskip("textual")
+    from textual.widgets import DataTable
+
+    from dask_ctl.tui import DaskCtlTUI
+
+    async with LocalCluster(
+        scheduler_port=8786,
+        n_workers=2,
+        processes=False,
+        dashboard_address=None,
+        asynchronous=True,
+    ):
+        app = DaskCtlTUI(interval=0.05, columns=["name", "workers"])
+        async with app.run_test() as pilot:
+            table = app.query_one(DataTable)
+            while not table.row_count:
+                await asyncio.sleep(0.05)
+            [[name, workers]] = app.rows()
+            assert workers == "2"
+            assert [*table.data.values()] == [[name, workers]]
+
+            await pilot.press("w")
+            assert (app.sort, app.ascending) == ("workers", False)
+            await pilot.press("w")
+            assert app.ascending
+        assert not app.watcher.clusters
@@ -0,0 +1,34 @@
+import pytest
+
+from dask.distributed import LocalCluster
+
+from dask_ctl.watch import ClusterWatcher
+
+
+@pytest.mark.asyncio
+async def test_cluster_watcher():
+    async with LocalCluster(
+        scheduler_port=8786,
+        n_workers=1,
+        processes=False,
+        dashboard_address=None,
+        asynchronous=True,
+    ) as cluster:
+        async with ClusterWatcher(interval=0.05) as watcher:
+            updates = watcher.watch()
+            changed, removed = await updates.__anext__()
+            assert [r["workers"] for r in changed] == [1]
+            assert removed == []
+            [manager] = watcher.clusters.values()
+
+            # Nothing is reported until something changes
+            assert watcher.poll() == []
+
+            await cluster.scale(2)
+            changed, _ = await updates.__anext__()
+            assert [r["workers"] for r in changed] == [2]
+
+            # Rediscovering reuses the existing manager
+            assert await watcher.discover() == []
+            assert list(watcher.clusters.values()) == [manager]
+        assert not watcher.clusters
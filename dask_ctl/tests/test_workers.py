@@ -0,0 +1,92 @@
+import pytest
+
+from dask.distributed import LocalCluster
+
+from dask_ctl.workers import iter_workers, parse_filter, select_page, select_workers
+
+
+def test_select_workers():
+    workers = {
+        f"tcp://10.0.0.{i}:1234": {
+            "name": i,
+            "nthreads": 2,
+            "memory_limit": 1000,
+            "last_seen": 95,
+            "metrics": {"cpu": 10.0 * i, "memory": 100 * i},
+        }
+        for i in range(10)
+    }
+    page = select_workers(workers, sort="memory", limit=3, now=100)
+    assert page["total"] == 10
+    assert [w["name"] for w in page["workers"]] == [9, 8, 7]
+    assert page["workers"][0]["last_seen"] == 5
+
+    page = select_workers(workers, sort="memory", offset=3, limit=3, ascending=True)
+    assert [w["name"] for w in page["workers"]] == [3, 4, 5]
+
+    filters = [parse_filter("memory>=50%"), parse_filter("cpu<80")]
+    page = select_workers(workers, filters=filters)
+    assert page["total"] == 3
+    assert [w["name"] for w in page["workers"]] == [5, 6, 7]
+
+
+def test_select_page():
+    workers = {
+        f"tcp://10.0.0.{i}:1234": {"name": i, "metrics": {"memory": 100 * i}}
+        for i in range(5)
+    }
+    selections = []
+
+    def details(addresses):
+        if addresses is None:
+            selections.append(len(workers))
+            return workers
+        return {a: workers[a] for a in addresses if a in workers}
+
+    page = select_page(details, sort="memory", limit=2)
+    assert [w["name"] for w in page["workers"]] == [4, 3]
+    assert page["total"] == 5
+
+    # Later pages follow the listing and skip workers which have left
+    del workers["tcp://10.0.0.2:1234"]
+    page = select_page(details, page["listing"], limit=2)
+    assert [w["name"] for w in page["workers"]] == [1]
+    assert page["total"] == 5
+    page = select_page(details, page["listing"], limit=2)
+    assert [w["name"] for w in page["workers"]] == [0]
+    assert page["listing"] is None
+    assert selections == [5]
+
+    # The listing stops at the end
+    page = select_page(details, sort="memory", limit=2, end=3)
+    assert page["listing"] == [4, ["tcp://10.0.0.1:1234"]]
+    page = select_page(details, sort="memory", limit=3, end=3)
+    assert page["listing"] is None
+
+
+def test_parse_filter():
+    assert parse_filter("memory>80%") == ("memory_percent", ">", 80)
+    assert parse_filter("memory < 1kiB") == ("memory", "<", 1024)
+    assert parse_filter("queued==0") == ("queued", "==", 0)
+    for expression in ["memory", "address>1", "cpu>lots"]:
+        with pytest.raises(ValueError):
+            parse_filter(expression)
+
+
+def test_iter_workers():
+    with LocalCluster(
+        n_workers=5, threads_per_worker=1, processes=False, dashboard_address=None
+    ) as cluster:
+        pages = list(iter_workers(cluster, sort="nthreads", page_size=2))
+        assert [len(page) for page, _ in pages] == [2, 2, 1]
+        assert {total for _, total in pages} == {5}
+        assert len({w["address"] for page, _ in pages for w in page}) == 5
+
+        pages = list(iter_workers(cluster, top=3, page_size=2))
+        assert [len(page) for page, _ in pages] == [2, 1]
+        assert {total for _, total in pages} == {5}
+
+        extensions = set(cluster.scheduler.extensions)
+        next(iter_workers(cluster, sort="memory", top=1, page_size=2))
+        # Nothing is left on the scheduler
+        assert set(cluster.scheduler.extensions) == extensions
@@ -0,0 +1,112 @@
+from typing import List
+
+from dask.utils import format_bytes
+
+from .plain import format_plain
+from .summary import STAT_FIELDS
+from .watch import ClusterWatcher
+
+#: Fields of each usage record, in display order
+USAGE_FIELDS = (
+    "name",
+    "discovery",
+    "workers",
+    "threads",
+    "cpu",
+    "memory",
+    "memory_limit",
+    "processing",
+    "queued",
+    "network",
+    "spilled",
+    *STAT_FIELDS,
+)
+
+#: Columns shown by ``dask cluster top`` by default, memory is shown against the limit
+USAGE_COLUMNS = (
+    "name",
+    "discovery",
+    "workers",
+    "threads",
+    "cpu",
+    "memory",
+    "processing",
+    "queued",
+    "network",
+    "spilled",
+)
+
+
+def usage_record(name: str, discovery_method: str, summary: dict) -> dict:
+    """Usage record of a cluster from its :func:`dask_ctl.summary.get_summary`."""
+    record = dict.fromkeys(USAGE_FIELDS, 0)
+    record.update(summary)
+    record.update(name=name, discovery=discovery_method)
+    return record
+
+
+def sort_records(records: List[dict], column: str, reverse: bool = True) -> List[dict]:
+    """Sort usage records by a column, largest first by default, then by name."""
+    records = sorted(records, key=lambda r: (r["discovery"], r["name"]))
+    return sorted(records, key=lambda r: r[column], reverse=reverse)
+
+
+def format_stat(field: str, value) -> str:
+    """Format one of the worker statistics in :data:`dask_ctl.summary.STAT_FIELDS`."""
+    if field.startswith("memory_"):
+        return format_bytes(int(value))
+    if field.startswith("cpu_"):
+        return f"{value:.0f}%"
+    return f"{value:g}"
+
+
+def format_usage(record: dict, columns=USAGE_COLUMNS) -> dict:
+    """Format the values of a usage record for display."""
+    limit = record["memory_limit"]
+    formatted = {
+        "name": record["name"],
+        "discovery": record["discovery"],
+        "workers": str(record["workers"]),
+        "threads": str(record["threads"]),
+        "cpu": f"{record['cpu']:.0f}%",
+        "memory": f"{format_bytes(record['memory'])} / {format_bytes(limit)}"
+        + (f" ({record['memory'] / limit:.0%})" if limit else ""),
+        "processing": str(record["processing"]),
+        "queued": str(record["queued"]),
+        "network": f"{format_bytes(record['network'])}/s",
+        "spilled": format_bytes(record["spilled"]),
+        "memory_limit": format_bytes(limit),
+        **{field: format_stat(field, record[field]) for field in STAT_FIELDS},
+    }
+    return {column: formatted[column] for column in columns}
+
+
+def format_usage_plain(records: List[dict], columns=USAGE_COLUMNS) -> str:
+    """Render usage records as a plain fixed width text table."""
+    return format_plain(
+        columns, [format_usage(record, columns).values() for record in records]
+    )
+
+
+class UsageWatcher(ClusterWatcher):
+    """Watch resource usage across all discovered clusters.
+
+    Each refresh makes a single request to each scheduler, all clusters concurrently,
+    which returns the totals of the worker metrics computed on the scheduler. See
+    :class:`dask_ctl.watch.ClusterWatcher` for the parameters.
+
+    Examples
+    --------
+    >>> async with UsageWatcher(interval="1s") as watcher:  # doctest: +SKIP
+    ...     async for _ in watcher.watch():
+    ...         print(sort_records(list(watcher.records.values()), "cpu"))
+
+    """
+
+    async def refresh(self) -> List[dict]:
+        changed = []
+        for key, summary in (await self.summaries()).items():
+            record = usage_record(self.clusters[key].name, key[0], summary)
+            if self._changed(key, record):
+                changed.append(record)
+        return changed
@@ -0,0 +1,110 @@
+"""Terminal UI for ``dask cluster top``, available with the ``tui`` extra.
+
+Install it with ``pip install dask-ctl[tui]``, without it ``dask cluster top``
+renders the same table with rich instead.
+
+"""
+import asyncio
+from typing import List
+
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable, Footer, Header
+
+from .top import USAGE_COLUMNS, UsageWatcher, format_usage, sort_records
+
+#: Key bindings which sort the table, as ``(key, column)``
+SORT_KEYS = (
+    ("c", "cpu"),
+    ("m", "memory"),
+    ("p", "processing"),
+    ("q", "queued"),
+    ("n", "network"),
+    ("s", "spilled"),
+    ("w", "workers"),
+    ("a", "name"),
+)
+
+
+class DaskCtlTUI(App):
+    """Live resource usage across all discovered clusters.
+
+    The keys in :data:`SORT_KEYS` sort the table by a column, pressing the same key
+    again reverses the order.
+
+    Parameters
+    ----------
+    discovery (optional)
+        Restrict discovery to this method.
+    interval (optional)
+        Time between updates, see :class:`dask_ctl.watch.ClusterWatcher`.
+    sort (optional)
+        Column to sort clusters by. Default ``cpu``.
+    ascending (optional)
+        Sort smallest first.
+    columns (optional)
+        Columns to show, see :data:`dask_ctl.top.USAGE_COLUMNS`.
+
+    Examples
+    --------
+    >>> DaskCtlTUI(sort="memory").run()  # doctest: +SKIP
+
+    """
+
+    TITLE = "dask cluster top"
+    BINDINGS = [
+        *((key, f"sort('{column}')", f"Sort by {column}") for key, column in SORT_KEYS),
+        ("ctrl+c", "quit", "Quit"),
+    ]
+
+    def __init__(
+        self,
+        discovery: str = None,
+        interval=None,
+        sort: str = "cpu",
+        ascending: bool = False,
+        columns=USAGE_COLUMNS,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.watcher = UsageWatcher(discovery=discovery, interval=interval)
+        self.sort = sort
+        self.ascending = ascending
+        self.columns = columns
+        self._watching = None
+
+    def compose(self) -> ComposeResult:
+        yield Header()
+        yield DataTable()
+        yield Footer()
+
+    def rows(self) -> List[List[str]]:
+        """The formatted values of each cluster, in display order."""
+        records = sort_records(
+            [*self.watcher.records.values()], self.sort, not self.ascending
+        )
+        return [[*format_usage(r, self.columns).values()] for r in records]
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns(*self.columns)
+        self._watching = asyncio.ensure_future(self._watch())
+
+    async def on_unmount(self):
+        if self._watching is not None:
+            self._watching.cancel()
+        self.watcher.close()
+
+    async def _watch(self):
+        async for _ in self.watcher.watch():
+            self._update()
+
+    def _update(self):
+        table = self.query_one(DataTable)
+        table.clear()
+        table.add_rows(self.rows())
+
+    def action_sort(self, column: str):
+        if column == self.sort:
+            self.ascending = not self.ascending
+        else:
+            self.sort, self.ascending = column, column == "name"
+        self._update()
@@ -1,13 +1,80 @@
 import asyncio
+from contextlib import contextmanager
+import signal
+import sys
+import threading
+from typing import Callable
 
+import cloudpickle
 from tornado.ioloop import IOLoop
 from distributed.cli.utils import install_signal_handlers
+from distributed.protocol.pickle import dumps
 
 
 loop = IOLoop.current()
 install_signal_handlers(loop)
 
 
+@contextmanager
+def interruptible():
+    """Raise ``KeyboardInterrupt`` on SIGINT within this block.
+
+    The handlers installed on ``loop`` only stop the loop once the current callback
+    returns, so blocking work such as starting a cluster could not otherwise be
+    interrupted and cleaned up.
+
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def pickle_by_value(module_name: str) -> None:
+    """Pickle the functions of a module by value so that they can run on a scheduler.
+
+    dask-ctl does not need to be installed where the scheduler runs, so functions sent
+    there from such a module must only use builtins, the standard library and NumPy,
+    imported inside the function so that importing the module stays cheap.
+
+    """
+    cloudpickle.register_pickle_by_value(sys.modules[module_name])
+
+
+# Functions schedulers refused to run, as ``(address, function)``, e.g because
+# ``distributed.scheduler.pickle`` is disabled, so they are not asked again
+_unsupported = set()
+
+
+async def run_on_scheduler(
+    scheduler_comm, function: Callable, fallback: Callable, **kwargs
+):
+    """Run a function on the scheduler, or ``fallback`` locally if it can't run there.
+
+    ``function`` is called on the scheduler with ``dask_scheduler`` and ``kwargs``, with
+    the ``run_function`` handler :meth:`distributed.Client.run_on_scheduler` uses.
+    If the scheduler can't run it ``fallback`` is called with the scheduler identity
+    instead, and that scheduler is not asked to run the function again.
+
+    """
+    key = (scheduler_comm.address, function.__qualname__)
+    if key not in _unsupported:
+        try:
+            response = await scheduler_comm.run_function(
+                function=dumps(function), args=dumps(()), kwargs=dumps(kwargs)
+            )
+        except Exception:
+            response = {"status": "error"}
+        if response["status"] == "OK":
+            return response["result"]
+        _unsupported.add(key)
+    return fallback(await scheduler_comm.identity())
+
+
 class _AsyncTimedIterator:
     __slots__ = ("_iterator", "_timeout", "_sentinel")
 
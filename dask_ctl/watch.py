@@ -0,0 +1,210 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Tuple
+
+import dask.config
+from dask.utils import parse_timedelta
+from distributed.deploy.cluster import Cluster
+
+from .cache import _release
+from .discovery import discover_cluster_names_concurrently
+from .formats import (
+    cluster_record,
+    name_record,
+    needs_cluster,
+    needs_summary,
+    parse_fields,
+)
+from .summary import get_cluster_summary
+
+from . import config  # noqa
+
+
+class ClusterWatcher:
+    """Keep cluster managers open and report when clusters change.
+
+    Cluster managers subscribe to worker events from their scheduler, so once a manager
+    is constructed its workers, threads and memory stay up to date without any further
+    requests. The watcher holds on to the managers between updates and compares a
+    record of each cluster with the last one it reported, so only clusters which have
+    changed are reported.
+
+    Names are rediscovered every ``rediscover_interval`` to pick up new clusters and
+    drop ones which have gone away, but managers are only constructed for new names.
+    If all of the ``fields`` are known from discovery no managers are constructed.
+
+    Parameters
+    ----------
+    discovery (optional)
+        Discovery method to use. Default is ``None`` which uses all discovery methods.
+    interval (optional)
+        Time between updates. Defaults to ``ctl.watch.interval``.
+    rediscover_interval (optional)
+        Time between rediscovering cluster names.
+        Defaults to ``ctl.watch.rediscover-interval``.
+    fields (optional)
+        Fields to include in each record, see :func:`dask_ctl.formats.parse_fields`.
+        The discovery method and name are always included.
+
+    Examples
+    --------
+    >>> async with ClusterWatcher() as watcher:  # doctest: +SKIP
+    ...     async for changed, removed in watcher.watch():
+    ...         print(changed)
+    [{'name': 'proxycluster-8786', 'workers': 4, ...}]
+
+    """
+
+    def __init__(
+        self,
+        discovery: str = None,
+        interval=None,
+        rediscover_interval=None,
+        fields=None,
+    ):
+        self.discovery = discovery
+        self.fields = tuple(dict.fromkeys(("discovery", "name", *parse_fields(fields))))
+        self.interval = parse_timedelta(
+            dask.config.get("ctl.watch.interval", override_with=interval)
+        )
+        self.rediscover_interval = parse_timedelta(
+            dask.config.get(
+                "ctl.watch.rediscover-interval", override_with=rediscover_interval
+            )
+        )
+        self.clusters: Dict[Tuple[str, str], Cluster] = {}
+        self.records: Dict[Tuple[str, str], dict] = {}
+        self._names: Dict[Tuple[str, str], dict] = {}
+        self._last_discovery = None
+
+    async def discover(self) -> List[dict]:
+        """Rediscover cluster names, constructing managers for new ones only.
+
+        Returns the last records of clusters which were not found again.
+
+        """
+        loop = asyncio.get_running_loop()
+        found = set()
+        constructing = {}
+        async for discovery_method, name, cluster_class in (
+            discover_cluster_names_concurrently(discovery=self.discovery)
+        ):
+            key = (discovery_method, name)
+            found.add(key)
+            if not needs_cluster(self.fields):
+                self._names[key] = name_record(
+                    name, discovery_method, cluster_class, self.fields
+                )
+            elif key not in self.clusters:
+                constructing[key] = loop.run_in_executor(
+                    None, cluster_class.from_name, name
+                )
+        for key, cluster in zip(
+            constructing,
+            await asyncio.gather(*constructing.values(), return_exceptions=True),
+        ):
+            if isinstance(cluster, Cluster):
+                self.clusters[key] = cluster
+            else:
+                found.discard(key)
+        self._last_discovery = time.monotonic()
+
+        removed = []
+        for key in {*self.clusters, *self._names} - found:
+            if key in self.clusters:
+                _release(self.clusters.pop(key))
+            self._names.pop(key, None)
+            record = self.records.pop(key, None)
+            if record is not None:
+                removed.append(record)
+        return removed
+
+    def _changed(self, key, record) -> bool:
+        if self.records.get(key) == record:
+            return False
+        self.records[key] = record
+        return True
+
+    def poll(self, summaries: Dict[Tuple[str, str], dict] = None) -> List[dict]:
+        """Return records for every cluster which has changed since the last poll.
+
+        If ``summaries`` are given only clusters with a summary are updated.
+
+        """
+        changed = [
+            record for key, record in self._names.items() if self._changed(key, record)
+        ]
+        for key, cluster in self.clusters.items():
+            if summaries is not None and key not in summaries:
+                continue
+            try:
+                record = cluster_record(
+                    cluster,
+                    key[0],
+                    self.fields,
+                    None if summaries is None else summaries[key],
+                )
+            except Exception:
+                continue
+            if self._changed(key, record):
+                changed.append(record)
+        return changed
+
+    async def summaries(self) -> Dict[Tuple[str, str], dict]:
+        """Get the summary of every cluster from its scheduler, all at once.
+
+        Clusters whose scheduler could not be reached are left out.
+        See :func:`dask_ctl.summary.get_summary`.
+
+        """
+        keys = list(self.clusters)
+        summaries = await asyncio.gather(
+            *[get_cluster_summary(self.clusters[key]) for key in keys],
+            return_exceptions=True,
+        )
+        return {
+            key: summary
+            for key, summary in zip(keys, summaries)
+            if not isinstance(summary, Exception)
+        }
+
+    async def refresh(self) -> List[dict]:
+        """Update the records of all clusters and return those which changed.
+
+        Worker statistics are fetched from each scheduler if they are in the fields.
+        Subclasses can override this to fetch other data from each scheduler.
+
+        """
+        if needs_summary(self.fields):
+            return self.poll(await self.summaries())
+        return self.poll()
+
+    async def watch(self) -> AsyncIterator[Tuple[List[dict], List[dict]]]:
+        """Yield ``(changed, removed)`` records each time something changes.
+
+        The first item contains every discovered cluster.
+
+        """
+        removed = await self.discover()
+        while True:
+            changed = await self.refresh()
+            if changed or removed:
+                yield changed, removed
+            await asyncio.sleep(self.interval)
+            removed = []
+            if time.monotonic() - self._last_discovery > self.rediscover_interval:
+                removed = await self.discover()
+
+    def close(self):
+        """Disconnect from all schedulers without shutting any clusters down."""
+        for cluster in self.clusters.values():
+            _release(cluster)
+        self.clusters.clear()
+        self.records.clear()
+        self._names.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
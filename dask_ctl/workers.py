@@ -0,0 +1,450 @@
+"""Sorted, filtered and paginated listings of the workers of a cluster.
+
+Workers can also be closed gracefully, which stops the scheduler giving them new tasks.
+
+Like :mod:`dask_ctl.summary` the sorting and filtering happens on the scheduler with
+the ``run_function`` handler, so only one page of workers is sent back at a time.
+
+The workers are only sorted for the first page, which also returns their order as a
+listing. Later pages are requested with the listing, so paging through N workers is one
+sort rather than one per page and nothing is kept on the scheduler.
+
+"""
+import operator
+import re
+import time
+from typing import Callable, Iterator, List, Tuple
+
+import dask.config
+from dask.utils import format_bytes, format_time, parse_bytes
+from distributed.deploy.cluster import Cluster
+
+from .utils import pickle_by_value, run_on_scheduler
+
+from . import config  # noqa
+
+pickle_by_value(__name__)
+
+#: Fields of each worker row
+WORKER_FIELDS = (
+    "address",
+    "name",
+    "nthreads",
+    "memory",
+    "memory_limit",
+    "cpu",
+    "processing",
+    "queued",
+    "last_seen",
+)
+
+# Fields which are a number of bytes, so filters on them accept sizes like 2GiB
+_BYTES_FIELDS = ("memory", "memory_limit")
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_FILTER = re.compile(r"^\s*(\w+)\s*(>=|<=|==|!=|>|<)\s*(\S+)\s*$")
+
+
+def parse_filter(expression: str) -> Tuple[str, str, float]:
+    """Parse a filter expression such as ``"memory>80%"`` or ``"cpu>=50"``.
+
+    The field can be any numeric field in :data:`WORKER_FIELDS`. Memory can be compared
+    with a size such as ``2GiB``, or with a percentage of the worker's memory limit.
+
+    Returns
+    -------
+    tuple
+        The field, the operator and the value to compare with. A percentage of
+        memory is returned as the ``memory_percent`` field.
+
+    Examples
+    --------
+    >>> parse_filter("memory>80%")
+    ('memory_percent', '>', 80.0)
+    >>> parse_filter("memory<=2GiB")
+    ('memory', '<=', 2147483648.0)
+
+    """
+    match = _FILTER.match(expression)
+    if not match:
+        raise ValueError(
+            f"Invalid filter {expression!r}, expected e.g 'memory>80%' or 'cpu>=50'"
+        )
+    field, op, value = match.groups()
+    if field not in WORKER_FIELDS or field in ("address", "name"):
+        raise ValueError(
+            f"Can't filter on {field!r}, expected one of "
+            f"{', '.join(f for f in WORKER_FIELDS if f not in ('address', 'name'))}"
+        )
+    try:
+        if field == "memory" and value.endswith("%"):
+            return "memory_percent", op, float(value[:-1])
+        if field in _BYTES_FIELDS:
+            return field, op, float(parse_bytes(value))
+        return field, op, float(value.rstrip("%"))
+    except ValueError:
+        raise ValueError(f"Invalid value {value!r} in filter {expression!r}") from None
+
+
+#: Display widths of the columns from :func:`format_worker`, the address column is
+#: widened to fit the addresses on the first page
+WORKER_COLUMN_WIDTHS = {
+    "address": 24,
+    "name": 6,
+    "threads": 7,
+    "memory": 16,
+    "cpu": 4,
+    "processing": 10,
+    "queued": 6,
+    "last_seen": 13,
+}
+
+
+def format_worker(row: dict) -> dict:
+    """Format the values of a worker row for display."""
+    limit = row["memory_limit"]
+    return {
+        "address": row["address"],
+        "name": str(row["name"]),
+        "threads": str(row["nthreads"]),
+        "memory": format_bytes(row["memory"])
+        + (f" ({row['memory'] / limit:.0%})" if limit else ""),
+        "cpu": f"{row['cpu']:.0f}%",
+        "processing": str(row["processing"]),
+        "queued": str(row["queued"]),
+        "last_seen": f"{format_time(row['last_seen'])} ago",
+    }
+
+
+def _worker_row(address: str, worker: dict, now: float) -> dict:
+    metrics = worker.get("metrics") or {}
+    task_counts = metrics.get("task_counts") or {}
+    return {
+        "address": address,
+        "name": worker.get("name"),
+        "nthreads": worker.get("nthreads") or 0,
+        "memory": metrics.get("memory") or 0,
+        "memory_limit": worker.get("memory_limit") or 0,
+        "cpu": metrics.get("cpu") or 0,
+        "processing": task_counts.get("executing", 0)
+        + task_counts.get("long-running", 0),
+        "queued": task_counts.get("ready", 0) + task_counts.get("constrained", 0),
+        "last_seen": max(now - (worker.get("last_seen") or now), 0),
+    }
+
+
+def _value(row: dict, field: str) -> float:
+    if field == "memory_percent":
+        return 100 * row["memory"] / row["memory_limit"] if row["memory_limit"] else 0
+    return row[field]
+
+
+def select_workers(
+    workers: dict,
+    sort: str = None,
+    ascending: bool = False,
+    filters=(),
+    offset: int = 0,
+    limit: int = None,
+    now: float = None,
+) -> dict:
+    """Filter, sort and take a page of workers.
+
+    Parameters
+    ----------
+    workers
+        Worker details keyed by address, as in the ``workers`` of a scheduler identity.
+    sort, ascending, filters, offset, limit
+        See :func:`get_workers`.
+    now (optional)
+        Time to measure ``last_seen`` from, defaults to the current time.
+
+    Returns
+    -------
+    dict
+        ``total`` is the number of workers which matched the filters, and ``workers``
+        the rows of the page.
+
+    """
+    now = time.time() if now is None else now
+    rows = [_worker_row(address, worker, now) for address, worker in workers.items()]
+    for field, op, value in filters:
+        compare = _OPERATORS[op]
+        rows = [row for row in rows if compare(_value(row, field), value)]
+    rows.sort(key=operator.itemgetter("address"))
+    if sort == "name":
+        # Worker names can be a mix of integers and strings
+        rows.sort(key=lambda row: str(row["name"]), reverse=not ascending)
+    elif sort is not None:
+        rows.sort(key=lambda row: _value(row, sort), reverse=not ascending)
+    end = None if limit is None else offset + limit
+    return {"total": len(rows), "workers": rows[offset:end]}
+
+
+def select_page(
+    details: Callable[[list], dict],
+    listing: list = None,
+    sort: str = None,
+    ascending: bool = False,
+    filters=(),
+    offset: int = 0,
+    limit: int = None,
+    end: int = None,
+) -> dict:
+    """Take the next page of a listing, or select the workers and take the first page.
+
+    Parameters
+    ----------
+    details
+        Called with a list of addresses, or ``None`` for all workers, and returns the
+        details of those workers keyed by address, see :func:`select_workers`.
+    listing (optional)
+        Listing returned with the previous page, the page is taken from its start.
+    sort, ascending, filters, offset, limit, end
+        See :func:`get_workers`. All but ``limit`` only apply when selecting.
+
+    Returns
+    -------
+    dict
+        As :func:`select_workers`, with the ``listing`` to take the next page from.
+        It is ``None`` on the last page. Workers which left since the listing was
+        made are left out of its pages.
+
+    """
+    now = time.time()
+    if listing is None:
+        selected = select_workers(
+            details(None),
+            sort,
+            ascending,
+            filters,
+            offset=offset,
+            limit=None if end is None else max(end - offset, 0),
+            now=now,
+        )
+        total, rows = selected["total"], selected["workers"]
+        rest = [] if limit is None else [row["address"] for row in rows[limit:]]
+        rows = rows[:limit]
+    else:
+        total, addresses = listing
+        page, rest = (
+            (addresses, []) if limit is None else (addresses[:limit], addresses[limit:])
+        )
+        workers = details(page)
+        rows = [_worker_row(a, workers[a], now) for a in page if a in workers]
+    return {"total": total, "workers": rows, "listing": [total, rest] if rest else None}
+
+
+def scheduler_workers(dask_scheduler=None, **kwargs) -> dict:
+    """Select a page of workers, run on the scheduler itself. See :func:`select_page`."""
+    workers = dask_scheduler.workers
+
+    def details(addresses):
+        return {
+            ws.address: {
+                "name": ws.name,
+                "nthreads": ws.nthreads,
+                "memory_limit": ws.memory_limit,
+                "last_seen": ws.last_seen,
+                "metrics": ws.metrics,
+            }
+            for ws in (
+                workers.values()
+                if addresses is None
+                else (workers[a] for a in addresses if a in workers)
+            )
+        }
+
+    return select_page(details, **kwargs)
+
+
+def _select_identity_page(identity: dict, **kwargs) -> dict:
+    workers = identity.get("workers", {})
+
+    def details(addresses):
+        if addresses is None:
+            return workers
+        return {a: workers[a] for a in addresses if a in workers}
+
+    return select_page(details, **kwargs)
+
+
+async def get_workers(
+    scheduler_comm,
+    sort: str = None,
+    ascending: bool = False,
+    filters=(),
+    offset: int = 0,
+    limit: int = None,
+    listing: list = None,
+    end: int = None,
+) -> dict:
+    """Get a page of the workers of a scheduler, filtered and sorted on the scheduler.
+
+    If the scheduler can't run the selection the full identity is fetched and the
+    workers are selected locally instead.
+
+    Parameters
+    ----------
+    scheduler_comm
+        An rpc to the scheduler, such as ``cluster.scheduler_comm``.
+    sort (optional)
+        One of :data:`WORKER_FIELDS` to sort by, largest first. Workers are otherwise
+        in address order.
+    ascending (optional)
+        Sort smallest first.
+    filters (optional)
+        Filters from :func:`parse_filter`, workers must match all of them.
+    offset (optional)
+        Number of matching workers to skip.
+    limit (optional)
+        Maximum number of workers to return.
+    listing (optional)
+        The ``listing`` returned with the previous page, so that the next page is
+        taken from the same order without selecting the workers again.
+    end (optional)
+        Position of the last matching worker to page through, the ``listing`` stops
+        there. Defaults to all matching workers.
+
+    Returns
+    -------
+    dict
+        See :func:`select_page`.
+
+    Examples
+    --------
+    >>> await get_workers(  # doctest: +SKIP
+    ...     cluster.scheduler_comm, sort="memory", filters=[parse_filter("cpu>50")]
+    ... )
+    {'total': 2, 'workers': [{'address': 'tcp://10.0.0.4:40121', ...}, ...], ...}
+
+    """
+    kwargs = dict(
+        sort=sort,
+        ascending=ascending,
+        filters=[tuple(f) for f in filters],
+        offset=offset,
+        limit=limit,
+        listing=listing,
+        end=end,
+    )
+    return await run_on_scheduler(
+        scheduler_comm,
+        scheduler_workers,
+        lambda identity: _select_identity_page(identity, **kwargs),
+        **kwargs,
+    )
+
+
+def scheduler_close_gracefully(dask_scheduler=None) -> List[str]:
+    """Close every worker gracefully, run on the scheduler itself.
+
+    This is the first step of retiring a worker. The scheduler no longer assigns new
+    tasks to the workers, but they finish the tasks they already have and keep their
+    data.
+
+    """
+    stimulus_id = f"dask-ctl-close-gracefully-{time.time()}"
+    for ws in list(dask_scheduler.workers.values()):
+        dask_scheduler.handle_worker_status_change(
+            "closing_gracefully", ws, stimulus_id
+        )
+        dask_scheduler.stream_comms[ws.address].send(
+            {
+                "op": "worker-status-change",
+                "status": "closing_gracefully",
+                "stimulus_id": stimulus_id,
+            }
+        )
+    return list(dask_scheduler.workers)
+
+
+async def close_workers_gracefully(scheduler_comm) -> List[str]:
+    """Stop the scheduler assigning new tasks to any of its current workers.
+
+    Tasks which are submitted afterwards wait on the scheduler. If the scheduler
+    can't run :func:`scheduler_close_gracefully` nothing is changed.
+
+    Parameters
+    ----------
+    scheduler_comm
+        An rpc to the scheduler, such as ``cluster.scheduler_comm``.
+
+    Returns
+    -------
+    list
+        The addresses of the workers.
+
+    """
+    return await run_on_scheduler(
+        scheduler_comm,
+        scheduler_close_gracefully,
+        lambda identity: list(identity.get("workers", {})),
+    )
+
+
+def iter_workers(
+    cluster: Cluster,
+    sort: str = None,
+    ascending: bool = False,
+    filters=(),
+    top: int = None,
+    page_size: int = None,
+) -> Iterator[Tuple[List[dict], int]]:
+    """Yield pages of the workers of a cluster as they are fetched.
+
+    Each page is a separate request to the scheduler, so only one page is held at a
+    time. The workers are sorted and filtered once, when the first page is fetched,
+    and later pages follow that order with up to date details. Workers which join
+    while paging are not listed and workers which leave are skipped.
+
+    Parameters
+    ----------
+    cluster
+        Cluster manager to list the workers of.
+    sort, ascending, filters
+        See :func:`get_workers`.
+    top (optional)
+        Stop after this many workers.
+    page_size (optional)
+        Workers to fetch at a time. Defaults to ``ctl.workers.page-size``.
+
+    Yields
+    ------
+    tuple
+        Each tuple contains the worker rows of the page and the total number of
+        workers which matched the filters.
+
+    Examples
+    --------
+    >>> cluster = get_cluster("proxycluster-8786")  # doctest: +SKIP
+    >>> for page, total in iter_workers(cluster, sort="memory", top=20):  # doctest: +SKIP
+    ...     print(page)
+
+    """
+    page_size = dask.config.get("ctl.workers.page-size", override_with=page_size)
+    listing = None
+    while True:
+        page = cluster.sync(
+            get_workers,
+            cluster.scheduler_comm,
+            sort=sort,
+            ascending=ascending,
+            filters=filters,
+            limit=page_size,
+            listing=listing,
+            end=top,
+        )
+        if page["workers"]:
+            yield page["workers"], page["total"]
+        listing = page["listing"]
+        if listing is None:
+            return